@@ -0,0 +1,97 @@
+﻿import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from synthetic import fill
+
+# Отчёты, которые строятся агрегатами по всей таблице съёмок.
+AGGREGATES = [
+    ("Затраты на актёров", """
+        SELECT a.id, a.fio, IFNULL(SUM(s.гонорар), 0)
+        FROM actors a
+        LEFT JOIN shootings s ON a.id = s.actor_id
+        GROUP BY a.id
+    """),
+    ("Сверка затрат по фильмам", """
+        SELECT movie_id, SUM(IFNULL(гонорар, 0)), COUNT(*)
+        FROM shootings
+        GROUP BY movie_id
+    """),
+]
+
+SHOOTING_SQL = "INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар) VALUES (?, ?, ?, ?, ?)"
+
+def shooting_rows(count, actors, movies):
+    return [(random.randint(1, actors), random.randint(1, movies), "2025-06-01", f"Сцена {i}", 100.0)
+            for i in range(count)]
+
+def single_inserts(conn, rows):
+    # Так пишет форма съёмок: одна строка - одна транзакция.
+    started = time.perf_counter()
+    for row in rows:
+        conn.execute(SHOOTING_SQL, row)
+        conn.commit()
+    return len(rows) / (time.perf_counter() - started)
+
+def batch_insert(conn, rows):
+    started = time.perf_counter()
+    conn.executemany(SHOOTING_SQL, rows)
+    conn.commit()
+    return len(rows) / (time.perf_counter() - started)
+
+def aggregate(conn, sql, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def run_profile(source, directory, profile, args):
+    path = os.path.join(directory, f"{profile}.db")
+    shutil.copyfile(source, path)
+    conn = database.connect(path, profile)
+    random.seed(7)
+    results = {
+        "Вставка по одной, строк/с": single_inserts(conn, shooting_rows(args.single, args.actors, args.movies)),
+        "Пакетная вставка, строк/с": batch_insert(conn, shooting_rows(args.batch, args.actors, args.movies)),
+    }
+    for name, sql in AGGREGATES:
+        results[f"{name}, мс"] = aggregate(conn, sql, args.repeat)
+    conn.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость вставки и агрегатов при разных профилях соединения")
+    parser.add_argument("--actors", type=int, default=1000)
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--shootings", type=int, default=200000)
+    parser.add_argument("--single", type=int, default=300, help="число вставок с отдельным commit")
+    parser.add_argument("--batch", type=int, default=100000, help="число строк пакетной вставки")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profiles", nargs="+", default=list(database.PROFILES), choices=list(database.PROFILES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.db")
+        conn = sqlite3.connect(source)
+        database.migrate(conn)
+        fill(conn, args.actors, args.movies, args.shootings)
+        conn.close()
+
+        results = {profile: run_profile(source, directory, profile, args) for profile in args.profiles}
+
+    print(f"{'':32}" + "".join(f"{profile:>12}" for profile in args.profiles))
+    for metric in results[args.profiles[0]]:
+        print(f"{metric:32}" + "".join(f"{results[profile][metric]:12.1f}" for profile in args.profiles))
+
+if __name__ == "__main__":
+    main()
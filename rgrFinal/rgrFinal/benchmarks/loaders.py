@@ -0,0 +1,158 @@
+﻿import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+
+import analytics
+import conflicts
+import database
+import exporter
+import repositories
+import rgrFinal
+from repositories import (ActorRepository, MovieRepository, ShootingRepository, SCHEDULE_PERIODS, TIMELINE_GROUPS,
+                          period_range)
+import results
+
+# Время загрузчиков вкладок на синтетических базах, в две части:
+# - данные: те же функции и запросы, что вкладки выполняют в фоновом потоке
+#   (DatabaseExecutor) или при загрузке списка, без Tk - работают и на
+#   сервере без дисплея;
+# - виджеты: загрузка вкладок скрытого окна программы вместе с отрисовкой.
+#   Без дисплея (на сервере - без xvfb-run) эта часть пропускается.
+# Запросы ReportService и репозиториев по отдельности измеряет services.py.
+
+EXPORT_TYPES = ["actors", "movies", "shootings"]
+# Списки: (название, репозиторий, по убыванию) - как в VirtualTreeview вкладок.
+LISTS = [
+    ("actors", ActorRepository, False),
+    ("movies", MovieRepository, False),
+    ("shootings", ShootingRepository, True),
+]
+# Строк в первом окне списка: видимые строки и запас VirtualTreeview.
+FIRST_WINDOW = 60
+
+class LoaderFailed(Exception):
+    pass
+
+def list_window(conn, repository, descending):
+    # Запросы VirtualTreeview.refresh: число строк и первое окно.
+    count_sql = getattr(repository, "COUNT_SQL", None) or f"SELECT COUNT(*) FROM ({repository.LIST_SQL})"
+    direction = "DESC" if descending else "ASC"
+    order = ", ".join(f"{expr} {direction}" for expr, _ in repository.LIST_KEYS)
+
+    def load():
+        conn.execute(count_sql).fetchone()
+        conn.execute(f"{repository.LIST_SQL} ORDER BY {order} LIMIT ?", (FIRST_WINDOW,)).fetchall()
+    return load
+
+def data_loaders(conn, export_dir):
+    # Кэш отчётов не передаётся: измеряются сами запросы.
+    month = period_range("Этот месяц")
+
+    def schedule(period):
+        return lambda: repositories.load_schedule(conn, *period_range(period))
+
+    def timeline(group):
+        return lambda: repositories.load_timeline(conn, group, *month)
+
+    def export(data_type):
+        return lambda: exporter.export_table(conn, data_type, export_dir)
+
+    result = [(f"list_window[{name}]", list_window(conn, repository, descending))
+              for name, repository, descending in LISTS]
+    result += [(f"load_schedule[{period}]", schedule(period)) for period in SCHEDULE_PERIODS]
+    result += [("load_calendar[Календарь]", lambda: repositories.load_calendar(conn, *month))]
+    result += [(f"load_timeline[{layout}]", timeline(group)) for layout, group in TIMELINE_GROUPS.items()]
+    result += [
+        ("load_actor_expenses", lambda: repositories.load_actor_expenses(conn)),
+        ("load_movie_budgets", lambda: repositories.load_movie_budgets(conn, None, date.today())),
+        ("analytics.load_report", lambda: analytics.load_report(conn)),
+        ("conflicts.load_conflicts", lambda: conflicts.load_conflicts(conn)),
+    ]
+    result += [(f"export_table[{data_type}]", export(data_type)) for data_type in EXPORT_TYPES]
+    return result
+
+def open_window():
+    # Скрытое окно или None, если дисплея нет.
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    return root
+
+def wait(app):
+    # Фоновые загрузки считаются законченными, когда результат отрисован.
+    while app.pending:
+        app.executor.poll()
+        time.sleep(0.001)
+    app.executor.poll()
+    app.master.update_idletasks()
+
+def widget_loaders(app, export_dir):
+    def schedule(period):
+        def load():
+            app.schedule_period.set(period)
+            app.load_schedule_data()
+        return load
+
+    def calendar(layout):
+        def load():
+            app.calendar_layout.set(layout)
+            app.load_calendar_data()
+        return load
+
+    def export(data_type):
+        return lambda: app.export_data(data_type)
+
+    result = [
+        ("load_actors", app.load_actors),
+        ("load_movies", app.load_movies),
+        ("load_shootings", app.load_shootings),
+    ]
+    result += [(f"load_schedule_data[{period}]", schedule(period)) for period in SCHEDULE_PERIODS]
+    result += [(f"load_calendar_data[{layout}]", calendar(layout)) for layout in ["Календарь"] + list(TIMELINE_GROUPS)]
+    result += [
+        ("load_expenses_tab_data", app.load_expenses_tab_data),
+        ("load_budget_tab_data", app.load_budget_tab_data),
+    ]
+    result += [(f"export_data[{data_type}]", export(data_type)) for data_type in EXPORT_TYPES]
+    return result
+
+def run_scale(path, repeat):
+    def failed(title, message):
+        raise LoaderFailed(message)
+
+    with tempfile.TemporaryDirectory() as export_dir:
+        conn = database.connect(path)
+        try:
+            # Как при запуске программы: база приводится к последней схеме.
+            database.migrate(conn)
+            measured = {f"data:{name}": results.measure(load, repeat) for name, load in data_loaders(conn, export_dir)}
+        finally:
+            conn.close()
+
+        root = open_window()
+        if root is None:
+            print("Дисплея нет: замеры виджетов пропущены (запустите через xvfb-run).")
+            return measured
+        rgrFinal.messagebox.showerror = failed
+        rgrFinal.filedialog.askdirectory = lambda **kwargs: export_dir
+        app = rgrFinal.FilmStudioApp(root, db_path=path)
+        try:
+            for name in app.tabs:
+                app.ensure_tab(name)
+            wait(app)
+            measured.update((name, results.measure(load, repeat, lambda: wait(app)))
+                            for name, load in widget_loaders(app, export_dir))
+        finally:
+            app.on_close()
+        return measured
+
+if __name__ == "__main__":
+    results.main("Время загрузчиков вкладок на синтетических базах", run_scale)
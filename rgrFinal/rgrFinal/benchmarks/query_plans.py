@@ -0,0 +1,78 @@
+﻿import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from synthetic import fill
+
+# Горячие запросы программы: (название, SQL, параметры).
+QUERIES = [
+    ("Проверка бюджета", "SELECT SUM(гонорар) FROM shootings WHERE movie_id=?", (7,)),
+    ("Удаление фильма", "SELECT COUNT(*) FROM shootings WHERE movie_id=?", (7,)),
+    ("Удаление актёра", "SELECT COUNT(*) FROM shootings WHERE actor_id=?", (7,)),
+    ("Затраты актёра", "SELECT IFNULL(SUM(гонорар), 0) FROM shootings WHERE actor_id=?", (7,)),
+    ("Расписание за месяц", """
+        SELECT a.fio, m.название, s.дата, s.сцена
+        FROM shootings s
+        JOIN actors a ON s.actor_id = a.id
+        JOIN movies m ON s.movie_id = m.id
+        WHERE s.дата >= ? AND s.дата <= ?
+        ORDER BY s.дата, s.id
+    """, ("2025-03-01", "2025-03-31")),
+    ("Поиск актёра по ФИО", "SELECT id FROM actors WHERE fio=?", ("Актёр 7",)),
+    ("Поиск фильма по названию", "SELECT id FROM movies WHERE название=?", ("Фильм 7",)),
+]
+
+def plan(conn, sql, params):
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return "; ".join(row[-1] for row in rows)
+
+def timing(conn, sql, params, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def report(conn, title, repeat):
+    print(f"\n=== {title} (версия схемы {database.schema_version(conn)}) ===")
+    results = {}
+    for name, sql, params in QUERIES:
+        ms = timing(conn, sql, params, repeat)
+        results[name] = ms
+        print(f"{name:28} {ms:9.3f} мс  {plan(conn, sql, params)}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Планы и время горячих запросов до и после индексов")
+    parser.add_argument("--actors", type=int, default=1000)
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--shootings", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        conn = sqlite3.connect(os.path.join(directory, "bench.db"))
+        # Версия схемы до миграции с индексами горячих запросов.
+        database.migrate(conn, target=database.MIGRATIONS.index(database.migration_indexes))
+        fill(conn, args.actors, args.movies, args.shootings)
+
+        before = report(conn, "Без индексов", args.repeat)
+        started = time.perf_counter()
+        database.migrate(conn)
+        print(f"\nМиграция до версии {database.LATEST_VERSION}: {time.perf_counter() - started:.2f} с")
+        after = report(conn, "С индексами", args.repeat)
+
+        print("\nУскорение:")
+        for name, _, _ in QUERIES:
+            print(f"{name:28} x{before[name] / max(after[name], 1e-6):.1f}")
+        conn.close()
+
+if __name__ == "__main__":
+    main()
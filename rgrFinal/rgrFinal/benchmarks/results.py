@@ -0,0 +1,97 @@
+﻿import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from synthetic import SCALES, generate
+
+# Общая часть бенчмарков loaders.py, services.py и startup.py: прогон по масштабам
+# синтетической базы, запись результатов в JSON и сравнение с прошлым
+# прогоном.
+
+REGRESSION_THRESHOLD = 1.2
+
+def revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(load, repeat, wait=None):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        load()
+        if wait is not None:
+            wait()
+        runs.append((time.perf_counter() - started) * 1000)
+    return summary(runs)
+
+def summary(runs):
+    return {"min_ms": min(runs), "median_ms": statistics.median(runs), "runs_ms": runs}
+
+def compare(results, baseline):
+    print(f"\nСравнение с {baseline.get('revision') or 'прошлым прогоном'} (медиана, мс):")
+    for scale, measured in results["scales"].items():
+        old_scale = baseline.get("scales", {}).get(scale)
+        if old_scale is None:
+            continue
+        for name, value in measured["loaders"].items():
+            old = old_scale["loaders"].get(name)
+            if old is None:
+                continue
+            ratio = value["median_ms"] / max(old["median_ms"], 1e-6)
+            mark = "  <-- медленнее" if ratio > REGRESSION_THRESHOLD else ""
+            print(f"{scale:6} {name:40} {old['median_ms']:10.1f} {value['median_ms']:10.1f}  x{ratio:.2f}{mark}")
+
+def main(description, run_scale):
+    # run_scale(path, repeat) возвращает {название: measure(...)}.
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["1k", "100k"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", help="папка для баз; готовые базы используются повторно")
+    parser.add_argument("--output", help="файл JSON с результатами")
+    parser.add_argument("--compare", help="файл JSON прошлого прогона")
+    args = parser.parse_args()
+
+    results = {
+        "revision": revision(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeat": args.repeat,
+        "scales": {},
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = args.data_dir or temp_dir
+        for scale in args.scales:
+            actors, movies, shootings = SCALES[scale]
+            path = os.path.join(data_dir, f"filmstudio_{scale}.db")
+            if not os.path.exists(path):
+                generate(path, actors, movies, shootings)
+
+            measured = run_scale(path, args.repeat)
+            results["scales"][scale] = {
+                "actors": actors,
+                "movies": movies,
+                "shootings": shootings,
+                "loaders": measured,
+            }
+            print(f"\n=== {scale}: {actors} актёров, {movies} фильмов, {shootings} съёмок ===")
+            for name, value in measured.items():
+                print(f"{name:40} {value['min_ms']:10.1f} мс  (медиана {value['median_ms']:.1f})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
@@ -0,0 +1,84 @@
+﻿import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+from cache import QueryCache
+import conflicts
+import database
+import results
+from repositories import (ActorRepository, MovieRepository, ShootingRepository, ReportService,
+                          SCHEDULE_PERIODS, TIMELINE_GROUPS, period_range)
+from search import SearchService
+
+# Время запросов слоя данных без Tk: те же выборки, что делают вкладки,
+# но напрямую через репозитории и ReportService.
+
+# Запросы поиска: общее слово, начало слова и точное совпадение.
+SEARCH_TEXTS = ["сцена", "акт", "Сцена 12345"]
+
+def services(conn):
+    actors = ActorRepository(conn)
+    movies = MovieRepository(conn)
+    shootings = ShootingRepository(conn)
+    reports = ReportService(conn)
+    # Повторное чтение агрегата из кэша: первый вызов заполняет кэш.
+    cached = ReportService(conn, QueryCache())
+    cached.actor_expenses()
+    cached.movie_budgets()
+    finder = SearchService(conn)
+    # Расчёт аналитики по уже загруженным столбцам, отдельно от загрузки.
+    columns = analytics.ShootingColumns.load(conn)
+    # Проверка записи по индексу уже загруженного актёра.
+    schedule_index = conflicts.ScheduleIndex(conn)
+    schedule_index.actor(1)
+
+    def schedule(period):
+        return lambda: reports.schedule(*period_range(period))
+
+    def timeline(group):
+        return lambda: reports.timeline(group, *period_range("Этот месяц"))
+
+    def search(text):
+        return lambda: finder.search_all(text)
+
+    result = [
+        ("ActorRepository.choices", actors.choices),
+        ("MovieRepository.choices", movies.choices),
+        ("MovieRepository.spend", lambda: movies.spend(1)),
+        ("ShootingRepository.get", lambda: shootings.get(1)),
+    ]
+    result += [(f"ReportService.schedule[{period}]", schedule(period)) for period in SCHEDULE_PERIODS]
+    result += [
+        ("ReportService.calendar[Этот месяц]", lambda: reports.calendar(*period_range("Этот месяц"))),
+        ("ReportService.schedule_for[актёр]", lambda: reports.schedule_for(*period_range("Этот месяц"), actor_id=1)),
+    ]
+    result += [(f"ReportService.timeline[{group}]", timeline(group)) for group in TIMELINE_GROUPS.values()]
+    result += [
+        ("ReportService.actor_expenses", reports.actor_expenses),
+        ("ReportService.actor_expense", lambda: reports.actor_expense(1)),
+        ("ReportService.movie_budgets", reports.movie_budgets),
+        ("ReportService.actor_expenses[кэш]", cached.actor_expenses),
+        ("ReportService.movie_budgets[кэш]", cached.movie_budgets),
+        ("ReportService.check_movie_spend", reports.check_movie_spend),
+    ]
+    result += [(f"SearchService.search_all[{text}]", search(text)) for text in SEARCH_TEXTS]
+    result += [
+        ("analytics.ShootingColumns.load", lambda: analytics.ShootingColumns.load(conn)),
+        ("analytics.build_report", lambda: analytics.build_report(columns)),
+        ("analytics.burn_down", lambda: analytics.burn_down(columns, 1)),
+        ("conflicts.ScheduleIndex.check", lambda: schedule_index.check(1, 1, "2025-01-01", 0)),
+        ("conflicts.scan_schedule", lambda: conflicts.scan_schedule(conn)),
+    ]
+    return result
+
+def run_scale(path, repeat):
+    conn = database.connect(path)
+    try:
+        return {name: results.measure(load, repeat) for name, load in services(conn)}
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    results.main("Время запросов слоя данных на синтетических базах", run_scale)
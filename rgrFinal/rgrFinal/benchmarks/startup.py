@@ -0,0 +1,68 @@
+﻿import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from executor import DatabaseExecutor
+import rgrFinal
+from loaders import LISTS, list_window, open_window, wait
+import results
+
+# Время запуска программы по этапам. Как и в loaders.py, две части:
+# - данные: этапы запуска без окна - подключение с профилем программы,
+#   миграции, запуск рабочих потоков и первое окно списка актёров
+#   (вкладка, открытая при запуске); работают без дисплея;
+# - окно: этапы FilmStudioApp.timings и построение каждой вкладки при
+#   первом открытии. Без дисплея (на сервере - без xvfb-run) пропускаются.
+
+TOTAL = "Запуск до готовности окна"
+DATA_TOTAL = "data:Запуск без окна"
+
+def data_startup(path, stages):
+    started = time.perf_counter()
+
+    def stage(name, step):
+        begun = time.perf_counter()
+        result = step()
+        stages.setdefault(f"data:{name}", []).append((time.perf_counter() - begun) * 1000)
+        return result
+
+    conn = stage("Подключение к базе", lambda: database.connect(path))
+    try:
+        stage("Миграции схемы", lambda: database.migrate(conn))
+        executor = stage("Запуск фоновых потоков",
+                         lambda: DatabaseExecutor(path, workers=2, connect=database.connect))
+        name, repository, descending = LISTS[0]
+        stage(f"Первое окно списка [{name}]", list_window(conn, repository, descending))
+        stages.setdefault(DATA_TOTAL, []).append((time.perf_counter() - started) * 1000)
+        executor.shutdown()
+    finally:
+        conn.close()
+
+def run_scale(path, repeat):
+    stages = {}
+    for _ in range(repeat):
+        data_startup(path, stages)
+    for _ in range(repeat):
+        root = open_window()
+        if root is None:
+            print("Дисплея нет: замеры окна пропущены (запустите через xvfb-run).")
+            break
+        started = time.perf_counter()
+        app = rgrFinal.FilmStudioApp(root, db_path=path)
+        root.update()
+        stages.setdefault(TOTAL, []).append((time.perf_counter() - started) * 1000)
+        try:
+            for name in app.tabs:
+                app.ensure_tab(name)
+                wait(app)
+            for stage, ms in app.timings:
+                stages.setdefault(stage, []).append(ms)
+        finally:
+            app.on_close()
+    return {stage: results.summary(runs) for stage, runs in stages.items()}
+
+if __name__ == "__main__":
+    results.main("Время запуска программы и первого открытия вкладок", run_scale)
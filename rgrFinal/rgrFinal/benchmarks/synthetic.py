@@ -0,0 +1,78 @@
+﻿import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+# Масштабы синтетической базы: (актёры, фильмы, съёмки).
+SCALES = {
+    "1k": (100, 20, 1000),
+    "100k": (1000, 200, 100000),
+    "1m": (5000, 1000, 1000000),
+}
+
+AVERAGE_FEE = 5050
+
+def fill(conn, actors, movies, shootings, start=date(2024, 1, 1), days=730, seed=42):
+    # Бюджеты подобраны так, чтобы часть фильмов оказалась с перерасходом.
+    random.seed(seed)
+    c = conn.cursor()
+    c.executemany("INSERT INTO actors (fio, ставка_за_день) VALUES (?, ?)",
+                  ((f"Актёр {i}", 1000 + i % 50 * 100) for i in range(1, actors + 1)))
+    average_spend = shootings / movies * AVERAGE_FEE
+    c.executemany("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, ?, ?)",
+                  ((f"Фильм {i}", f"Режиссёр {i % 20}", round(average_spend * random.uniform(0.8, 1.5), 2))
+                   for i in range(1, movies + 1)))
+    c.executemany("INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар) VALUES (?, ?, ?, ?, ?)",
+                  ((random.randint(1, actors), random.randint(1, movies),
+                    str(start + timedelta(days=random.randint(0, days))), f"Сцена {i}",
+                    float(random.randint(100, 10000))) for i in range(shootings)))
+    conn.commit()
+
+def generate(path, actors, movies, shootings, start=None, days=730, seed=42):
+    # Создаёт filmstudio.db последней версии схемы; по умолчанию даты съёмок
+    # лежат вокруг сегодняшнего дня, чтобы фильтры расписания не были пустыми.
+    if start is None:
+        start = date.today() - timedelta(days=days // 2)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    try:
+        # Поисковый индекс строится последней миграцией по уже заполненным
+        # таблицам: так быстрее, чем триггером на каждую строку.
+        database.migrate(conn, database.MIGRATIONS.index(database.migration_search_index))
+        fill(conn, actors, movies, shootings, start, days, seed)
+        database.migrate(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетическая база filmstudio.db заданного размера")
+    parser.add_argument("path")
+    parser.add_argument("--scale", choices=list(SCALES), default="100k")
+    parser.add_argument("--actors", type=int)
+    parser.add_argument("--movies", type=int)
+    parser.add_argument("--shootings", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    actors, movies, shootings = SCALES[args.scale]
+    actors = args.actors or actors
+    movies = args.movies or movies
+    shootings = args.shootings if args.shootings is not None else shootings
+
+    started = time.perf_counter()
+    generate(args.path, actors, movies, shootings, seed=args.seed)
+    print(f"{args.path}: {actors} актёров, {movies} фильмов, {shootings} съёмок "
+          f"за {time.perf_counter() - started:.2f} с")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+﻿import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+# Кэш результатов запросов отчётов: ключ - SQL и параметры, значение -
+# список строк и таблицы, из которых он построен. Объём ограничен оценкой
+# памяти, при переполнении вытесняются давно не читавшиеся результаты.
+# Запись в таблицу (invalidate) удаляет все зависящие от неё результаты.
+# Кэшем пользуются рабочие потоки DatabaseExecutor и поток Tk, поэтому
+# всё под блокировкой. Возвращаемые списки общие - изменять их нельзя.
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions", "invalidations", "entries", "size"])
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# По стольким строкам оценивается средний размер строки результата.
+SIZE_SAMPLE = 100
+
+def estimate_size(rows):
+    if not rows:
+        return sys.getsizeof(rows)
+    sample = rows[:SIZE_SAMPLE]
+    row_size = sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in sample)
+    return sys.getsizeof(rows) + row_size * len(rows) // len(sample)
+
+class QueryCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        # Номер изменения каждой таблицы и всего кэша (clear): результат,
+        # посчитанный во время записи в его таблицу, не сохраняется.
+        self.versions = {}
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def fetch(self, key, tables, load):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            versions = self._versions(tables)
+
+        rows = load()
+        size = estimate_size(rows)
+        with self.lock:
+            if size <= self.max_bytes and self._versions(tables) == versions:
+                self._store(key, rows, tables, size)
+        return rows
+
+    def invalidate(self, *tables):
+        with self.lock:
+            for table in tables:
+                self.versions[table] = self.versions.get(table, 0) + 1
+            stale = [key for key, (_, depends, _) in self.entries.items() if depends.intersection(tables)]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.epoch += 1
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return CacheStats(self.hits, self.misses, self.evictions, self.invalidations,
+                              len(self.entries), self.size)
+
+    def _versions(self, tables):
+        return (self.epoch,) + tuple(self.versions.get(table, 0) for table in tables)
+
+    def _store(self, key, rows, tables, size):
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (rows, frozenset(tables), size)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.size -= size
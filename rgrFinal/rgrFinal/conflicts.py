@@ -0,0 +1,224 @@
+﻿import sys
+import time
+from collections import defaultdict, namedtuple
+from datetime import date
+
+import database
+
+# Конфликты расписания актёров, без Tk:
+# double   - актёр в один день снимается в разных фильмах;
+# rate     - гонорары актёра за день больше его ставки за день;
+# overload - у актёра за день больше MAX_SHOOTINGS_PER_DAY съёмок.
+# Проверка одной записи идёт по индексу ScheduleIndex: съёмки каждого
+# актёра разложены по дням в словаре, день находится по ключу. Проверка
+# всего расписания (scan_schedule) - один проход по day_totals в порядке
+# первичного ключа (день, актёр, фильм), без сортировки.
+
+MAX_SHOOTINGS_PER_DAY = 3
+
+KIND_TITLES = {
+    "double": "Двойное бронирование",
+    "rate": "Превышение ставки",
+    "overload": "Перегруженный день",
+}
+
+# day - номер дня date.toordinal(), movie_ids - фильмы актёра в этот день.
+Conflict = namedtuple("Conflict", ["kind", "day", "actor_id", "actor", "movie_ids", "count", "fees", "rate"])
+
+def describe(conflict):
+    day = f"{date.fromordinal(conflict.day):%d.%m.%Y}"
+    if conflict.kind == "double":
+        return f"{conflict.actor}, {day}: съёмки в {len(conflict.movie_ids)} фильмах"
+    if conflict.kind == "rate":
+        return f"{conflict.actor}, {day}: гонорары ({conflict.fees:.2f}) больше ставки ({conflict.rate:.2f})"
+    return f"{conflict.actor}, {day}: {conflict.count} съёмок (не больше {MAX_SHOOTINGS_PER_DAY})"
+
+def day_conflicts(day, actor_id, actor, rate, movie_ids, count, fees):
+    conflicts = []
+    if len(movie_ids) > 1:
+        conflicts.append(Conflict("double", day, actor_id, actor, movie_ids, count, fees, rate))
+    if round(fees, 2) > rate:
+        conflicts.append(Conflict("rate", day, actor_id, actor, movie_ids, count, fees, rate))
+    if count > MAX_SHOOTINGS_PER_DAY:
+        conflicts.append(Conflict("overload", day, actor_id, actor, movie_ids, count, fees, rate))
+    return conflicts
+
+def day_number(text):
+    # None - дата записана до проверки формата и не распознана: день такой
+    # съёмки в базе NULL (см. database.migration_day_column), в day_totals и
+    # в индексе её нет.
+    try:
+        return date.fromisoformat(text).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+class ActorDays:
+    # Съёмки одного актёра по дням: days - день -> {id съёмки: (фильм,
+    # гонорар)}, day_of - день каждой съёмки. Добавление, удаление и выборка
+    # дня не зависят от числа съёмок актёра; дней без съёмок в days нет.
+    def __init__(self, fio, rate):
+        self.fio = fio
+        self.rate = rate
+        self.days = {}
+        self.day_of = {}
+
+    def add(self, day, shooting_id, movie_id, fee):
+        self.days.setdefault(day, {})[shooting_id] = (movie_id, fee)
+        self.day_of[shooting_id] = day
+
+    def remove(self, shooting_id):
+        day = self.day_of.pop(shooting_id, None)
+        if day is None:
+            return
+        shootings = self.days[day]
+        del shootings[shooting_id]
+        if not shootings:
+            del self.days[day]
+
+    def change(self, removed, added):
+        # Пакетное изменение: снимаются съёмки с id из removed, добавляются
+        # строки added (день, id, фильм, гонорар).
+        for shooting_id in removed:
+            self.remove(shooting_id)
+        for row in added:
+            self.add(*row)
+
+    def on_day(self, day, skip_ids=()):
+        # Фильмы и гонорары съёмок дня, кроме съёмок skip_ids.
+        return [shooting for shooting_id, shooting in self.days.get(day, {}).items()
+                if shooting_id not in skip_ids]
+
+class ScheduleIndex:
+    # Индекс актёров, для которых уже проверялись записи: актёр загружается
+    # при первой проверке и дальше обновляется изменениями (apply).
+    def __init__(self, conn):
+        self.conn = conn
+        self.actors = {}
+
+    def actor(self, actor_id):
+        actor = self.actors.get(actor_id)
+        if actor is None:
+            row = self.conn.execute("SELECT fio, ставка_за_день FROM actors WHERE id = ?", (actor_id,)).fetchone()
+            if row is None:
+                return None
+            actor = ActorDays(*row)
+            rows = self.conn.execute("""
+                SELECT день, id, movie_id, IFNULL(гонорар, 0) FROM shootings
+                WHERE actor_id = ? AND день IS NOT NULL
+            """, (actor_id,))
+            actor.change((), rows)
+            self.actors[actor_id] = actor
+        return actor
+
+    def check(self, actor_id, movie_id, day_text, fee, shooting_id=None):
+        # Конфликты дня после записи съёмки; shooting_id - изменяемая съёмка,
+        # её прежнее значение не учитывается.
+        skip_ids = () if shooting_id is None else (shooting_id,)
+        return self.day_check(actor_id, day_number(day_text), skip_ids, [(movie_id, fee or 0)])
+
+    def check_rows(self, old_rows, new_rows):
+        # Конфликты дней, на которые попадут строки new_rows (Shooting) после
+        # записи всего пакета: прежние значения строк old_rows не учитываются.
+        skip_ids = {row.id for row in old_rows}
+        added = defaultdict(list)
+        for row in new_rows:
+            day = day_number(row.date)
+            if day is not None:
+                added[day, row.actor_id].append((row.movie_id, row.fee or 0))
+        found = []
+        for (day, actor_id), shootings in sorted(added.items()):
+            found.extend(self.day_check(actor_id, day, skip_ids, shootings))
+        return found
+
+    def day_check(self, actor_id, day, skip_ids, added):
+        # added - (фильм, гонорар) съёмок, записываемых на день day.
+        actor = self.actor(actor_id)
+        if actor is None or day is None:
+            return []
+        shootings = actor.on_day(day, skip_ids) + added
+        movie_ids = sorted({movie for movie, _ in shootings})
+        return day_conflicts(day, actor_id, actor.fio, actor.rate, movie_ids, len(shootings),
+                             sum(fee for _, fee in shootings))
+
+    def apply(self, change):
+        # RowChange (см. rgrFinal.RowChange) таблиц actors и shootings.
+        if change.op == "reload":
+            if change.table == "shootings" and change.old is not None:
+                self.apply_rows(change.old, change.new)
+            else:
+                self.clear()
+        elif change.table == "actors":
+            actor = self.actors.get(change.key)
+            if change.new is None:
+                self.actors.pop(change.key, None)
+            elif actor is not None:
+                actor.fio, actor.rate = change.new.fio, change.new.rate
+        elif change.table == "shootings":
+            old, new = change.old, change.new
+            if old is not None and old.actor_id in self.actors:
+                self.actors[old.actor_id].remove(old.id)
+            if new is not None and new.actor_id in self.actors:
+                day = day_number(new.date)
+                if day is not None:
+                    self.actors[new.actor_id].add(day, new.id, new.movie_id, new.fee or 0)
+
+    def apply_rows(self, old_rows, new_rows):
+        # Массовое изменение съёмок, сгруппированное по актёрам.
+        removed = defaultdict(set)
+        added = defaultdict(list)
+        for row in old_rows:
+            if row.actor_id in self.actors:
+                removed[row.actor_id].add(row.id)
+        for row in new_rows:
+            day = day_number(row.date)
+            if row.actor_id in self.actors and day is not None:
+                added[row.actor_id].append((day, row.id, row.movie_id, row.fee or 0))
+        for actor_id in removed.keys() | added.keys():
+            self.actors[actor_id].change(removed[actor_id], added[actor_id])
+
+    def clear(self):
+        self.actors.clear()
+
+def scan_schedule(conn):
+    # Строки day_totals одного актёра за день идут подряд: конфликты
+    # проверяются при смене пары (день, актёр).
+    actors = {actor_id: (fio, rate)
+              for actor_id, fio, rate in conn.execute("SELECT id, fio, ставка_за_день FROM actors")}
+    rows = conn.execute("""
+        SELECT день, actor_id, movie_id, shootings_count, fees FROM day_totals
+        ORDER BY день, actor_id, movie_id
+    """)
+    conflicts = []
+    current = None
+    movie_ids, count, fees = [], 0, 0.0
+
+    def flush():
+        if current is not None and current[1] in actors:
+            fio, rate = actors[current[1]]
+            conflicts.extend(day_conflicts(*current, fio, rate, movie_ids, count, fees))
+
+    for day, actor_id, movie_id, day_count, day_fees in rows:
+        if (day, actor_id) != current:
+            flush()
+            current = (day, actor_id)
+            movie_ids, count, fees = [], 0, 0.0
+        movie_ids.append(movie_id)
+        count += day_count
+        fees += day_fees
+    flush()
+    return conflicts
+
+# Точка входа для DatabaseExecutor.submit.
+def load_conflicts(conn):
+    return scan_schedule(conn)
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "filmstudio.db"
+    conn = database.connect(path)
+    database.migrate(conn)
+    started = time.perf_counter()
+    conflicts = scan_schedule(conn)
+    print(f"{path}: конфликтов {len(conflicts)}, проверка {(time.perf_counter() - started) * 1000:.0f} мс")
+    for kind, title in KIND_TITLES.items():
+        print(f"  {title}: {sum(1 for conflict in conflicts if conflict.kind == kind)}")
+    conn.close()
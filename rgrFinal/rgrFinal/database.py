@@ -0,0 +1,497 @@
+﻿import sqlite3
+import sys
+from datetime import date, datetime
+from functools import lru_cache
+
+# Версия схемы хранится в PRAGMA user_version. Каждая миграция переводит
+# базу из версии N-1 в N и выполняется в отдельной транзакции, поэтому
+# старые файлы filmstudio.db обновляются на месте при запуске программы.
+
+def migration_base_schema(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS actors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fio TEXT NOT NULL,
+            ставка_за_день REAL NOT NULL
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS movies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            название TEXT NOT NULL,
+            режиссёр TEXT,
+            бюджет REAL NOT NULL
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS shootings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            actor_id INTEGER NOT NULL,
+            movie_id INTEGER NOT NULL,
+            дата TEXT NOT NULL,
+            сцена TEXT,
+            гонорар REAL,
+            FOREIGN KEY(actor_id) REFERENCES actors(id),
+            FOREIGN KEY(movie_id) REFERENCES movies(id)
+        )
+    """)
+
+def migration_movie_spend(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS movie_spend (
+            movie_id INTEGER PRIMARY KEY,
+            spent REAL NOT NULL DEFAULT 0,
+            shootings_count INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(movie_id) REFERENCES movies(id)
+        )
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS movie_spend_movie_insert AFTER INSERT ON movies
+        BEGIN
+            INSERT OR IGNORE INTO movie_spend (movie_id) VALUES (NEW.id);
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS movie_spend_movie_delete AFTER DELETE ON movies
+        BEGIN
+            DELETE FROM movie_spend WHERE movie_id = OLD.id;
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS movie_spend_shooting_insert AFTER INSERT ON shootings
+        BEGIN
+            UPDATE movie_spend
+            SET spent = spent + IFNULL(NEW.гонорар, 0), shootings_count = shootings_count + 1
+            WHERE movie_id = NEW.movie_id;
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS movie_spend_shooting_delete AFTER DELETE ON shootings
+        BEGIN
+            UPDATE movie_spend
+            SET spent = spent - IFNULL(OLD.гонорар, 0), shootings_count = shootings_count - 1
+            WHERE movie_id = OLD.movie_id;
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS movie_spend_shooting_update AFTER UPDATE OF movie_id, гонорар ON shootings
+        BEGIN
+            UPDATE movie_spend
+            SET spent = spent - IFNULL(OLD.гонорар, 0), shootings_count = shootings_count - 1
+            WHERE movie_id = OLD.movie_id;
+            UPDATE movie_spend
+            SET spent = spent + IFNULL(NEW.гонорар, 0), shootings_count = shootings_count + 1
+            WHERE movie_id = NEW.movie_id;
+        END
+    """)
+    rebuild_movie_spend(c)
+
+def migration_indexes(c):
+    # Покрывающие индексы: бюджет и удаление фильма читают (movie_id, гонорар),
+    # затраты и удаление актёра - (actor_id, гонорар), расписание - дату,
+    # выбор съёмки - ФИО и название.
+    c.execute("CREATE INDEX IF NOT EXISTS idx_shootings_movie ON shootings(movie_id, гонорар)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_shootings_actor ON shootings(actor_id, гонорар)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_shootings_date ON shootings(дата)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_actors_fio ON actors(fio)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_movies_title ON movies(название)")
+    c.execute("ANALYZE")
+
+def migration_sort_indexes(c):
+    # Индексы для сортировки списков по заголовку столбца: ФИО и название -
+    # в русском порядке (COLLATE RU), гонорар и сцена - для списка съёмок
+    # по тем же выражениям, что и ORDER BY в ShootingRepository.LIST_COLUMNS.
+    # Сцена сортируется побайтно: индекс по миллиону строк со сравнением
+    # на Python строился бы слишком долго.
+    c.execute("CREATE INDEX IF NOT EXISTS idx_actors_fio_ru ON actors(fio COLLATE RU)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_movies_title_ru ON movies(название COLLATE RU)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_shootings_fee ON shootings(IFNULL(гонорар, 0))")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_shootings_scene ON shootings(IFNULL(сцена, ''))")
+    c.execute("ANALYZE")
+
+# Полнотекстовый поиск: таблица FTS5 на каждую таблицу с текстом. Индексы
+# без содержимого (content=''): строки для показа читаются из исходных
+# таблиц по rowid. В индекс попадает текст с ё, заменённой на е, - так же
+# складывает буквы сравнение RU; регистр складывает токенизатор unicode61.
+# Префиксные индексы до 8 букв нужны поиску по началу слова: без них
+# FTS5 собирает в памяти списки всех слов с этим началом.
+SEARCH_TABLES = {
+    "actors": ["fio"],
+    "movies": ["название", "режиссёр"],
+    "shootings": ["сцена"],
+}
+
+def fold_sql(expr):
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+def fold(text):
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+def migration_search_index(c):
+    for table, columns in SEARCH_TABLES.items():
+        names = ", ".join(columns)
+        new = ", ".join(fold_sql(f"NEW.{column}") for column in columns)
+        old = ", ".join(fold_sql(f"OLD.{column}") for column in columns)
+        c.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                {names}, content='', prefix='1 2 3 4 5 6 7 8', tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        # Из индекса без содержимого строка удаляется командой 'delete'
+        # с теми же значениями, с которыми была вставлена.
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {table}_fts (rowid, {names}) VALUES (NEW.id, {new});
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {names}) VALUES ('delete', OLD.id, {old});
+            END
+        """)
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {names} ON {table}
+            BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {names}) VALUES ('delete', OLD.id, {old});
+                INSERT INTO {table}_fts (rowid, {names}) VALUES (NEW.id, {new});
+            END
+        """)
+        rebuild_search_index(c, table)
+
+# Дата съёмки хранится как ГГГГ-ММ-ДД. Вводить её можно и как ДД.ММ.ГГГГ,
+# и без ведущих нулей: normalize_date приводит любую к одному виду, иначе
+# сравнение строк путает порядок дат.
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y")
+
+def normalize_date(text):
+    text = text.strip()
+    # Быстрый путь для ГГГГ-ММ-ДД: date.fromisoformat на порядок быстрее
+    # strptime, а импорт вызывает normalize_date для каждой строки. Проверка
+    # разделителей не пускает другие формы ISO (20250101, 2025-W01-1).
+    if len(text) == 10 and text[4] == text[7] == "-":
+        try:
+            return date.fromisoformat(text).isoformat()
+        except ValueError:
+            pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"дата «{text}» не в формате ГГГГ-ММ-ДД")
+
+# Номер дня (date.toordinal()) из даты ГГГГ-ММ-ДД: юлианский день
+# 0001-01-01 равен 1721425.5.
+DAY_SQL = "CAST(julianday(дата) - 1721424.5 AS INTEGER)"
+
+def migration_day_column(c):
+    # Даты, записанные до проверки формата, приводятся к ГГГГ-ММ-ДД;
+    # нераспознанные остаются как есть, день у них NULL.
+    updates = []
+    c.execute("SELECT id, дата FROM shootings WHERE дата NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'")
+    for shooting_id, text in c.fetchall():
+        try:
+            updates.append((normalize_date(text), shooting_id))
+        except ValueError:
+            pass
+    c.executemany("UPDATE shootings SET дата=? WHERE id=?", updates)
+    # Вычисляемый столбец не занимает места в строке, а индекс по нему
+    # позволяет выбирать период сравнением целых чисел.
+    c.execute(f"ALTER TABLE shootings ADD COLUMN день INTEGER GENERATED ALWAYS AS ({DAY_SQL}) VIRTUAL")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_shootings_day ON shootings(день)")
+    c.execute("ANALYZE")
+
+# Съёмки по дням (число и сумма гонораров на день, актёра и фильм) для
+# календаря: окно месяца читается диапазоном первичного ключа, без
+# соединения таблиц. Поддерживается триггерами, как movie_spend; съёмки
+# с нераспознанной датой (день NULL) в него не попадают.
+def migration_day_totals(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS day_totals (
+            день INTEGER NOT NULL,
+            actor_id INTEGER NOT NULL,
+            movie_id INTEGER NOT NULL,
+            shootings_count INTEGER NOT NULL,
+            fees REAL NOT NULL,
+            PRIMARY KEY (день, actor_id, movie_id)
+        ) WITHOUT ROWID
+    """)
+    add = """
+        INSERT INTO day_totals (день, actor_id, movie_id, shootings_count, fees)
+        SELECT NEW.день, NEW.actor_id, NEW.movie_id, 1, IFNULL(NEW.гонорар, 0) WHERE NEW.день IS NOT NULL
+        ON CONFLICT (день, actor_id, movie_id) DO UPDATE
+        SET shootings_count = shootings_count + 1, fees = fees + excluded.fees;
+    """
+    remove = """
+        UPDATE day_totals
+        SET shootings_count = shootings_count - 1, fees = fees - IFNULL(OLD.гонорар, 0)
+        WHERE день = OLD.день AND actor_id = OLD.actor_id AND movie_id = OLD.movie_id;
+        DELETE FROM day_totals
+        WHERE день = OLD.день AND actor_id = OLD.actor_id AND movie_id = OLD.movie_id AND shootings_count = 0;
+    """
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS day_totals_shooting_insert AFTER INSERT ON shootings BEGIN {add} END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS day_totals_shooting_delete AFTER DELETE ON shootings BEGIN {remove} END")
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS day_totals_shooting_update AFTER UPDATE OF actor_id, movie_id, дата, гонорар ON shootings
+        BEGIN {remove} {add} END
+    """)
+    rebuild_day_totals(c)
+
+def migration_day_totals_movie(c):
+    # Прогноз бюджета пересчитывается по одному фильму (см.
+    # repositories.ReportService.movie_budget): суммы фильма по дням читаются
+    # из индекса, без просмотра всей day_totals.
+    c.execute("CREATE INDEX IF NOT EXISTS idx_day_totals_movie ON day_totals(movie_id, день, fees)")
+
+# Ключи сортировки в русском порядке (см. ru_key) - вычисляемые столбцы
+# из встроенных функций SQLite. Индексы по ним сравниваются побайтно
+# (BINARY), поэтому писать в таблицы и выполнять REINDEX может любой
+# инструмент, а не только соединение с зарегистрированным сравнением RU.
+SORT_KEYS = {
+    "actors": {"fio_key": "fio"},
+    "movies": {"название_key": "название", "режиссёр_key": "IFNULL(режиссёр, '')"},
+}
+
+def migration_sort_keys(c):
+    c.execute("DROP INDEX IF EXISTS idx_actors_fio_ru")
+    c.execute("DROP INDEX IF EXISTS idx_movies_title_ru")
+    for table, keys in SORT_KEYS.items():
+        for key, expr in keys.items():
+            for column, sql in sort_key_columns(key, expr):
+                c.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT GENERATED ALWAYS AS ({sql}) VIRTUAL")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_actors_fio_key ON actors(fio_key)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_movies_title_key ON movies(название_key)")
+    c.execute("ANALYZE")
+
+MIGRATIONS = [
+    migration_base_schema,
+    migration_movie_spend,
+    migration_indexes,
+    migration_sort_indexes,
+    migration_search_index,
+    migration_day_column,
+    migration_day_totals,
+    migration_day_totals_movie,
+    migration_sort_keys,
+]
+
+LATEST_VERSION = len(MIGRATIONS)
+
+# Профили соединения: значения PRAGMA, применяемые при открытии базы.
+# safe - настройки SQLite по умолчанию с проверкой внешних ключей;
+# fast - WAL (чтение не блокирует запись), synchronous=NORMAL, кэш 64 МБ
+# и mmap; bulk - то же без fsync для массовой загрузки: сбой программы
+# данные не портит, но при отключении питания база может пострадать.
+PROFILES = {
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "foreign_keys": "ON",
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+    "bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -256000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+}
+
+DEFAULT_PROFILE = "fast"
+
+# Настройки, которые действуют только на текущее соединение и могут быть
+# временно изменены без влияния на остальные соединения с базой.
+SESSION_PRAGMAS = ("synchronous", "cache_size", "temp_store")
+
+# Сравнение строк в порядке русского алфавита: без учёта регистра, ё рядом
+# с е. Регистр складывается только у латиницы и кириллицы - так же, как
+# в sort_key_columns, где lower() SQLite знает лишь ASCII. Столбцы *_key
+# (SORT_KEYS) упорядочены так же, как ru_key в Python.
+UPPER_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ"
+LOWER_LETTERS = "abcdefghijklmnopqrstuvwxyzабвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+FOLD_TABLE = str.maketrans(UPPER_LETTERS, LOWER_LETTERS)
+# Разделитель частей ключа: меньше любого печатного символа.
+KEY_SEPARATOR = "\x01"
+
+@lru_cache(maxsize=65536)
+def ru_key(text):
+    folded = text.translate(FOLD_TABLE)
+    return folded.replace("ё", "е"), folded, text
+
+# Вложенных replace() больше FOLD_STEP парсер SQLite не разбирает (parser
+# stack overflow), поэтому кириллица складывается по частям, каждая часть -
+# отдельный вычисляемый столбец поверх предыдущего.
+FOLD_STEP = 16
+
+def sort_key_columns(column, expr):
+    # Столбцы (имя, выражение) ключа column: последний - строка, побайтный
+    # порядок которой совпадает с порядком ru_key(expr).
+    columns = []
+    source = expr
+    letters = list(zip(UPPER_LETTERS[26:], LOWER_LETTERS[26:]))
+    for start in range(0, len(letters), FOLD_STEP):
+        folded = source
+        for upper, lower in letters[start:start + FOLD_STEP]:
+            folded = f"replace({folded}, '{upper}', '{lower}')"
+        source = f"{column}_fold{len(columns) + 1}"
+        columns.append((source, folded))
+    columns.append((f"{column}_fold", f"lower({source})"))
+    folded = f"{column}_fold"
+    columns.append((column, f"replace({folded}, 'ё', 'е') || char(1) || {folded} || char(1) || {expr}"))
+    return columns
+
+# Сравнение RU нужно только миграциям до migration_sort_keys: после неё
+# в схеме его нет.
+COLLATION = "RU"
+
+def ru_collate(left, right):
+    left, right = ru_key(left), ru_key(right)
+    return (left > right) - (left < right)
+
+def register_collation(conn):
+    conn.create_collation(COLLATION, ru_collate)
+
+# Параметры файла базы: у базы в памяти нет журнала на диске и
+# отображения в память, PRAGMA mmap_size для неё ничего не возвращает.
+FILE_PRAGMAS = ("journal_mode", "mmap_size")
+
+def in_memory(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2] == ""
+
+def set_pragmas(conn, pragmas):
+    # Возвращает прежние значения, чтобы их можно было восстановить.
+    # PRAGMA, которые не вернули значения (базе в памяти или сборке SQLite
+    # без этого параметра), пропускаются.
+    previous = {}
+    memory = in_memory(conn)
+    for name, value in pragmas.items():
+        if memory and name in FILE_PRAGMAS:
+            continue
+        row = conn.execute(f"PRAGMA {name}").fetchone()
+        if row is None:
+            continue
+        previous[name] = row[0]
+        if name == "journal_mode" and str(previous[name]).upper() == value:
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+    return previous
+
+def apply_profile(conn, profile, names=None):
+    if profile not in PROFILES:
+        raise ValueError(f"Неизвестный профиль соединения: {profile}")
+    pragmas = PROFILES[profile]
+    if names is not None:
+        pragmas = {name: pragmas[name] for name in names}
+    return set_pragmas(conn, pragmas)
+
+def connect(path, profile=DEFAULT_PROFILE, **kwargs):
+    conn = sqlite3.connect(path, **kwargs)
+    try:
+        apply_profile(conn, profile)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, target=LATEST_VERSION):
+    register_collation(conn)
+    version = schema_version(conn)
+    if version > LATEST_VERSION:
+        raise RuntimeError(f"Версия базы данных ({version}) новее программы ({LATEST_VERSION})")
+
+    for number in range(version + 1, target + 1):
+        c = conn.cursor()
+        c.execute("BEGIN")
+        try:
+            MIGRATIONS[number - 1](c)
+            c.execute(f"PRAGMA user_version = {number}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    return schema_version(conn)
+
+def rebuild_movie_spend(c):
+    c.execute("DELETE FROM movie_spend")
+    c.execute("""
+        INSERT INTO movie_spend (movie_id, spent, shootings_count)
+        SELECT m.id, IFNULL(SUM(s.гонорар), 0), COUNT(s.id)
+        FROM movies m
+        LEFT JOIN shootings s ON m.id = s.movie_id
+        GROUP BY m.id
+    """)
+
+def rebuild_search_index(c, table):
+    c.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('delete-all')")
+    index_search_rows(c, table)
+
+def index_search_rows(c, table, after_id=0):
+    # Добавляет в поисковый индекс строки с id больше after_id одним запросом:
+    # при массовой загрузке это в разы быстрее построчного триггера.
+    columns = SEARCH_TABLES[table]
+    c.execute(f"""
+        INSERT INTO {table}_fts (rowid, {", ".join(columns)})
+        SELECT id, {", ".join(fold_sql(column) for column in columns)} FROM {table} WHERE id > ?
+    """, (after_id,))
+
+def rebuild_day_totals(c):
+    c.execute("DELETE FROM day_totals")
+    add_day_totals(c)
+
+def add_day_totals(c, after_id=0):
+    # Добавляет к day_totals съёмки с id больше after_id одним запросом.
+    c.execute("""
+        INSERT INTO day_totals (день, actor_id, movie_id, shootings_count, fees)
+        SELECT день, actor_id, movie_id, COUNT(*), SUM(IFNULL(гонорар, 0))
+        FROM shootings
+        WHERE id > ? AND день IS NOT NULL
+        GROUP BY день, actor_id, movie_id
+        ON CONFLICT (день, actor_id, movie_id) DO UPDATE
+        SET shootings_count = shootings_count + excluded.shootings_count, fees = fees + excluded.fees
+    """, (after_id,))
+
+def check_movie_spend(conn):
+    c = conn.cursor()
+    c.execute("""
+        SELECT m.id, m.название, ms.spent, ms.shootings_count, t.spent, t.shootings_count
+        FROM movies m
+        LEFT JOIN movie_spend ms ON ms.movie_id = m.id
+        LEFT JOIN (
+            SELECT movie_id, SUM(IFNULL(гонорар, 0)) AS spent, COUNT(*) AS shootings_count
+            FROM shootings
+            GROUP BY movie_id
+        ) t ON t.movie_id = m.id
+    """)
+
+    mismatches = []
+    for movie_id, title, stored, stored_count, actual, actual_count in c.fetchall():
+        actual = actual or 0
+        actual_count = actual_count or 0
+        if stored is None or abs(stored - actual) > 0.005 or stored_count != actual_count:
+            mismatches.append((movie_id, title, stored, actual))
+    return mismatches
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "filmstudio.db"
+    conn = sqlite3.connect(path)
+    before = schema_version(conn)
+    after = migrate(conn)
+    print(f"{path}: версия схемы {before} -> {after}")
+    conn.close()
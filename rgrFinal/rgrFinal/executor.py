@@ -0,0 +1,121 @@
+﻿import queue
+import sqlite3
+import threading
+
+# Запросы выполняются в рабочих потоках со своими соединениями, а
+# результаты складываются в очередь, которую разбирает поток Tk через
+# poll() (см. FilmStudioApp.poll_executor). Сами потоки Tk не трогают.
+
+class DbFuture:
+    def __init__(self, fn, args, on_done=None, on_error=None):
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.result_value = None
+        self.error = None
+        self.conn = None
+        self._cancelled = False
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            if self._finished.is_set():
+                return False
+            self._cancelled = True
+            if self.conn is not None:
+                self.conn.interrupt()
+        return True
+
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._finished.is_set()
+
+    def result(self, timeout=None):
+        if not self._finished.wait(timeout):
+            raise TimeoutError("Запрос не завершился вовремя")
+        if self.error is not None:
+            raise self.error
+        return self.result_value
+
+class DatabaseExecutor:
+    def __init__(self, path, workers=1, connect=sqlite3.connect):
+        self.path = path
+        self.connect = connect
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self.threads = []
+        for number in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"db-worker-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        future = DbFuture(fn, args, on_done, on_error)
+        self.tasks.put(future)
+        return future
+
+    def fetchall(self, sql, params=(), on_done=None, on_error=None):
+        return self.submit(fetchall, sql, params, on_done=on_done, on_error=on_error)
+
+    def post(self, callback, *args):
+        self.results.put((callback, args))
+
+    def poll(self):
+        while True:
+            try:
+                callback, args = self.results.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    def shutdown(self):
+        for _ in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join(timeout=1)
+
+    def _worker(self):
+        conn = self.connect(self.path)
+        try:
+            while True:
+                future = self.tasks.get()
+                if future is None:
+                    break
+                self._run(conn, future)
+        finally:
+            conn.close()
+
+    def _run(self, conn, future):
+        with future._lock:
+            if future._cancelled:
+                future._finished.set()
+                return
+            future.conn = conn
+
+        try:
+            future.result_value = future.fn(conn, *future.args)
+        except Exception as e:
+            future.error = e
+            if conn.in_transaction:
+                conn.rollback()
+
+        with future._lock:
+            future.conn = None
+            future._finished.set()
+        self.post(self._deliver, future)
+
+    def _deliver(self, future):
+        if future.cancelled():
+            return
+        if future.error is not None:
+            if future.on_error:
+                future.on_error(future.error)
+        elif future.on_done:
+            future.on_done(future.result_value)
+
+def fetchall(conn, sql, params=()):
+    return conn.execute(sql, params).fetchall()
@@ -0,0 +1,159 @@
+﻿import csv
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import database
+
+# Таблицы для экспорта: имя файла, запрос данных, запрос числа строк, заголовки.
+EXPORTS = {
+    "actors": (
+        "actors.csv",
+        "SELECT id, fio, ставка_за_день FROM actors",
+        "SELECT COUNT(*) FROM actors",
+        ["ID", "ФИО", "Ставка за день"],
+    ),
+    "movies": (
+        "movies.csv",
+        "SELECT id, название, режиссёр, бюджет FROM movies",
+        "SELECT COUNT(*) FROM movies",
+        ["ID", "Название", "Режиссёр", "Бюджет"],
+    ),
+    "shootings": (
+        "shootings.csv",
+        """
+            SELECT s.id, a.fio, m.название, s.дата, s.сцена, s.гонорар
+            FROM shootings s
+            JOIN actors a ON s.actor_id = a.id
+            JOIN movies m ON s.movie_id = m.id
+        """,
+        "SELECT COUNT(*) FROM shootings",
+        ["ID", "Актёр", "Фильм", "Дата", "Сцена", "Гонорар"],
+    ),
+}
+
+DEFAULT_BATCH_SIZE = 5000
+WRITE_BUFFER_SIZE = 1 << 20
+
+class ExportCancelled(Exception):
+    pass
+
+def stream_csv(conn, query, filename, headers, batch_size=DEFAULT_BATCH_SIZE,
+               total=None, progress=None, cancelled=None):
+    # В памяти одновременно не больше batch_size строк; недописанный
+    # файл удаляется при ошибке или отмене.
+    started = time.perf_counter()
+    written = 0
+    c = conn.cursor()
+    c.arraysize = batch_size
+    c.execute(query)
+    try:
+        with open(filename, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            while True:
+                if cancelled is not None and cancelled():
+                    raise ExportCancelled(filename)
+                rows = c.fetchmany()
+                if not rows:
+                    break
+                writer.writerows(rows)
+                written += len(rows)
+                if progress is not None:
+                    progress(written, total, time.perf_counter() - started)
+    except BaseException:
+        c.close()
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+    return written, time.perf_counter() - started
+
+def export_table(conn, data_type, directory, batch_size=DEFAULT_BATCH_SIZE, progress=None, cancelled=None):
+    name, query, count_query, headers = EXPORTS[data_type]
+    total = conn.execute(count_query).fetchone()[0]
+    filename = os.path.join(directory, name)
+    written, elapsed = stream_csv(conn, query, filename, headers, batch_size, total, progress, cancelled)
+    return filename, written, elapsed
+
+def export_snapshot(conn, directory, data_types=tuple(EXPORTS), batch_size=DEFAULT_BATCH_SIZE,
+                    archive=False, progress=None, cancelled=None):
+    # Каждая таблица пишется в своём потоке через своё соединение: SQLite
+    # отпускает GIL на время чтения, и потоки читают одновременно. Файлы
+    # согласованы между собой: транзакции чтения всех соединений начинаются,
+    # пока отдельное соединение держит блокировку записи, - зафиксировать
+    # изменение в это время никто не может, и все видят одно состояние базы.
+    # Дальше запись в базу идёт параллельно с экспортом (WAL).
+    started = time.perf_counter()
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    readers = {}
+    target = tempfile.mkdtemp(dir=directory) if archive else directory
+    failed = threading.Event()
+    lock = threading.Lock()
+    written = dict.fromkeys(data_types, 0)
+
+    def stopped():
+        return failed.is_set() or (cancelled is not None and cancelled())
+
+    def export_one(data_type, total_rows):
+        name, query, count_query, headers = EXPORTS[data_type]
+
+        def table_progress(count, total, elapsed):
+            with lock:
+                written[data_type] = count
+                done = sum(written.values())
+            if progress is not None:
+                progress(done, grand_total, time.perf_counter() - started)
+
+        try:
+            count, _ = stream_csv(readers[data_type], query, os.path.join(target, name), headers,
+                                  batch_size, total_rows, table_progress, stopped)
+        except BaseException:
+            failed.set()
+            raise
+        return os.path.join(target, name), count
+
+    try:
+        for data_type in data_types:
+            readers[data_type] = database.connect(path, check_same_thread=False)
+        gate = database.connect(path)
+        try:
+            gate.execute("BEGIN IMMEDIATE")
+            totals = {}
+            for data_type, reader in readers.items():
+                reader.execute("BEGIN")
+                totals[data_type] = reader.execute(EXPORTS[data_type][2]).fetchone()[0]
+        finally:
+            gate.rollback()
+            gate.close()
+        grand_total = sum(totals.values())
+
+        with ThreadPoolExecutor(max_workers=len(data_types)) as pool:
+            futures = [pool.submit(export_one, data_type, totals[data_type]) for data_type in data_types]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            # Ошибка одной таблицы останавливает остальные через ExportCancelled,
+            # поэтому наружу отдаётся исходная ошибка.
+            raise next((e for e in errors if not isinstance(e, ExportCancelled)), errors[0])
+        results = [future.result() for future in futures]
+
+        if archive:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            result_path = os.path.join(directory, f"filmstudio_{stamp}.zip")
+            with zipfile.ZipFile(result_path, "w", zipfile.ZIP_DEFLATED) as archive_file:
+                for filename, _ in results:
+                    archive_file.write(filename, os.path.basename(filename))
+        else:
+            result_path = directory
+    finally:
+        for reader in readers.values():
+            reader.rollback()
+            reader.close()
+        if archive:
+            shutil.rmtree(target, ignore_errors=True)
+
+    return result_path, sum(count for _, count in results), time.perf_counter() - started
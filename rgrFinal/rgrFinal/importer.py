@@ -0,0 +1,218 @@
+﻿import csv
+import os
+import time
+from collections import defaultdict
+
+import database
+
+# Импорт CSV в формате файлов экспорта. Строки читаются потоком, проверяются
+# и вставляются пакетами executemany в одной транзакции: при любой ошибке
+# в базу не попадает ничего.
+
+DEFAULT_BATCH_SIZE = 10000
+MAX_REPORTED_ERRORS = 20
+# Примерный размер одной строки CSV съёмок в байтах: по нему оценивается,
+# выгоднее ли перестроить индексы после загрузки, чем обновлять их построчно.
+ESTIMATED_ROW_BYTES = 40
+
+class ImportFailed(Exception):
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+class ImportCancelled(Exception):
+    pass
+
+def parse_amount(text, name, required=True):
+    text = text.strip().replace(",", ".")
+    if not text and not required:
+        return 0.0
+    try:
+        value = float(text)
+    except ValueError:
+        raise ValueError(f"{name}: «{text}» не является числом")
+    if value < 0:
+        raise ValueError(f"{name} не может быть отрицательным")
+    return value
+
+def name_index(c, sql):
+    # Имя -> id; повторяющиеся имена помечаются None, чтобы не выбрать запись наугад.
+    index = {}
+    for record_id, name in c.execute(sql):
+        index[name] = None if name in index else record_id
+    return index
+
+def resolve(index, name, kind):
+    if name not in index:
+        raise ValueError(f"{kind} «{name}» не найден")
+    if index[name] is None:
+        raise ValueError(f"{kind} «{name}» встречается в базе несколько раз")
+    return index[name]
+
+class ActorRows:
+    columns = ["ФИО", "Ставка за день"]
+    sql = "INSERT INTO actors (fio, ставка_за_день) VALUES (?, ?)"
+
+    def __init__(self, c):
+        pass
+
+    def prepare(self, c, filename):
+        pass
+
+    def convert(self, values):
+        fio, rate = values
+        if not fio.strip():
+            raise ValueError("не указано ФИО")
+        return fio.strip(), parse_amount(rate, "Ставка")
+
+    def finish(self, c):
+        return []
+
+class MovieRows:
+    columns = ["Название", "Режиссёр", "Бюджет"]
+    sql = "INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, ?, ?)"
+
+    def __init__(self, c):
+        pass
+
+    def prepare(self, c, filename):
+        pass
+
+    def convert(self, values):
+        title, director, budget = values
+        if not title.strip():
+            raise ValueError("не указано название")
+        return title.strip(), director.strip(), parse_amount(budget, "Бюджет")
+
+    def finish(self, c):
+        return []
+
+class ShootingRows:
+    columns = ["Актёр", "Фильм", "Дата", "Сцена", "Гонорар"]
+    sql = "INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар) VALUES (?, ?, ?, ?, ?)"
+
+    def __init__(self, c):
+        self.actors = name_index(c, "SELECT id, fio FROM actors")
+        self.movies = name_index(c, "SELECT id, название FROM movies")
+        self.added = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.suspended = []
+
+    def prepare(self, c, filename):
+        # Построчные триггеры movie_spend, day_totals и поискового индекса
+        # заменяются одним обновлением на фильм и одной вставкой в day_totals
+        # и shootings_fts в finish(); при большой загрузке индексы съёмок
+        # строятся заново. Всё это происходит внутри транзакции импорта.
+        names = ["movie_spend_shooting_insert", "day_totals_shooting_insert", "shootings_fts_insert"]
+        c.execute("SELECT IFNULL(MAX(id), 0) FROM shootings")
+        self.last_id = c.fetchone()[0]
+        c.execute("SELECT COUNT(*) FROM shootings")
+        if os.path.getsize(filename) // ESTIMATED_ROW_BYTES > c.fetchone()[0]:
+            c.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='shootings' AND sql IS NOT NULL")
+            names += [name for (name,) in c.fetchall()]
+
+        for name in names:
+            c.execute("SELECT type, sql FROM sqlite_master WHERE name=?", (name,))
+            row = c.fetchone()
+            if row:
+                kind, sql = row
+                c.execute(f"DROP {kind.upper()} {name}")
+                self.suspended.append(sql)
+
+    def convert(self, values):
+        actor, movie, day, scene, fee = values
+        actor_id = resolve(self.actors, actor.strip(), "Актёр")
+        movie_id = resolve(self.movies, movie.strip(), "Фильм")
+        fee_value = parse_amount(fee, "Гонорар", required=False)
+        self.added[movie_id] += fee_value
+        self.counts[movie_id] += 1
+        return actor_id, movie_id, database.normalize_date(day), scene.strip(), fee_value
+
+    def finish(self, c):
+        # movie_spend обновляется одной строкой на фильм, после чего бюджет
+        # проверяется по итоговой сумме, а не по каждой съёмке.
+        c.executemany("""
+            UPDATE movie_spend
+            SET spent = spent + ?, shootings_count = shootings_count + ?
+            WHERE movie_id = ?
+        """, ((self.added[movie_id], self.counts[movie_id], movie_id) for movie_id in self.added))
+        database.add_day_totals(c, self.last_id)
+        database.index_search_rows(c, "shootings", self.last_id)
+        for sql in self.suspended:
+            c.execute(sql)
+
+        errors = []
+        for movie_id in self.added:
+            c.execute("""
+                SELECT m.название, m.бюджет, IFNULL(ms.spent, 0)
+                FROM movies m
+                LEFT JOIN movie_spend ms ON ms.movie_id = m.id
+                WHERE m.id = ?
+            """, (movie_id,))
+            title, budget, spent = c.fetchone()
+            if round(spent, 2) > budget:
+                errors.append(f"Фильм «{title}»: общий гонорар ({spent:.2f}) превышает бюджет ({budget:.2f})")
+        return errors
+
+ROW_TYPES = {
+    "actors": ActorRows,
+    "movies": MovieRows,
+    "shootings": ShootingRows,
+}
+
+def import_csv(conn, data_type, filename, batch_size=DEFAULT_BATCH_SIZE, progress=None, cancelled=None):
+    started = time.perf_counter()
+    c = conn.cursor()
+    rows = ROW_TYPES[data_type](c)
+    errors = []
+    batch = []
+    imported = 0
+
+    with open(filename, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        missing = [name for name in rows.columns if name not in header]
+        if missing:
+            raise ImportFailed([f"В файле нет столбцов: {', '.join(missing)}"])
+        positions = [header.index(name) for name in rows.columns]
+
+        # На время загрузки соединение переводится на настройки профиля bulk.
+        previous = database.apply_profile(conn, "bulk", database.SESSION_PRAGMAS)
+        c.execute("BEGIN")
+        try:
+            rows.prepare(c, filename)
+            for line, record in enumerate(reader, start=2):
+                if not record:
+                    continue
+                try:
+                    batch.append(rows.convert([record[i] if i < len(record) else "" for i in positions]))
+                except ValueError as e:
+                    errors.append(f"Строка {line}: {e}")
+                    if len(errors) >= MAX_REPORTED_ERRORS:
+                        break
+
+                if len(batch) >= batch_size:
+                    if cancelled is not None and cancelled():
+                        raise ImportCancelled(filename)
+                    if not errors:
+                        c.executemany(rows.sql, batch)
+                        imported += len(batch)
+                        if progress is not None:
+                            progress(imported, time.perf_counter() - started)
+                    batch = []
+
+            if batch and not errors:
+                c.executemany(rows.sql, batch)
+                imported += len(batch)
+            if not errors:
+                errors = rows.finish(c)
+            if errors:
+                raise ImportFailed(errors)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            database.set_pragmas(conn, previous)
+
+    return filename, imported, time.perf_counter() - started
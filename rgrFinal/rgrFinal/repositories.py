@@ -0,0 +1,541 @@
+﻿import json
+from collections import defaultdict, namedtuple
+from datetime import date, timedelta
+
+import database
+
+# Доступ к данным без Tk. Репозиторий работает с переданным соединением:
+# интерфейс использует своё, фоновые задачи - соединение рабочего потока
+# (см. executor.DatabaseExecutor), бенчмарки - любое. SQL задан
+# константами, поэтому подготовленные запросы берутся из кэша sqlite3.
+
+Actor = namedtuple("Actor", ["id", "fio", "rate"])
+Movie = namedtuple("Movie", ["id", "title", "director", "budget"])
+Shooting = namedtuple("Shooting", ["id", "actor_id", "movie_id", "date", "scene", "fee"])
+MovieSpend = namedtuple("MovieSpend", ["budget", "spent"])
+ScheduleRow = namedtuple("ScheduleRow", ["id", "actor", "movie", "date", "scene"])
+ActorExpense = namedtuple("ActorExpense", ["actor_id", "actor", "total_fee"])
+# spent - все гонорары фильма, scheduled - гонорары будущих съёмок,
+# burn_rate - расход в день, projected - прогноз затрат (см. forecast).
+MovieBudget = namedtuple("MovieBudget", ["movie_id", "movie", "budget", "spent", "scheduled", "burn_rate",
+                                         "projected"])
+BudgetHistory = namedtuple("BudgetHistory", ["movie_id", "movie", "budget", "spent", "paid", "scheduled",
+                                             "first_day", "last_paid_day", "last_day"])
+# День календаря - номер дня date.toordinal(), как столбец shootings.день.
+DayTotal = namedtuple("DayTotal", ["day", "count", "fees"])
+TimelineCell = namedtuple("TimelineCell", ["key", "name", "day", "count", "fees"])
+
+SCHEDULE_PERIODS = ["Все записи", "Сегодня", "Эта неделя", "Этот месяц", "Будущие"]
+# Период с границами, введёнными пользователем (FilmStudioApp.schedule_range).
+CUSTOM_PERIOD = "Диапазон дат"
+
+CALENDAR_VIEWS = ["Месяц", "Неделя"]
+# Строки диаграммы по дням: вид -> таблица, по которой группируются съёмки.
+TIMELINE_GROUPS = {"По актёрам": "actors", "По фильмам": "movies"}
+
+def calendar_window(view, anchor):
+    # Месяц или неделя (с понедельника), в которые попадает день anchor.
+    if view == "Неделя":
+        start_week = anchor - timedelta(days=anchor.weekday())
+        return start_week, start_week + timedelta(days=6)
+    first_day = anchor.replace(day=1)
+    last_day = (first_day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return first_day, last_day
+
+def shift_window(view, anchor, step):
+    # День из соседнего окна: step недель или месяцев вперёд или назад.
+    if view == "Неделя":
+        return anchor + timedelta(weeks=step)
+    month = anchor.year * 12 + anchor.month - 1 + step
+    return date(month // 12, month % 12 + 1, 1)
+
+def period_range(period, today=None):
+    # Границы периода - объекты date включительно, None - без границы.
+    today = today or date.today()
+    if period == "Сегодня":
+        return today, today
+    elif period == "Эта неделя":
+        return calendar_window("Неделя", today)
+    elif period == "Этот месяц":
+        return calendar_window("Месяц", today)
+    elif period == "Будущие":
+        return today, None
+    return None, None
+
+class BudgetExceeded(Exception):
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+def id_list(ids):
+    # Список id одним параметром: "IN (SELECT value FROM json_each(?))".
+    return json.dumps(list(ids))
+
+def over_budget(conn, movie_ids):
+    rows = conn.execute("""
+        SELECT m.название, m.бюджет, IFNULL(ms.spent, 0)
+        FROM movies m
+        LEFT JOIN movie_spend ms ON ms.movie_id = m.id
+        WHERE m.id IN (SELECT value FROM json_each(?))
+        ORDER BY m.id
+    """, (id_list(movie_ids),))
+    return [f"Фильм «{title}»: общий гонорар ({spent:.2f}) превышает бюджет ({budget:.2f})"
+            for title, budget, spent in rows if round(spent, 2) > budget]
+
+def forecast(history, today):
+    # Расход в день - оплаченные гонорары за дни от первой до последней
+    # прошедшей съёмки. До последней запланированной съёмки фильм тратит не
+    # меньше запланированного и не меньше, чем при нынешнем расходе.
+    burn_rate = 0.0
+    if history.last_paid_day is not None:
+        burn_rate = history.paid / (history.last_paid_day - history.first_day + 1)
+    days_left = max((history.last_day or 0) - today.toordinal(), 0)
+    projected = history.paid + max(history.scheduled, burn_rate * days_left)
+    return MovieBudget(history.movie_id, history.movie, history.budget, history.spent, history.scheduled,
+                       burn_rate, projected)
+
+def fetch_rows(conn, row_type, sql, params=()):
+    c = conn.cursor()
+    c.row_factory = lambda cursor, row: row_type._make(row)
+    return c.execute(sql, params).fetchall()
+
+def fetch_row(conn, row_type, sql, params=()):
+    row = conn.execute(sql, params).fetchone()
+    return None if row is None else row_type._make(row)
+
+class ActorRepository:
+    # Запрос и ключи постраничного вывода (VirtualTreeview); LIST_COLUMNS -
+    # выражения ORDER BY для сортировки по столбцам Treeview и номера
+    # столбцов строки с их значениями. Необязательные поля сортируются по
+    # IFNULL(...), текст - по ключу русского порядка (database.SORT_KEYS);
+    # выражение сортировки выбирается отдельным столбцом после выводимых:
+    # граница страницы берётся из него, а не из NULL, с которым сравнение
+    # кортежей ложно и строки пропускались бы.
+    LIST_SQL = "SELECT id, fio, ставка_за_день, fio_key FROM actors"
+    LIST_KEYS = [("id", 0)]
+    LIST_COLUMNS = {
+        "id": ("id", 0),
+        "fio": ("fio_key", 3),
+        "rate": ("ставка_за_день", 2),
+    }
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get(self, actor_id):
+        return fetch_row(self.conn, Actor, "SELECT id, fio, ставка_за_день FROM actors WHERE id=?", (actor_id,))
+
+    def choices(self):
+        return self.conn.execute("SELECT id, fio FROM actors ORDER BY id").fetchall()
+
+    def add(self, fio, rate):
+        c = self.conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES (?, ?)", (fio, rate))
+        self.conn.commit()
+        return c.lastrowid
+
+    def update(self, actor_id, fio, rate):
+        self.conn.execute("UPDATE actors SET fio=?, ставка_за_день=? WHERE id=?", (fio, rate, actor_id))
+        self.conn.commit()
+
+    def delete(self, actor_id):
+        self.conn.execute("DELETE FROM actors WHERE id=?", (actor_id,))
+        self.conn.commit()
+
+    def delete_many(self, actor_ids):
+        try:
+            self.conn.executemany("DELETE FROM actors WHERE id=?", ((actor_id,) for actor_id in actor_ids))
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def shooting_count(self, actor_id):
+        return self.conn.execute("SELECT COUNT(*) FROM shootings WHERE actor_id=?", (actor_id,)).fetchone()[0]
+
+    def busy(self, actor_ids):
+        # Актёры из actor_ids, которые участвуют в съёмках.
+        return [row[0] for row in self.conn.execute("""
+            SELECT a.fio FROM actors a
+            WHERE a.id IN (SELECT value FROM json_each(?))
+              AND EXISTS (SELECT 1 FROM shootings s WHERE s.actor_id = a.id)
+        """, (id_list(actor_ids),))]
+
+class MovieRepository:
+    LIST_SQL = "SELECT id, название, режиссёр, бюджет, название_key, режиссёр_key FROM movies"
+    LIST_KEYS = [("id", 0)]
+    LIST_COLUMNS = {
+        "id": ("id", 0),
+        "title": ("название_key", 4),
+        "director": ("режиссёр_key", 5),
+        "budget": ("бюджет", 3),
+    }
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get(self, movie_id):
+        return fetch_row(self.conn, Movie, "SELECT id, название, режиссёр, бюджет FROM movies WHERE id=?",
+                         (movie_id,))
+
+    def choices(self):
+        return self.conn.execute("SELECT id, название FROM movies ORDER BY id").fetchall()
+
+    def add(self, title, director, budget):
+        c = self.conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, ?, ?)",
+                              (title, director, budget))
+        self.conn.commit()
+        return c.lastrowid
+
+    def update(self, movie_id, title, director, budget):
+        self.conn.execute("UPDATE movies SET название=?, режиссёр=?, бюджет=? WHERE id=?",
+                          (title, director, budget, movie_id))
+        self.conn.commit()
+
+    def delete(self, movie_id):
+        self.conn.execute("DELETE FROM movies WHERE id=?", (movie_id,))
+        self.conn.commit()
+
+    def delete_many(self, movie_ids):
+        try:
+            self.conn.executemany("DELETE FROM movies WHERE id=?", ((movie_id,) for movie_id in movie_ids))
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def shooting_count(self, movie_id):
+        return self.conn.execute("SELECT COUNT(*) FROM shootings WHERE movie_id=?", (movie_id,)).fetchone()[0]
+
+    def busy(self, movie_ids):
+        # Фильмы из movie_ids, по которым есть съёмки.
+        return [row[0] for row in self.conn.execute("""
+            SELECT m.название FROM movies m
+            WHERE m.id IN (SELECT value FROM json_each(?))
+              AND EXISTS (SELECT 1 FROM shootings s WHERE s.movie_id = m.id)
+        """, (id_list(movie_ids),))]
+
+    def spend(self, movie_id):
+        return fetch_row(self.conn, MovieSpend, """
+            SELECT m.бюджет, IFNULL(ms.spent, 0)
+            FROM movies m
+            LEFT JOIN movie_spend ms ON ms.movie_id = m.id
+            WHERE m.id = ?
+        """, (movie_id,))
+
+class ShootingRepository:
+    # actor_id и movie_id в Treeview не выводятся: по ним выбор съёмки
+    # заполняет форму без поиска актёра и фильма по имени.
+    LIST_SQL = """
+        SELECT s.id, a.fio, m.название, s.дата, s.сцена, s.гонорар, s.actor_id, s.movie_id,
+               IFNULL(s.сцена, ''), IFNULL(s.гонорар, 0), a.fio_key, m.название_key
+        FROM shootings s
+        JOIN actors a ON s.actor_id = a.id
+        JOIN movies m ON s.movie_id = m.id
+    """
+    # Внешние ключи не допускают съёмок без актёра или фильма, поэтому
+    # строки списка считаются без соединений: на миллионе съёмок это
+    # миллисекунды вместо секунды.
+    COUNT_SQL = "SELECT COUNT(*) FROM shootings"
+    # Поля Shooting -> столбцы shootings.
+    FIELDS = {"actor_id": "actor_id", "movie_id": "movie_id", "date": "дата", "scene": "сцена", "fee": "гонорар"}
+    LIST_KEYS = [("s.дата", 3), ("s.id", 0)]
+    LIST_COLUMNS = {
+        "id": ("s.id", 0),
+        "actor": ("a.fio_key", 10),
+        "movie": ("m.название_key", 11),
+        "date": ("s.дата", 3),
+        "scene": ("IFNULL(s.сцена, '')", 8),
+        "fee": ("IFNULL(s.гонорар, 0)", 9),
+    }
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get(self, shooting_id):
+        return fetch_row(self.conn, Shooting, """
+            SELECT id, actor_id, movie_id, дата, сцена, гонорар FROM shootings WHERE id=?
+        """, (shooting_id,))
+
+    def add(self, actor_id, movie_id, day, scene, fee):
+        c = self.conn.execute("""
+            INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар)
+            VALUES (?, ?, ?, ?, ?)
+        """, (actor_id, movie_id, day, scene, fee))
+        self.conn.commit()
+        return c.lastrowid
+
+    def update(self, shooting_id, actor_id, movie_id, day, scene, fee):
+        self.conn.execute("""
+            UPDATE shootings
+            SET actor_id=?, movie_id=?, дата=?, сцена=?, гонорар=?
+            WHERE id=?
+        """, (actor_id, movie_id, day, scene, fee, shooting_id))
+        self.conn.commit()
+
+    def delete(self, shooting_id):
+        self.conn.execute("DELETE FROM shootings WHERE id=?", (shooting_id,))
+        self.conn.commit()
+
+    # Массовые изменения: одна транзакция и один executemany на все строки.
+    # Возвращают строки до и после изменения.
+
+    def get_many(self, shooting_ids):
+        return fetch_rows(self.conn, Shooting, """
+            SELECT id, actor_id, movie_id, дата, сцена, гонорар FROM shootings
+            WHERE id IN (SELECT value FROM json_each(?))
+            ORDER BY id
+        """, (id_list(shooting_ids),))
+
+    def add_many(self, rows):
+        # rows - (actor_id, movie_id, дата, сцена, гонорар). Если гонорары
+        # превысят бюджет фильма, не добавляется ни одна съёмка.
+        try:
+            self.conn.executemany("""
+                INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            errors = over_budget(self.conn, {row[1] for row in rows})
+            if errors:
+                raise BudgetExceeded(errors)
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def update_many(self, old_rows, new_rows, fields):
+        # Записываются только поля fields: триггеры остальных столбцов (на
+        # сцену - поисковый индекс) не срабатывают, перенос съёмок в разы
+        # быстрее. Если у фильма, затраты которого выросли, гонорары
+        # превысят бюджет, транзакция откатывается целиком (BudgetExceeded).
+        grown = defaultdict(float)
+        for old, new in zip(old_rows, new_rows):
+            grown[old.movie_id] -= old.fee or 0
+            grown[new.movie_id] += new.fee or 0
+        assignments = ", ".join(f"{self.FIELDS[field]}=?" for field in fields)
+        try:
+            self.conn.executemany(f"UPDATE shootings SET {assignments} WHERE id=?",
+                                  (tuple(getattr(row, field) for field in fields) + (row.id,) for row in new_rows))
+            errors = over_budget(self.conn, [movie_id for movie_id, delta in grown.items() if delta > 0.005])
+            if errors:
+                raise BudgetExceeded(errors)
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    # *_rows только вычисляют строки после изменения, без записи: их можно
+    # проверить (см. conflicts.ScheduleIndex.check_rows) до update_many.
+
+    def reschedule_rows(self, shooting_ids, days):
+        old_rows = self.get_many(shooting_ids)
+        new_rows = []
+        for row in old_rows:
+            try:
+                day = date.fromisoformat(row.date)
+            except ValueError:
+                raise ValueError(f"у съёмки {row.id} дата «{row.date}» не в формате ГГГГ-ММ-ДД") from None
+            new_rows.append(row._replace(date=(day + timedelta(days=days)).isoformat()))
+        return old_rows, new_rows
+
+    def reschedule(self, shooting_ids, days):
+        old_rows, new_rows = self.reschedule_rows(shooting_ids, days)
+        self.update_many(old_rows, new_rows, ["date"])
+        return old_rows, new_rows
+
+    def adjust_fee_rows(self, shooting_ids, percent=0, amount=0):
+        # Новый гонорар: прежний плюс percent процентов плюс amount.
+        old_rows = self.get_many(shooting_ids)
+        new_rows = []
+        for row in old_rows:
+            fee = round((row.fee or 0) * (1 + percent / 100) + amount, 2)
+            if fee < 0:
+                raise ValueError(f"гонорар съёмки {row.id} стал бы отрицательным ({fee:.2f})")
+            new_rows.append(row._replace(fee=fee))
+        return old_rows, new_rows
+
+    def adjust_fees(self, shooting_ids, percent=0, amount=0):
+        old_rows, new_rows = self.adjust_fee_rows(shooting_ids, percent, amount)
+        self.update_many(old_rows, new_rows, ["fee"])
+        return old_rows, new_rows
+
+    def delete_many(self, shooting_ids):
+        # Ошибка на любой строке (например, в триггере) откатывает удаление
+        # всего пакета.
+        old_rows = self.get_many(shooting_ids)
+        try:
+            self.conn.executemany("DELETE FROM shootings WHERE id=?", ((row.id,) for row in old_rows))
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return old_rows
+
+class ReportService:
+    # Таблицы, от которых зависят агрегаты: по ним cache (cache.QueryCache)
+    # сбрасывает результаты при записи.
+    EXPENSES_TABLES = ("actors", "shootings")
+    BUDGETS_TABLES = ("movies", "shootings", "movie_spend")
+    CALENDAR_TABLES = ("shootings",)
+    SCHEDULE_SQL = """
+        SELECT s.id, a.fio, m.название, s.дата, s.сцена
+        FROM shootings s
+        JOIN actors a ON s.actor_id = a.id
+        JOIN movies m ON s.movie_id = m.id
+    """
+    # Календарь и диаграмма читают окно дней из day_totals
+    # (см. database.migration_day_totals), а не соединение съёмок.
+    CALENDAR_SQL = """
+        SELECT день, SUM(shootings_count), SUM(fees)
+        FROM day_totals
+        WHERE день >= ? AND день <= ?
+        GROUP BY день
+    """
+    TIMELINE_SQL = {
+        "actors": """
+            SELECT d.actor_id, a.fio, d.день, SUM(d.shootings_count), SUM(d.fees)
+            FROM day_totals d
+            JOIN actors a ON a.id = d.actor_id
+            WHERE d.день >= ? AND d.день <= ?
+            GROUP BY d.actor_id, d.день
+        """,
+        "movies": """
+            SELECT d.movie_id, m.название, d.день, SUM(d.shootings_count), SUM(d.fees)
+            FROM day_totals d
+            JOIN movies m ON m.id = d.movie_id
+            WHERE d.день >= ? AND d.день <= ?
+            GROUP BY d.movie_id, d.день
+        """,
+    }
+    # Суммы группируются по id в подзапросе ({where} - условие на этот id),
+    # и только готовые строки соединяются со справочником: сортировка по
+    # вычисляемому ключу fio_key/название_key идёт по одной строке на
+    # актёра или фильм, а не по каждой съёмке.
+    EXPENSES_SQL = """
+        SELECT a.id, a.fio, IFNULL(e.total_fee, 0) as total_fee
+        FROM actors a
+        LEFT JOIN (
+            SELECT actor_id, SUM(гонорар) as total_fee
+            FROM shootings
+            {where}
+            GROUP BY actor_id
+        ) e ON e.actor_id = a.id
+    """
+    # Суммы фильма до сегодняшнего дня и после него берутся из day_totals
+    # по индексу idx_day_totals_movie; ?1 - номер сегодняшнего дня.
+    BUDGETS_SQL = """
+        SELECT m.id, m.название, m.бюджет, IFNULL(ms.spent, 0) as spent,
+               IFNULL(d.past_fees, 0), IFNULL(d.future_fees, 0), d.first_day, d.last_past_day, d.last_day
+        FROM movies m
+        LEFT JOIN movie_spend ms ON ms.movie_id = m.id
+        LEFT JOIN (
+            SELECT movie_id,
+                   SUM(CASE WHEN день <= ?1 THEN fees END) as past_fees,
+                   SUM(CASE WHEN день > ?1 THEN fees END) as future_fees,
+                   MIN(день) as first_day, MAX(CASE WHEN день <= ?1 THEN день END) as last_past_day,
+                   MAX(день) as last_day
+            FROM day_totals
+            {where}
+            GROUP BY movie_id
+        ) d ON d.movie_id = m.id
+    """
+
+    def __init__(self, conn, cache=None):
+        self.conn = conn
+        self.cache = cache
+
+    def _fetch_all(self, row_type, sql, tables, params=()):
+        if self.cache is None:
+            return fetch_rows(self.conn, row_type, sql, params)
+        return self.cache.fetch((sql, tuple(params)), tables,
+                                lambda: fetch_rows(self.conn, row_type, sql, params))
+
+    def schedule_sql(self, start, end, shooting_id=None, actor_id=None, movie_id=None):
+        # Период сравнивается по номеру дня (индекс idx_shootings_day);
+        # от набора границ зависит только число условий, поэтому разных
+        # текстов запроса немного и все они остаются в кэше sqlite3.
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("s.день >= ?")
+            params.append(start.toordinal())
+        if end is not None:
+            conditions.append("s.день <= ?")
+            params.append(end.toordinal())
+        for column, value in (("s.id", shooting_id), ("s.actor_id", actor_id), ("s.movie_id", movie_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        sql = self.SCHEDULE_SQL
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql, params
+
+    def schedule(self, start=None, end=None):
+        sql, params = self.schedule_sql(start, end)
+        return fetch_rows(self.conn, ScheduleRow, sql + " ORDER BY s.день, s.id", params)
+
+    def schedule_row(self, shooting_id, start=None, end=None):
+        sql, params = self.schedule_sql(start, end, shooting_id)
+        return fetch_row(self.conn, ScheduleRow, sql, params)
+
+    def schedule_for(self, start=None, end=None, actor_id=None, movie_id=None):
+        # Строки периода одного актёра или фильма одним запросом - для
+        # обновления показанного расписания после переименования.
+        sql, params = self.schedule_sql(start, end, actor_id=actor_id, movie_id=movie_id)
+        return fetch_rows(self.conn, ScheduleRow, sql, params)
+
+    def calendar(self, start, end):
+        return self._fetch_all(DayTotal, self.CALENDAR_SQL, self.CALENDAR_TABLES,
+                               (start.toordinal(), end.toordinal()))
+
+    def timeline(self, group, start, end):
+        return self._fetch_all(TimelineCell, self.TIMELINE_SQL[group], self.CALENDAR_TABLES + (group,),
+                               (start.toordinal(), end.toordinal()))
+
+    def actor_expenses(self):
+        return self._fetch_all(ActorExpense, self.EXPENSES_SQL.format(where="") + " ORDER BY a.fio_key, a.id",
+                               self.EXPENSES_TABLES)
+
+    def actor_expense(self, actor_id):
+        sql = self.EXPENSES_SQL.format(where="WHERE actor_id = ?1") + " WHERE a.id = ?1"
+        return fetch_row(self.conn, ActorExpense, sql, (actor_id,))
+
+    def movie_budgets(self, today=None):
+        today = today or date.today()
+        rows = self._fetch_all(BudgetHistory,
+                               self.BUDGETS_SQL.format(where="") + " ORDER BY m.название_key, m.id",
+                               self.BUDGETS_TABLES, (today.toordinal(),))
+        return [forecast(row, today) for row in rows]
+
+    def movie_budget(self, movie_id, today=None):
+        # Прогноз одного фильма - для пересчёта после записи съёмки.
+        today = today or date.today()
+        sql = self.BUDGETS_SQL.format(where="WHERE movie_id = ?2") + " WHERE m.id = ?2"
+        row = fetch_row(self.conn, BudgetHistory, sql, (today.toordinal(), movie_id))
+        return None if row is None else forecast(row, today)
+
+    def check_movie_spend(self):
+        return database.check_movie_spend(self.conn)
+
+    def rebuild_movie_spend(self):
+        database.rebuild_movie_spend(self.conn.cursor())
+        self.conn.commit()
+        if self.cache is not None:
+            self.cache.invalidate("movie_spend")
+
+# Точки входа для DatabaseExecutor.submit: первым аргументом приходит
+# соединение рабочего потока.
+def load_schedule(conn, start=None, end=None):
+    return ReportService(conn).schedule(start, end)
+
+def load_calendar(conn, start, end, cache=None):
+    return ReportService(conn, cache).calendar(start, end)
+
+def load_timeline(conn, group, start, end, cache=None):
+    return ReportService(conn, cache).timeline(group, start, end)
+
+def load_actor_expenses(conn, cache=None):
+    return ReportService(conn, cache).actor_expenses()
+
+def load_movie_budgets(conn, cache=None, today=None):
+    return ReportService(conn, cache).movie_budgets(today)
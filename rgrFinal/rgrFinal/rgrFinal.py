@@ -1,19 +1,564 @@
 ﻿import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import sqlite3
-import csv
-from datetime import datetime, timedelta
+import bisect
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, timedelta
+import analytics
+import conflicts
+import database
+from cache import QueryCache
+from executor import DatabaseExecutor
+import exporter
+import importer
+import repositories
+import scheduler
+import search
+from repositories import (ActorRepository, MovieRepository, ShootingRepository, ReportService,
+                          Actor, Movie, Shooting, BudgetExceeded)
+
+# Изменение одной строки таблицы: op - "insert", "update" или "delete",
+# key - первичный ключ, old/new - строки таблицы (repositories.Actor, Movie,
+# Shooting) до и после записи. op "reload" - массовое изменение многих
+# строк (key - None): вкладки перечитываются целиком один раз; old и new -
+# списки строк до и после записи, если они известны, иначе None.
+RowChange = namedtuple("RowChange", ["table", "op", "key", "old", "new"])
+
+# Пауза после последней клавиши, через которую запускается поиск при наборе.
+SEARCH_DELAY_MS = 250
+
+# Сколько конфликтов показывать в окне проверки расписания.
+CONFLICT_LIMIT = 1000
+
+# Таблицы, из которых строятся вкладки отчётов.
+REPORT_TABLES = {
+    "schedule": ("actors", "movies", "shootings"),
+    "calendar": ("actors", "movies", "shootings"),
+    "expenses": ("actors", "shootings"),
+    "budget": ("movies", "shootings"),
+    "analytics": ("actors", "movies", "shootings"),
+}
+# Вкладки отчётов, которые применяют изменения сами (apply_*_change);
+# остальные после записи устаревают и перечитываются при открытии.
+LIVE_REPORTS = ("schedule", "calendar", "expenses", "budget")
+
+ANALYTICS_VIEWS = ["Актёры по месяцам", "Фильмы по неделям", "Топ актёров", "Топ фильмов", "Расход бюджета фильма"]
+
+def parse_fee_change(text):
+    # "+500" или "-500" - сумма, "10%" или "-10%" - процент от гонорара.
+    # Возвращает (percent, amount).
+    text = text.strip().replace(",", ".")
+    if text.endswith("%"):
+        return float(text[:-1]), 0
+    return 0, float(text)
+
+def set_columns(tree, columns):
+    # Заменяет столбцы Treeview: columns - (имя, заголовок, ширина).
+    tree.delete(*tree.get_children())
+    tree.configure(columns=[column for column, _, _ in columns])
+    for column, text, width in columns:
+        tree.heading(column, text=text)
+        tree.column(column, width=width, minwidth=width, stretch=False, anchor="center")
+
+def sort_key(value):
+    # Ключ сортировки по типизированному значению: пустые, затем числа,
+    # затем строки в русском алфавитном порядке.
+    if value is None:
+        return (0, 0)
+    if isinstance(value, str):
+        return (2, database.ru_key(value))
+    return (1, value)
+
+class VirtualTreeview:
+    # Держит в Treeview только видимое окно строк (плюс запас overscan)
+    # и подгружает соседние страницы из SQLite по ключу (keyset paging).
+    # Последний из keys - уникальный ключ строки; сортировка по столбцу
+    # (columns: столбец -> выражение ORDER BY) выполняется в SQL.
+    # count_query - более дешёвый подсчёт строк без фильтра.
+    def __init__(self, tree, scrollbar, conn, query, keys, descending=False, overscan=20, columns=None,
+                 count_query=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.conn = conn
+        self.query = query
+        self.count_query = count_query
+        self.keys = keys
+        self.descending = descending
+        self.columns = columns or {}
+        self.sort_column = None
+        self.overscan = overscan
+        self.where = ""
+        self.params = ()
+        self.total = 0
+        self.first = 0
+        self.visible = 20
+        self.buffer = []
+        self.buffer_start = 0
+        self.rows = {}
+        self.rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+
+        self.scrollbar.configure(command=self.on_scrollbar)
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.on_wheel_units(-3))
+        self.tree.bind("<Button-5>", lambda e: self.on_wheel_units(3))
+        self.tree.bind("<Up>", lambda e: self.move_focus(-1))
+        self.tree.bind("<Down>", lambda e: self.move_focus(1))
+        self.tree.bind("<Prior>", lambda e: self.move_focus(-self.visible))
+        self.tree.bind("<Next>", lambda e: self.move_focus(self.visible))
+        self.tree.bind("<Home>", lambda e: self.move_focus(-self.total))
+        self.tree.bind("<End>", lambda e: self.move_focus(self.total))
+
+    def set_filter(self, where="", params=()):
+        self.where = where
+        self.params = tuple(params)
+        self.first = 0
+        self.refresh()
+
+    def sort_by(self, column):
+        descending = not self.descending if column == self.sort_column else False
+        unique = self.keys[-1]
+        key = self.columns[column]
+        self.keys = [key] if key == unique else [key, unique]
+        self.descending = descending
+        self.sort_column = column
+        # Число строк от порядка не зависит, пересчитывать его не нужно.
+        self.first = 0
+        self.buffer = []
+        self._load_window()
+        self._render()
+        return descending
+
+    def refresh(self):
+        if self.count_query and not self.where:
+            sql = self.count_query
+        else:
+            sql = f"SELECT COUNT(*) FROM ({self.query}{self._where_sql()})"
+        self.total = self.conn.execute(sql, self.params).fetchone()[0]
+        self.first = max(0, min(self.first, self.total - self.visible))
+        self.buffer = []
+        self.buffer_start = 0
+        self._load_window()
+        self._render()
+
+    def reload(self):
+        self.first = max(0, min(self.first, self.total - self.visible))
+        high = min(self.total, self.first + self.visible + self.overscan)
+        if self.buffer and self.buffer_start <= self.first:
+            self.buffer = self._select(self._key_clause(True, inclusive=True), self._key(self.buffer[0]),
+                                       self.descending, high - self.buffer_start)
+        else:
+            self.buffer = []
+            self._load_window()
+        self._render()
+
+    def apply_change(self, change):
+        if self.where or change.op == "reload":
+            self.refresh()
+            return
+        if change.op == "insert":
+            self.total += 1
+        elif change.op == "delete":
+            self.total -= 1
+        self.reload()
+
+    def row(self, iid):
+        # Строка запроса для показанного элемента - со всеми столбцами,
+        # в том числе не выведенными в Treeview, без обращения к базе.
+        return self.rows.get(iid)
+
+    def locate(self, row_id):
+        # Прокручивает список к строке с уникальным ключом row_id и выделяет
+        # её. Позиция - число строк перед ней в текущем порядке.
+        unique = self.keys[-1][0]
+        row = self.conn.execute(f"{self.query}{self._where_sql(f'{unique} = ?')}",
+                                self.params + (row_id,)).fetchone()
+        if row is None:
+            return False
+        sql = f"SELECT COUNT(*) FROM ({self.query}{self._where_sql(self._key_clause(False))})"
+        position = self.conn.execute(sql, self.params + self._key(row)).fetchone()[0]
+        self.scroll_to(position - self.visible // 2)
+        iid = str(row_id)
+        if self.tree.exists(iid):
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        return True
+
+    def scroll_to(self, first):
+        first = max(0, min(first, self.total - self.visible))
+        if first == self.first and self.buffer:
+            return
+        self.first = first
+        self._load_window()
+        self._render()
+
+    def on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible
+            self.scroll_to(self.first + step)
+
+    def on_configure(self, event):
+        visible = max(1, event.height // self.rowheight - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.first = max(0, min(self.first, self.total - self.visible))
+            self._load_window()
+            self._render()
+
+    def on_mousewheel(self, event):
+        return self.on_wheel_units(-3 if event.delta > 0 else 3)
+
+    def on_wheel_units(self, step):
+        self.scroll_to(self.first + step)
+        return "break"
+
+    def move_focus(self, step):
+        if not self.total:
+            return "break"
+        items = self.tree.get_children()
+        focus = self.tree.focus()
+        position = self.first + (items.index(focus) if focus in items else 0) + step
+        position = max(0, min(position, self.total - 1))
+
+        if position < self.first:
+            self.scroll_to(position)
+        elif position >= self.first + self.visible:
+            self.scroll_to(position - self.visible + 1)
+
+        items = self.tree.get_children()
+        index = position - self.first
+        if 0 <= index < len(items):
+            self.tree.selection_set(items[index])
+            self.tree.focus(items[index])
+        return "break"
+
+    def _where_sql(self, extra=""):
+        clauses = [clause for clause in (self.where, extra) if clause]
+        return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+    def _key_clause(self, forward, inclusive=False):
+        # Отдельное условие на первый столбец позволяет SQLite начать
+        # поиск по индексу этого столбца, а не сравнивать кортежи с начала.
+        columns = ", ".join(expr for expr, _ in self.keys)
+        marks = ", ".join("?" for _ in self.keys)
+        op = ">" if forward != self.descending else "<"
+        return f"{self.keys[0][0]} {op}= ? AND ({columns}) {op}{'=' if inclusive else ''} ({marks})"
+
+    def _key(self, row):
+        key = tuple(row[index] for _, index in self.keys)
+        return key[:1] + key
+
+    def _select(self, extra, params, descending, limit, offset=0):
+        direction = "DESC" if descending else "ASC"
+        order = ", ".join(f"{expr} {direction}" for expr, _ in self.keys)
+        sql = f"{self.query}{self._where_sql(extra)} ORDER BY {order} LIMIT ? OFFSET ?"
+        return self.conn.execute(sql, self.params + tuple(params) + (limit, offset)).fetchall()
+
+    def _fetch_after(self, row, count):
+        return self._select(self._key_clause(True), self._key(row), self.descending, count)
+
+    def _fetch_before(self, row, count):
+        rows = self._select(self._key_clause(False), self._key(row), not self.descending, count)
+        rows.reverse()
+        return rows
+
+    def _load_window(self):
+        low = max(0, self.first - self.overscan)
+        high = min(self.total, self.first + self.visible + self.overscan)
+        start = self.buffer_start
+        end = start + len(self.buffer)
+
+        if self.buffer and start <= self.first and min(self.total, self.first + self.visible) <= end:
+            return
+
+        if not self.buffer or high < start or low > end:
+            self.buffer = self._select("", (), self.descending, high - low, low)
+            self.buffer_start = low
+            return
+
+        if high > end:
+            self.buffer.extend(self._fetch_after(self.buffer[-1], high - end))
+        if low < start:
+            rows = self._fetch_before(self.buffer[0], start - low)
+            self.buffer[:0] = rows
+            self.buffer_start = start - len(rows)
+        if self.buffer_start < low:
+            del self.buffer[:low - self.buffer_start]
+            self.buffer_start = low
+        del self.buffer[high - self.buffer_start:]
+
+    def _render(self):
+        offset = self.first - self.buffer_start
+        rows = self.buffer[offset:offset + self.visible]
+        iids = [str(row[self.keys[-1][1]]) for row in rows]
+        self.rows = dict(zip(iids, rows))
+
+        stale = set(self.tree.get_children()) - set(iids)
+        if stale:
+            self.tree.delete(*stale)
+
+        for index, (iid, row) in enumerate(zip(iids, rows)):
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=row)
+                self.tree.move(iid, "", index)
+            else:
+                self.tree.insert("", index, iid=iid, values=row)
+
+        if self.total:
+            self.scrollbar.set(self.first / self.total, min(1.0, (self.first + self.visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+class IncrementalTree:
+    # Строки Treeview адресуются первичным ключом записи (id -> iid),
+    # поэтому изменение одной записи затрагивает только её строку. Рядом
+    # со строкой хранятся типизированные значения, и сортировка по столбцу
+    # не читает текст из Treeview; ключи текущего порядка лежат в order.
+    def __init__(self, tree, columns, format_values=None):
+        self.tree = tree
+        self.columns = columns
+        self.format_values = format_values or tuple
+        self.items = {}
+        self.order = []
+        self.sort_column = None
+        self.descending = False
+
+    def clear(self):
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.items = {}
+        self.order = []
+
+    def reset(self, rows):
+        self.clear()
+        tags = {}
+        for key, default_key, values, row_tags in rows:
+            self.items[key] = (None, default_key, values)
+            tags[key] = row_tags
+        self.order = sorted((self._sort_key(default_key, values), key)
+                            for key, (_, default_key, values) in self.items.items())
+        for _, key in reversed(self.order) if self.descending else self.order:
+            _, default_key, values = self.items[key]
+            iid = self.tree.insert("", "end", values=self.format_values(values), tags=tags[key])
+            self.items[key] = (iid, default_key, values)
+
+    def upsert(self, key, default_key, values, tags=()):
+        entry = (self._sort_key(default_key, values), key)
+        if key in self.items:
+            iid, old_default_key, old_values = self.items[key]
+            del self.order[bisect.bisect_left(self.order, (self._sort_key(old_default_key, old_values), key))]
+            position = bisect.bisect(self.order, entry)
+            self.tree.item(iid, values=self.format_values(values), tags=tags)
+            self.tree.move(iid, "", self._index(position))
+        else:
+            position = bisect.bisect(self.order, entry)
+            iid = self.tree.insert("", self._index(position), values=self.format_values(values), tags=tags)
+        self.order.insert(position, entry)
+        self.items[key] = (iid, default_key, values)
+
+    def remove(self, key):
+        if key not in self.items:
+            return
+        iid, default_key, values = self.items.pop(key)
+        del self.order[bisect.bisect_left(self.order, (self._sort_key(default_key, values), key))]
+        self.tree.delete(iid)
+
+    def iid(self, key):
+        item = self.items.get(key)
+        return item[0] if item else None
+
+    def keys(self, iids):
+        wanted = set(iids)
+        return [key for key, (iid, _, _) in self.items.items() if iid in wanted]
+
+    def sort_by(self, column):
+        # Перестановка строк одной командой set_children вместо move на каждую.
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        self.order = sorted((self._sort_key(default_key, values), key)
+                            for key, (_, default_key, values) in self.items.items())
+        iids = [self.items[key][0] for _, key in self.order]
+        if self.descending:
+            iids.reverse()
+        self.tree.set_children("", *iids)
+        return self.descending
+
+    def _sort_key(self, default_key, values):
+        if self.sort_column is None:
+            return sort_key(default_key)
+        return sort_key(values[self.columns.index(self.sort_column)])
+
+    def _index(self, position):
+        # position - место в order (по возрастанию) без самой строки.
+        return len(self.order) - position if self.descending else position
+
+class Generations:
+    # Счётчики изменений таблиц. Растут при записи из программы (publish)
+    # и при коммите другого соединения - фонового импорта или второй копии
+    # программы; его видно по PRAGMA data_version, но не видно, какую
+    # таблицу он изменил, поэтому растут все счётчики.
+    def __init__(self, conn, tables):
+        self.conn = conn
+        self.counters = dict.fromkeys(tables, 0)
+        self.data_version = self._data_version()
+
+    def _data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def bump(self, table):
+        self.counters[table] += 1
+
+    def check_external(self):
+        # True, если базу изменило другое соединение.
+        version = self._data_version()
+        if version == self.data_version:
+            return False
+        self.data_version = version
+        for table in self.counters:
+            self.counters[table] += 1
+        return True
+
+    def snapshot(self, tables):
+        return tuple(self.counters[table] for table in tables)
+
+class LiveSearch:
+    # Поиск при наборе в поле entry по индексу table с фильтром списка view.
+    # Запрос уходит в фоновый поток через SEARCH_DELAY_MS после последней
+    # клавиши, прежний при этом отменяется; уточнение уже найденного
+    # (набор продолжается) отбирается в памяти без обращения к базе.
+    HISTORY = 8
+
+    def __init__(self, app, entry, table, view):
+        self.app = app
+        self.entry = entry
+        self.table = table
+        self.view = view
+        self.slot = f"{table}:search"
+        self.words = ()
+        self.history = []
+        self.after_id = None
+        self.entry.bind("<KeyRelease>", self.on_key)
+        self.entry.bind("<Return>", lambda e: self.start())
+        self.app.subscribe(table, self.on_change)
+
+    def on_key(self, event):
+        self.cancel_delay()
+        self.after_id = self.app.master.after(SEARCH_DELAY_MS, self.start)
+
+    def cancel_delay(self):
+        if self.after_id is not None:
+            self.app.master.after_cancel(self.after_id)
+            self.after_id = None
+
+    def start(self):
+        self.cancel_delay()
+        query_words = tuple(search.words(self.entry.get()))
+        if query_words == self.words:
+            return
+        self.words = query_words
+        self.app.cancel_background(self.slot)
+        if not query_words:
+            self.view.set_filter()
+            return
+
+        matches = self.cached(query_words)
+        if matches is not None:
+            self.show(matches)
+            return
+        self.app.run_in_background(self.slot, search.find_matches, self.table, self.entry.get(),
+                                   on_done=self.show, on_error=self.failed, error_text="Не удалось выполнить поиск")
+
+    def cached(self, query_words):
+        # Из подходящих прежних результатов берётся самый короткий.
+        best = None
+        for matches in self.history:
+            if matches.complete and search.refines(matches.words, query_words):
+                if best is None or len(matches.rows) < len(best.rows):
+                    best = matches
+        return None if best is None else search.narrow(best, query_words)
+
+    def show(self, matches):
+        if matches.words != self.words:
+            return
+        self.history = [item for item in self.history if item.words != matches.words][-(self.HISTORY - 1):]
+        self.history.append(matches)
+        self.view.set_filter(*search.matches_filter(self.table, matches))
+
+    def failed(self, error):
+        self.words = ()
+        if isinstance(error, search.SearchTooBroad):
+            self.app.status_bar.config(text=f"{self.app.get_tab_name(self.table)}: {error}")
+        else:
+            messagebox.showerror("Ошибка", f"Не удалось выполнить поиск: {error}")
+
+    def on_change(self, change):
+        # Найденные раньше строки могли измениться: поиск повторяется.
+        self.history = []
+        if self.words:
+            self.words = ()
+            self.start()
+
+    def reset(self):
+        self.cancel_delay()
+        self.app.cancel_background(self.slot)
+        self.entry.delete(0, tk.END)
+        self.words = ()
+        self.history = []
+        self.view.set_filter()
 
 class FilmStudioApp:
-    def __init__(self, master):
+    def __init__(self, master, db_path="filmstudio.db"):
+        # Время этапов запуска и первого открытия вкладок: Сервис -> Время запуска.
+        self.started = time.perf_counter()
+        self.timings = []
         self.master = master
         self.master.title("Киностудия")
         self.master.geometry("1000x700")
         
         self.setup_styles()
-        self.conn = sqlite3.connect("filmstudio.db")
-        self.create_tables()
+        self.db_path = db_path
+        # Профиль соединения задаётся переменной окружения FILMSTUDIO_DB_PROFILE
+        # (safe, fast или bulk), см. database.PROFILES.
+        self.db_profile = os.environ.get("FILMSTUDIO_DB_PROFILE", database.DEFAULT_PROFILE)
+        if self.db_profile not in database.PROFILES:
+            messagebox.showerror("Ошибка", f"Неизвестный профиль соединения «{self.db_profile}», "
+                                           f"используется «{database.DEFAULT_PROFILE}».")
+            self.db_profile = database.DEFAULT_PROFILE
+        with self.timed("Подключение к базе"):
+            self.conn = database.connect(self.db_path, self.db_profile)
+        with self.timed("Миграции схемы"):
+            self.create_tables()
+        self.actor_repo = ActorRepository(self.conn)
+        self.movie_repo = MovieRepository(self.conn)
+        self.shooting_repo = ShootingRepository(self.conn)
+        # Кэш агрегатов отчётов общий для потока Tk и рабочих потоков.
+        self.query_cache = QueryCache()
+        self.reports = ReportService(self.conn, self.query_cache)
+        self.listeners = {"actors": [], "movies": [], "shootings": []}
+        # Дни съёмок актёров для проверки записи на конфликты.
+        self.schedule_index = conflicts.ScheduleIndex(self.conn)
+        self.subscribe("actors", self.schedule_index.apply)
+        self.subscribe("shootings", self.schedule_index.apply)
+        # Вкладка отчёта -> счётчики Generations, по которым она построена.
+        self.generations = Generations(self.conn, self.listeners)
+        self.rendered = {}
+        with self.timed("Запуск фоновых потоков"):
+            self.executor = DatabaseExecutor(self.db_path, workers=2,
+                                             connect=lambda path: database.connect(path, self.db_profile))
+        self.pending = {}
 
+        self.status_bar = ttk.Label(master, text="", anchor="w")
+        self.status_bar.pack(side="bottom", fill="x")
+        
         self.notebook = ttk.Notebook(master)
         self.notebook.pack(expand=1, fill="both")
         
@@ -22,24 +567,155 @@ class FilmStudioApp:
             "movies": ttk.Frame(self.notebook),
             "shootings": ttk.Frame(self.notebook),
             "schedule": ttk.Frame(self.notebook),
+            "calendar": ttk.Frame(self.notebook),
             "expenses": ttk.Frame(self.notebook),
             "budget": ttk.Frame(self.notebook),
+            "analytics": ttk.Frame(self.notebook),
+            "search": ttk.Frame(self.notebook),
             "export": ttk.Frame(self.notebook)
         }
         
         for name, tab in self.tabs.items():
             self.notebook.add(tab, text=self.get_tab_name(name))
-        
-        self.setup_actors_tab()
-        self.setup_movies_tab()
-        self.setup_shootings_tab()
-        self.setup_schedule_tab()
-        self.setup_expenses_tab()
-        self.setup_budget_tab()
-        self.setup_export_tab()
+        self.tab_keys = {str(tab): name for name, tab in self.tabs.items()}
+        
+        # Вкладки строятся и загружают данные при первом открытии (ensure_tab),
+        # при запуске - только первая.
+        self.tab_setup = {
+            "actors": self.setup_actors_tab,
+            "movies": self.setup_movies_tab,
+            "shootings": self.setup_shootings_tab,
+            "schedule": self.setup_schedule_tab,
+            "calendar": self.setup_calendar_tab,
+            "expenses": self.setup_expenses_tab,
+            "budget": self.setup_budget_tab,
+            "analytics": self.setup_analytics_tab,
+            "search": self.setup_search_tab,
+            "export": self.setup_export_tab,
+        }
+        self.built_tabs = set()
+        self.ensure_tab("actors")
         
         self.setup_menu()
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_executor()
+        self.master.after_idle(self.record_startup)
+
+    @contextmanager
+    def timed(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((stage, (time.perf_counter() - started) * 1000))
+
+    def record_startup(self):
+        self.timings.append(("Окно готово, всего с начала запуска", (time.perf_counter() - self.started) * 1000))
+
+    def show_startup_report(self):
+        lines = [f"{stage}: {ms:.1f} мс" for stage, ms in self.timings]
+        lines.append("\nВкладки, которые ещё не открывались, не построены.")
+        messagebox.showinfo("Время запуска", "\n".join(lines))
+
+    def show_cache_stats(self):
+        stats = self.query_cache.stats()
+        requests = stats.hits + stats.misses
+        hit_rate = f"{stats.hits / requests:.0%}" if requests else "-"
+        messagebox.showinfo("Кэш отчётов",
+                            f"Попаданий: {stats.hits}\n"
+                            f"Промахов: {stats.misses}\n"
+                            f"Доля попаданий: {hit_rate}\n"
+                            f"Результатов в кэше: {stats.entries} ({stats.size / 1024:.0f} КБ "
+                            f"из {self.query_cache.max_bytes / 1024 / 1024:.0f} МБ)\n"
+                            f"Вытеснено: {stats.evictions}\n"
+                            f"Сброшено при записи: {stats.invalidations}")
+
+    def ensure_tab(self, name):
+        # Возвращает True, если вкладка построена только что (с загрузкой данных).
+        if name in self.built_tabs:
+            return False
+        self.built_tabs.add(name)
+        with self.timed(f"Вкладка «{self.get_tab_name(name)}»"):
+            self.tab_setup[name]()
+        return True
+
+    def poll_executor(self):
+        self.executor.poll()
+        self.master.after(30, self.poll_executor)
+
+    def on_close(self):
+        for slot in list(self.pending):
+            self.cancel_background(slot)
+        self.executor.shutdown()
+        self.conn.close()
+        self.master.destroy()
+
+    def run_in_background(self, slot, fn, *args, on_done, on_error=None, error_text="Не удалось загрузить данные"):
+        previous = self.pending.get(slot)
+        if previous:
+            previous.cancel()
+        
+        def done(result):
+            self.finish_background(slot, future)
+            on_done(result)
+        
+        def failed(error):
+            self.finish_background(slot, future)
+            if on_error:
+                on_error(error)
+            else:
+                messagebox.showerror("Ошибка", f"{error_text}: {error}")
+        
+        future = self.executor.submit(fn, *args, on_done=done, on_error=failed)
+        self.pending[slot] = future
+        self.update_status_bar()
+        return future
+
+    def finish_background(self, slot, future):
+        if self.pending.get(slot) is future:
+            del self.pending[slot]
+        self.update_status_bar()
+
+    def cancel_background(self, slot):
+        future = self.pending.pop(slot, None)
+        if future:
+            future.cancel()
+            # Прерванная загрузка не отрисована: вкладка устарела.
+            self.rendered.pop(slot, None)
+        self.update_status_bar()
+
+    def check_external_changes(self):
+        # Запись другого соединения: неизвестно, какие таблицы изменились.
+        if self.generations.check_external():
+            self.query_cache.clear()
+            self.schedule_index.clear()
+
+    def load_report(self, tab, fn, *args, on_done):
+        # Загрузка вкладки отчёта; по окончании запоминается, на каких
+        # счётчиках она построена.
+        self.check_external_changes()
+        generation = self.generations.snapshot(REPORT_TABLES[tab])
+        
+        def done(rows):
+            on_done(rows)
+            self.rendered[tab] = generation
+        
+        self.run_in_background(tab, fn, *args, on_done=done)
+
+    def report_is_current(self, tab):
+        return (tab not in self.pending
+                and self.rendered.get(tab) == self.generations.snapshot(REPORT_TABLES[tab]))
+
+    def current_tab(self):
+        return self.tab_keys.get(str(self.notebook.select()))
+
+    def update_status_bar(self):
+        if self.pending:
+            names = sorted({self.get_tab_name(slot.split(":")[0]) for slot in self.pending})
+            self.status_bar.config(text=f"Загрузка: {', '.join(names)}...")
+        else:
+            self.status_bar.config(text="")
 
     def get_tab_name(self, tab_key):
         names = {
@@ -47,9 +723,15 @@ class FilmStudioApp:
             "movies": "Фильмы",
             "shootings": "Съёмки",
             "schedule": "Расписание",
+            "calendar": "Календарь",
             "expenses": "Затраты на актёров",
             "budget": "Бюджеты фильмов",
-            "export": "Экспорт"
+            "analytics": "Аналитика",
+            "conflicts": "Проверка расписания",
+            "plan": "Планирование съёмок",
+            "search": "Поиск",
+            "export": "Импорт и экспорт",
+            "import": "Импорт"
         }
         return names.get(tab_key, tab_key)
 
@@ -75,6 +757,13 @@ class FilmStudioApp:
     def setup_menu(self):
         menubar = tk.Menu(self.master)
         
+        service_menu = tk.Menu(menubar, tearoff=0)
+        service_menu.add_command(label="Проверить затраты по фильмам", command=self.verify_movie_spend)
+        service_menu.add_command(label="Проверить расписание", command=self.scan_conflicts)
+        service_menu.add_command(label="Время запуска", command=self.show_startup_report)
+        service_menu.add_command(label="Кэш отчётов", command=self.show_cache_stats)
+        menubar.add_cascade(label="Сервис", menu=service_menu)
+        
         info_menu = tk.Menu(menubar, tearoff=0)
         info_menu.add_command(label="О программе", command=self.show_about)
         menubar.add_cascade(label="Информация", menu=info_menu)
@@ -95,47 +784,122 @@ class FilmStudioApp:
         ttk.Button(about_window, text="Закрыть", command=about_window.destroy).pack()
 
     def create_tables(self):
-        c = self.conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS actors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fio TEXT NOT NULL,
-                ставка_за_день REAL NOT NULL
-            )
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS movies (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                название TEXT NOT NULL,
-                режиссёр TEXT,
-                бюджет REAL NOT NULL
-            )
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS shootings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                actor_id INTEGER NOT NULL,
-                movie_id INTEGER NOT NULL,
-                дата TEXT NOT NULL,
-                сцена TEXT,
-                гонорар REAL,
-                FOREIGN KEY(actor_id) REFERENCES actors(id),
-                FOREIGN KEY(movie_id) REFERENCES movies(id)
-            )
-        """)
-        self.conn.commit()
-
-    def treeview_sort_column(self, tree, col, reverse):
-        l = [(tree.set(k, col), k) for k in tree.get_children("")]
-        try:
-            l.sort(key=lambda t: float(t[0].replace(',', '.')), reverse=reverse)
-        except (ValueError, TypeError):
-            l.sort(key=lambda t: t[0], reverse=reverse)
+        database.migrate(self.conn)
+
+    def verify_movie_spend(self):
+        mismatches = self.reports.check_movie_spend()
+        if not mismatches:
+            messagebox.showinfo("Проверка", "Сводные затраты по фильмам согласованы со съёмками.")
+            return
+        
+        details = "\n".join(f"{title}: {stored if stored is not None else '-'} вместо {actual:.2f}"
+                            for movie_id, title, stored, actual in mismatches[:10])
+        if messagebox.askyesno("Проверка", f"Найдено расхождений: {len(mismatches)}\n{details}\n\nПересчитать?"):
+            self.reports.rebuild_movie_spend()
+            if "budget" in self.built_tabs:
+                self.load_budget_tab_data()
+
+    def scan_conflicts(self):
+        self.run_in_background("conflicts", conflicts.load_conflicts, on_done=self.show_conflicts,
+                               error_text="Не удалось проверить расписание")
+
+    def show_conflicts(self, found):
+        if not found:
+            messagebox.showinfo("Проверка", "Конфликтов в расписании не найдено.")
+            return
+        
+        window = tk.Toplevel(self.master)
+        window.title("Конфликты расписания")
+        window.geometry("800x500")
+        
+        counts = ", ".join(f"{title}: {sum(1 for conflict in found if conflict.kind == kind)}"
+                           for kind, title in conflicts.KIND_TITLES.items())
+        summary = f"Найдено конфликтов: {len(found)} ({counts})"
+        if len(found) > CONFLICT_LIMIT:
+            summary += f". Показаны первые {CONFLICT_LIMIT}"
+        ttk.Label(window, text=summary).pack(padx=10, pady=10, anchor="w")
+        
+        tree_frame = ttk.Frame(window)
+        tree_frame.pack(fill="both", expand=True, padx=10)
+        tree = ttk.Treeview(tree_frame, show="headings")
+        set_columns(tree, [("kind", "Конфликт", 180), ("date", "Дата", 100), ("actor", "Актёр", 180),
+                           ("movies", "Фильмов", 80), ("count", "Съёмок", 80), ("fees", "Гонорары", 110),
+                           ("rate", "Ставка", 110)])
+        tree.column("kind", anchor="w")
+        tree.column("actor", anchor="w")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(fill="both", expand=True)
         
-        for index, (val, k) in enumerate(l):
-            tree.move(k, '', index)
+        for conflict in found[:CONFLICT_LIMIT]:
+            tree.insert("", "end", values=(conflicts.KIND_TITLES[conflict.kind],
+                                           f"{date.fromordinal(conflict.day):%d.%m.%Y}", conflict.actor,
+                                           len(conflict.movie_ids), conflict.count, f"{conflict.fees:.2f}",
+                                           f"{conflict.rate:.2f}"))
         
-        tree.heading(col, command=lambda: self.treeview_sort_column(tree, col, not reverse))
+        ttk.Button(window, text="Закрыть", command=window.destroy).pack(pady=10)
+
+    def confirm_conflicts(self, actor_id, movie_id, date_text, fee, shooting_id=None):
+        # Конфликты не запрещают запись: пользователь решает сам.
+        self.check_external_changes()
+        found = self.schedule_index.check(actor_id, movie_id, date_text, fee, shooting_id)
+        return self.ask_conflicts(found, "Всё равно сохранить съёмку?")
+
+    def confirm_bulk_conflicts(self, old_rows, new_rows):
+        # То же для массового изменения: проверяются все строки пакета сразу.
+        self.check_external_changes()
+        found = self.schedule_index.check_rows(old_rows, new_rows)
+        return self.ask_conflicts(found, f"Всё равно изменить выделенные съёмки ({len(new_rows)})?")
+
+    def ask_conflicts(self, found, question):
+        if not found:
+            return True
+        details = "\n".join(f"{conflicts.KIND_TITLES[conflict.kind]}: {conflicts.describe(conflict)}"
+                            for conflict in found[:10])
+        if len(found) > 10:
+            details += f"\n... и ещё {len(found) - 10}"
+        return messagebox.askyesno("Конфликт расписания", f"{details}\n\n{question}")
+
+    def subscribe(self, table, listener):
+        self.listeners[table].append(listener)
+
+    def publish(self, *changes):
+        # Построенная вкладка отчёта применяет изменение сама (apply_*_change)
+        # и остаётся актуальной, если была актуальной до него.
+        # Массовое изменение (op "reload") вкладки отчётов не применяют:
+        # они устаревают, и перечитывается только открытая.
+        self.check_external_changes()
+        for change in changes:
+            if change.op == "reload":
+                current = []
+            else:
+                current = [tab for tab in LIVE_REPORTS if tab in self.built_tabs and self.report_is_current(tab)]
+            self.generations.bump(change.table)
+            self.query_cache.invalidate(change.table)
+            for listener in self.listeners[change.table]:
+                listener(change)
+            for tab in current:
+                if tab not in self.pending:
+                    self.rendered[tab] = self.generations.snapshot(REPORT_TABLES[tab])
+        if any(change.op == "reload" for change in changes):
+            self.refresh_report(self.current_tab())
+
+    def publish_many(self, table, op, old_rows, new_rows):
+        # Изменение одной строки вкладки применяют построчно, нескольких -
+        # одной перезагрузкой; индекс расписания применяет строки пакетом.
+        if len(old_rows) == 1:
+            self.publish(RowChange(table, op, old_rows[0].id, old_rows[0], new_rows[0] if new_rows else None))
+        elif old_rows:
+            self.publish(RowChange(table, "reload", None, old_rows, new_rows))
+
+    def treeview_sort_column(self, view, col):
+        descending = view.sort_by(col)
+        for column in view.tree["columns"]:
+            text = view.tree.heading(column, "text").rstrip(" ▲▼")
+            if column == col:
+                text += " ▼" if descending else " ▲"
+            view.tree.heading(column, text=text)
 
     def setup_actors_tab(self):
         main_frame = ttk.Frame(self.tabs["actors"])
@@ -172,47 +936,32 @@ class FilmStudioApp:
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
         self.actors_tree = ttk.Treeview(tree_frame, columns=("id", "fio", "rate"), show="headings")
-        self.actors_tree.heading("id", text="ID", command=lambda: self.treeview_sort_column(self.actors_tree, "id", False))
-        self.actors_tree.heading("fio", text="ФИО", command=lambda: self.treeview_sort_column(self.actors_tree, "fio", False))
-        self.actors_tree.heading("rate", text="Ставка за день", command=lambda: self.treeview_sort_column(self.actors_tree, "rate", False))
+        self.actors_tree.heading("id", text="ID", command=lambda: self.treeview_sort_column(self.actors_view, "id"))
+        self.actors_tree.heading("fio", text="ФИО", command=lambda: self.treeview_sort_column(self.actors_view, "fio"))
+        self.actors_tree.heading("rate", text="Ставка за день", command=lambda: self.treeview_sort_column(self.actors_view, "rate"))
         
         self.actors_tree.column("id", width=50, anchor="center")
         self.actors_tree.column("fio", width=250)
         self.actors_tree.column("rate", width=150, anchor="e")
         
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.actors_tree.yview)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical")
         scrollbar.pack(side="right", fill="y")
-        self.actors_tree.configure(yscrollcommand=scrollbar.set)
+        self.actors_view = VirtualTreeview(self.actors_tree, scrollbar, self.conn,
+                                           ActorRepository.LIST_SQL, ActorRepository.LIST_KEYS,
+                                           columns=ActorRepository.LIST_COLUMNS)
         
         self.actors_tree.pack(fill="both", expand=True)
         self.actors_tree.bind("<<TreeviewSelect>>", self.on_actor_select)
         
+        self.subscribe("actors", self.actors_view.apply_change)
+        self.actor_search = LiveSearch(self, self.actor_search_entry, "actors", self.actors_view)
         self.load_actors()
 
     def search_actors(self):
-        search_text = self.actor_search_entry.get().strip()
-        if not search_text:
-            self.load_actors()
-            return
-        
-        for row in self.actors_tree.get_children():
-            self.actors_tree.delete(row)
-        
-        c = self.conn.cursor()
-        c.execute("SELECT * FROM actors WHERE fio LIKE ?", (f"%{search_text}%",))
-        
-        for row in c.fetchall():
-            self.actors_tree.insert("", "end", values=row)
+        self.actor_search.start()
 
     def load_actors(self):
-        for row in self.actors_tree.get_children():
-            self.actors_tree.delete(row)
-        
-        c = self.conn.cursor()
-        c.execute("SELECT * FROM actors ORDER BY id")
-        
-        for row in c.fetchall():
-            self.actors_tree.insert("", "end", values=row)
+        self.actor_search.reset()
 
     def add_actor(self):
         fio = self.actor_fio_entry.get().strip()
@@ -230,13 +979,9 @@ class FilmStudioApp:
             messagebox.showerror("Ошибка", "Введите корректную ставку (положительное число).")
             return
         
-        c = self.conn.cursor()
-        c.execute("INSERT INTO actors (fio, ставка_за_день) VALUES (?, ?)", (fio, rate_value))
-        self.conn.commit()
+        actor_id = self.actor_repo.add(fio, rate_value)
         
-        self.load_actors()
-        self.refresh_shootings_comboboxes()
-        self.load_expenses_tab_data()
+        self.publish(RowChange("actors", "insert", actor_id, None, Actor(actor_id, fio, rate_value)))
         
         self.actor_fio_entry.delete(0, tk.END)
         self.actor_rate_entry.delete(0, tk.END)
@@ -272,13 +1017,9 @@ class FilmStudioApp:
             messagebox.showerror("Ошибка", "Введите корректную ставку (положительное число).")
             return
         
-        c = self.conn.cursor()
-        c.execute("UPDATE actors SET fio=?, ставка_за_день=? WHERE id=?", (fio, rate_value, actor_id))
-        self.conn.commit()
+        self.actor_repo.update(actor_id, fio, rate_value)
         
-        self.load_actors()
-        self.refresh_shootings_comboboxes()
-        self.load_expenses_tab_data()
+        self.publish(RowChange("actors", "update", actor_id, None, Actor(actor_id, fio, rate_value)))
 
     def delete_actor(self):
         selected = self.actors_tree.selection()
@@ -286,20 +1027,30 @@ class FilmStudioApp:
             messagebox.showerror("Ошибка", "Выберите актёра для удаления.")
             return
         
-        actor_id = self.actors_tree.item(selected[0])['values'][0]
+        actor_ids = [self.actors_tree.item(iid)['values'][0] for iid in selected]
+        if len(actor_ids) > 1:
+            self.delete_actors(actor_ids)
+            return
+        actor_id = actor_ids[0]
         
-        c = self.conn.cursor()
-        c.execute("SELECT COUNT(*) FROM shootings WHERE actor_id=?", (actor_id,))
-        if c.fetchone()[0] > 0:
+        if self.actor_repo.shooting_count(actor_id) > 0:
             messagebox.showerror("Ошибка", "Невозможно удалить актёра, так как он участвует в съёмках.")
             return
         
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этого актёра?"):
-            c.execute("DELETE FROM actors WHERE id=?", (actor_id,))
-            self.conn.commit()
-            self.load_actors()
-            self.refresh_shootings_comboboxes()
-            self.load_expenses_tab_data()
+            self.actor_repo.delete(actor_id)
+            self.publish(RowChange("actors", "delete", actor_id, None, None))
+
+    def delete_actors(self, actor_ids):
+        busy = self.actor_repo.busy(actor_ids)
+        if busy:
+            messagebox.showerror("Ошибка", "Невозможно удалить актёров, которые участвуют в съёмках: "
+                                           f"{', '.join(busy[:10])}{'...' if len(busy) > 10 else ''}")
+            return
+        
+        if messagebox.askyesno("Подтверждение", f"Удалить выбранных актёров ({len(actor_ids)})?"):
+            self.actor_repo.delete_many(actor_ids)
+            self.publish(RowChange("actors", "reload", None, None, None))
 
     def setup_movies_tab(self):
         main_frame = ttk.Frame(self.tabs["movies"])
@@ -340,49 +1091,34 @@ class FilmStudioApp:
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
         self.movies_tree = ttk.Treeview(tree_frame, columns=("id", "title", "director", "budget"), show="headings")
-        self.movies_tree.heading("id", text="ID", command=lambda: self.treeview_sort_column(self.movies_tree, "id", False))
-        self.movies_tree.heading("title", text="Название", command=lambda: self.treeview_sort_column(self.movies_tree, "title", False))
-        self.movies_tree.heading("director", text="Режиссёр", command=lambda: self.treeview_sort_column(self.movies_tree, "director", False))
-        self.movies_tree.heading("budget", text="Бюджет", command=lambda: self.treeview_sort_column(self.movies_tree, "budget", False))
+        self.movies_tree.heading("id", text="ID", command=lambda: self.treeview_sort_column(self.movies_view, "id"))
+        self.movies_tree.heading("title", text="Название", command=lambda: self.treeview_sort_column(self.movies_view, "title"))
+        self.movies_tree.heading("director", text="Режиссёр", command=lambda: self.treeview_sort_column(self.movies_view, "director"))
+        self.movies_tree.heading("budget", text="Бюджет", command=lambda: self.treeview_sort_column(self.movies_view, "budget"))
         
         self.movies_tree.column("id", width=50, anchor="center")
         self.movies_tree.column("title", width=200)
         self.movies_tree.column("director", width=150)
         self.movies_tree.column("budget", width=150, anchor="e")
         
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.movies_tree.yview)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical")
         scrollbar.pack(side="right", fill="y")
-        self.movies_tree.configure(yscrollcommand=scrollbar.set)
+        self.movies_view = VirtualTreeview(self.movies_tree, scrollbar, self.conn,
+                                           MovieRepository.LIST_SQL, MovieRepository.LIST_KEYS,
+                                           columns=MovieRepository.LIST_COLUMNS)
         
         self.movies_tree.pack(fill="both", expand=True)
         self.movies_tree.bind("<<TreeviewSelect>>", self.on_movie_select)
         
+        self.subscribe("movies", self.movies_view.apply_change)
+        self.movie_search = LiveSearch(self, self.movie_search_entry, "movies", self.movies_view)
         self.load_movies()
 
     def search_movies(self):
-        search_text = self.movie_search_entry.get().strip()
-        if not search_text:
-            self.load_movies()
-            return
-        
-        for row in self.movies_tree.get_children():
-            self.movies_tree.delete(row)
-        
-        c = self.conn.cursor()
-        c.execute("SELECT * FROM movies WHERE название LIKE ?", (f"%{search_text}%",))
-        
-        for row in c.fetchall():
-            self.movies_tree.insert("", "end", values=row)
+        self.movie_search.start()
 
     def load_movies(self):
-        for row in self.movies_tree.get_children():
-            self.movies_tree.delete(row)
-        
-        c = self.conn.cursor()
-        c.execute("SELECT id, название, режиссёр, бюджет FROM movies ORDER BY id") 
-        
-        for row in c.fetchall():
-            self.movies_tree.insert("", "end", values=row)
+        self.movie_search.reset()
 
     def add_movie(self):
         title = self.movie_title_entry.get().strip()
@@ -401,14 +1137,9 @@ class FilmStudioApp:
             messagebox.showerror("Ошибка", "Введите корректный бюджет (положительное число).")
             return
         
-        c = self.conn.cursor()
-        c.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, ?, ?)", 
-                 (title, director, budget_value))
-        self.conn.commit()
+        movie_id = self.movie_repo.add(title, director, budget_value)
         
-        self.load_movies()
-        self.refresh_shootings_comboboxes()
-        self.load_budget_tab_data()
+        self.publish(RowChange("movies", "insert", movie_id, None, Movie(movie_id, title, director, budget_value)))
         
         self.movie_title_entry.delete(0, tk.END)
         self.movie_director_entry.delete(0, tk.END)
@@ -448,14 +1179,9 @@ class FilmStudioApp:
             messagebox.showerror("Ошибка", "Введите корректный бюджет (положительное число).")
             return
         
-        c = self.conn.cursor()
-        c.execute("UPDATE movies SET название=?, режиссёр=?, бюджет=? WHERE id=?", 
-                 (title, director, budget_value, movie_id))
-        self.conn.commit()
+        self.movie_repo.update(movie_id, title, director, budget_value)
         
-        self.load_movies()
-        self.refresh_shootings_comboboxes()
-        self.load_budget_tab_data()
+        self.publish(RowChange("movies", "update", movie_id, None, Movie(movie_id, title, director, budget_value)))
 
     def delete_movie(self):
         selected = self.movies_tree.selection()
@@ -463,20 +1189,30 @@ class FilmStudioApp:
             messagebox.showerror("Ошибка", "Выберите фильм для удаления.")
             return
         
-        movie_id = self.movies_tree.item(selected[0])['values'][0]
+        movie_ids = [self.movies_tree.item(iid)['values'][0] for iid in selected]
+        if len(movie_ids) > 1:
+            self.delete_movies(movie_ids)
+            return
+        movie_id = movie_ids[0]
         
-        c = self.conn.cursor()
-        c.execute("SELECT COUNT(*) FROM shootings WHERE movie_id=?", (movie_id,))
-        if c.fetchone()[0] > 0:
+        if self.movie_repo.shooting_count(movie_id) > 0:
             messagebox.showerror("Ошибка", "Невозможно удалить фильм, так как он используется в съёмках.")
             return
         
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этот фильм?"):
-            c.execute("DELETE FROM movies WHERE id=?", (movie_id,))
-            self.conn.commit()
-            self.load_movies()
-            self.refresh_shootings_comboboxes()
-            self.load_budget_tab_data()
+            self.movie_repo.delete(movie_id)
+            self.publish(RowChange("movies", "delete", movie_id, None, None))
+
+    def delete_movies(self, movie_ids):
+        busy = self.movie_repo.busy(movie_ids)
+        if busy:
+            messagebox.showerror("Ошибка", "Невозможно удалить фильмы, которые используются в съёмках: "
+                                           f"{', '.join(busy[:10])}{'...' if len(busy) > 10 else ''}")
+            return
+        
+        if messagebox.askyesno("Подтверждение", f"Удалить выбранные фильмы ({len(movie_ids)})?"):
+            self.movie_repo.delete_many(movie_ids)
+            self.publish(RowChange("movies", "reload", None, None, None))
 
     def setup_shootings_tab(self):
         frame_form = ttk.Frame(self.tabs["shootings"])
@@ -509,18 +1245,20 @@ class FilmStudioApp:
         ttk.Button(btn_frame, text="Обновить", command=self.update_shooting).grid(row=0, column=1, padx=5)
         ttk.Button(btn_frame, text="Удалить", command=self.delete_shooting).grid(row=0, column=2, padx=5)
         
+        self.setup_bulk_frame(self.tabs["shootings"], self.selected_shootings)
+        
         tree_frame = ttk.Frame(self.tabs["shootings"])
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
         self.shootings_tree = ttk.Treeview(tree_frame, 
                                          columns=("id", "actor", "movie", "date", "scene", "fee"), 
                                          show="headings")
-        self.shootings_tree.heading("id", text="ID", command=lambda: self.treeview_sort_column(self.shootings_tree, "id", False))
-        self.shootings_tree.heading("actor", text="Актёр", command=lambda: self.treeview_sort_column(self.shootings_tree, "actor", False))
-        self.shootings_tree.heading("movie", text="Фильм", command=lambda: self.treeview_sort_column(self.shootings_tree, "movie", False))
-        self.shootings_tree.heading("date", text="Дата", command=lambda: self.treeview_sort_column(self.shootings_tree, "date", False))
-        self.shootings_tree.heading("scene", text="Сцена", command=lambda: self.treeview_sort_column(self.shootings_tree, "scene", False))
-        self.shootings_tree.heading("fee", text="Гонорар", command=lambda: self.treeview_sort_column(self.shootings_tree, "fee", False))
+        self.shootings_tree.heading("id", text="ID", command=lambda: self.treeview_sort_column(self.shootings_view, "id"))
+        self.shootings_tree.heading("actor", text="Актёр", command=lambda: self.treeview_sort_column(self.shootings_view, "actor"))
+        self.shootings_tree.heading("movie", text="Фильм", command=lambda: self.treeview_sort_column(self.shootings_view, "movie"))
+        self.shootings_tree.heading("date", text="Дата", command=lambda: self.treeview_sort_column(self.shootings_view, "date"))
+        self.shootings_tree.heading("scene", text="Сцена", command=lambda: self.treeview_sort_column(self.shootings_view, "scene"))
+        self.shootings_tree.heading("fee", text="Гонорар", command=lambda: self.treeview_sort_column(self.shootings_view, "fee"))
         
         self.shootings_tree.column("id", width=50, anchor="center")
         self.shootings_tree.column("actor", width=150)
@@ -529,42 +1267,36 @@ class FilmStudioApp:
         self.shootings_tree.column("scene", width=150)
         self.shootings_tree.column("fee", width=100, anchor="e")
         
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.shootings_tree.yview)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical")
         scrollbar.pack(side="right", fill="y")
-        self.shootings_tree.configure(yscrollcommand=scrollbar.set)
+        self.shootings_view = VirtualTreeview(self.shootings_tree, scrollbar, self.conn,
+                                              ShootingRepository.LIST_SQL, ShootingRepository.LIST_KEYS,
+                                              descending=True, columns=ShootingRepository.LIST_COLUMNS,
+                                              count_query=ShootingRepository.COUNT_SQL)
         
         self.shootings_tree.pack(fill="both", expand=True)
         self.shootings_tree.bind("<<TreeviewSelect>>", self.on_shooting_select)
         
+        self.subscribe("shootings", self.shootings_view.apply_change)
+        self.subscribe("actors", self.on_shootings_reference_change)
+        self.subscribe("movies", self.on_shootings_reference_change)
         self.refresh_shootings_comboboxes()
         self.load_shootings()
 
     def refresh_shootings_comboboxes(self):
-        c = self.conn.cursor()
-    
-        c.execute("SELECT id, fio FROM actors ORDER BY id")
-        actors = [f"{row[0]} - {row[1]}" for row in c.fetchall()]
+        actors = [f"{actor_id} - {fio}" for actor_id, fio in self.actor_repo.choices()]
         self.shooting_actor_cb['values'] = actors
     
-        c.execute("SELECT id, название FROM movies ORDER BY id")
-        movies = [f"{row[0]} - {row[1]}" for row in c.fetchall()]
+        movies = [f"{movie_id} - {title}" for movie_id, title in self.movie_repo.choices()]
         self.shooting_movie_cb['values'] = movies
 
+    def on_shootings_reference_change(self, change):
+        self.refresh_shootings_comboboxes()
+        if change.op in ("update", "reload"):
+            self.shootings_view.reload()
+
     def load_shootings(self):
-        for row in self.shootings_tree.get_children():
-            self.shootings_tree.delete(row)
-        
-        c = self.conn.cursor()
-        c.execute("""
-            SELECT s.id, a.fio, m.название, s.дата, s.сцена, s.гонорар
-            FROM shootings s
-            JOIN actors a ON s.actor_id = a.id
-            JOIN movies m ON s.movie_id = m.id
-            ORDER BY s.дата DESC
-        """)
-        
-        for row in c.fetchall():
-            self.shootings_tree.insert("", "end", values=row)
+        self.shootings_view.refresh()
 
     def add_shooting(self):
         actor_text = self.shooting_actor_cb.get()
@@ -578,7 +1310,7 @@ class FilmStudioApp:
             return
         
         try:
-            datetime.strptime(date_text, "%Y-%m-%d")
+            date_text = database.normalize_date(date_text)
         except ValueError:
             messagebox.showerror("Ошибка", "Введите дату в формате ГГГГ-ММ-ДД.")
             return
@@ -594,28 +1326,20 @@ class FilmStudioApp:
         actor_id = int(actor_text.split(" - ")[0])
         movie_id = int(movie_text.split(" - ")[0])
         
-        c = self.conn.cursor()
-        c.execute("SELECT бюджет FROM movies WHERE id=?", (movie_id,))
-        budget = c.fetchone()[0]
+        budget, total_fees = self.movie_repo.spend(movie_id)
         
-        c.execute("SELECT SUM(гонорар) FROM shootings WHERE movie_id=?", (movie_id,))
-        total_fees = c.fetchone()[0] or 0
-        
-        if total_fees + fee_value > budget:
+        if round(total_fees + fee_value, 2) > budget:
             messagebox.showerror("Ошибка", 
                                f"Общий гонорар ({total_fees + fee_value:.2f}) превышает бюджет фильма ({budget:.2f})!")
             return
         
-        c.execute("""
-            INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар)
-            VALUES (?, ?, ?, ?, ?)
-        """, (actor_id, movie_id, date_text, scene, fee_value))
-        self.conn.commit()
+        if not self.confirm_conflicts(actor_id, movie_id, date_text, fee_value):
+            return
+        
+        shooting_id = self.shooting_repo.add(actor_id, movie_id, date_text, scene, fee_value)
         
-        self.load_shootings()
-        self.load_schedule_data()
-        self.load_expenses_tab_data()
-        self.load_budget_tab_data()
+        self.publish(RowChange("shootings", "insert", shooting_id, None,
+                               Shooting(shooting_id, actor_id, movie_id, date_text, scene, fee_value)))
         
         self.shooting_actor_cb.set('')
         self.shooting_movie_cb.set('')
@@ -625,24 +1349,18 @@ class FilmStudioApp:
 
     def on_shooting_select(self, event):
         selected = self.shootings_tree.selection()
-        if selected:
-            values = self.shootings_tree.item(selected[0])['values']
+        row = self.shootings_view.row(selected[0]) if selected else None
+        if row:
+            shooting_id, actor, movie, day, scene, fee, actor_id, movie_id = row[:8]
             
-            c = self.conn.cursor()
-            c.execute("SELECT id FROM actors WHERE fio=?", (values[1],))
-            actor_id = c.fetchone()[0]
-            
-            c.execute("SELECT id FROM movies WHERE название=?", (values[2],))
-            movie_id = c.fetchone()[0]
-            
-            self.shooting_actor_cb.set(f"{actor_id} - {values[1]}")
-            self.shooting_movie_cb.set(f"{movie_id} - {values[2]}")
+            self.shooting_actor_cb.set(f"{actor_id} - {actor}")
+            self.shooting_movie_cb.set(f"{movie_id} - {movie}")
             self.shooting_date_entry.delete(0, tk.END)
-            self.shooting_date_entry.insert(0, values[3])
+            self.shooting_date_entry.insert(0, day)
             self.shooting_scene_entry.delete(0, tk.END)
-            self.shooting_scene_entry.insert(0, values[4])
+            self.shooting_scene_entry.insert(0, scene if scene is not None else "")
             self.shooting_fee_entry.delete(0, tk.END)
-            self.shooting_fee_entry.insert(0, values[5])
+            self.shooting_fee_entry.insert(0, fee if fee is not None else "")
 
     def update_shooting(self):
         selected = self.shootings_tree.selection()
@@ -662,7 +1380,7 @@ class FilmStudioApp:
             return
         
         try:
-            datetime.strptime(date_text, "%Y-%m-%d")
+            date_text = database.normalize_date(date_text)
         except ValueError:
             messagebox.showerror("Ошибка", "Введите дату в формате ГГГГ-ММ-ДД.")
             return
@@ -678,47 +1396,113 @@ class FilmStudioApp:
         actor_id = int(actor_text.split(" - ")[0])
         movie_id = int(movie_text.split(" - ")[0])
         
-        c = self.conn.cursor()
-        c.execute("SELECT бюджет FROM movies WHERE id=?", (movie_id,))
-        budget = c.fetchone()[0]
-        
-        c.execute("SELECT SUM(гонорар) FROM shootings WHERE movie_id=? AND id!=?", (movie_id, shooting_id))
-        total_fees = c.fetchone()[0] or 0
+        old = self.shooting_repo.get(shooting_id)
+        if old is None:
+            # Съёмку удалили после того, как список был загружен.
+            messagebox.showerror("Ошибка", "Съёмка не найдена: запись удалена.")
+            self.load_shootings()
+            return
+        budget, total_fees = self.movie_repo.spend(movie_id)
+        if old.movie_id == movie_id:
+            total_fees -= old.fee or 0
         
-        if total_fees + fee_value > budget:
+        if round(total_fees + fee_value, 2) > budget:
             messagebox.showerror("Ошибка", 
                                f"Общий гонорар ({total_fees + fee_value:.2f}) превышает бюджет фильма ({budget:.2f})!")
             return
         
-        c.execute("""
-            UPDATE shootings 
-            SET actor_id=?, movie_id=?, дата=?, сцена=?, гонорар=?
-            WHERE id=?
-        """, (actor_id, movie_id, date_text, scene, fee_value, shooting_id))
-        self.conn.commit()
+        if not self.confirm_conflicts(actor_id, movie_id, date_text, fee_value, shooting_id):
+            return
         
-        self.load_shootings()
-        self.load_schedule_data()
-        self.load_expenses_tab_data()
-        self.load_budget_tab_data()
+        self.shooting_repo.update(shooting_id, actor_id, movie_id, date_text, scene, fee_value)
+        
+        self.publish(RowChange("shootings", "update", shooting_id, old,
+                               Shooting(shooting_id, actor_id, movie_id, date_text, scene, fee_value)))
 
     def delete_shooting(self):
-        selected = self.shootings_tree.selection()
-        if not selected:
-            messagebox.showerror("Ошибка", "Выберите съёмку для удаления.")
+        self.delete_shootings(self.selected_shootings())
+
+    def selected_shootings(self):
+        return [self.shootings_tree.item(iid)['values'][0] for iid in self.shootings_tree.selection()]
+
+    def setup_bulk_frame(self, parent, selected_ids):
+        # Действия над всеми выделенными съёмками (Ctrl или Shift + щелчок):
+        # одна транзакция на всё выделение.
+        frame = ttk.LabelFrame(parent, text="Выделенные съёмки")
+        frame.pack(padx=10, fill="x")
+        
+        ttk.Label(frame, text="Сдвиг (дней):").pack(side='left', padx=5, pady=5)
+        days_entry = ttk.Entry(frame, width=6)
+        days_entry.pack(side='left', padx=5)
+        ttk.Button(frame, text="Перенести",
+                   command=lambda: self.reschedule_shootings(selected_ids(), days_entry.get())).pack(side='left', padx=5)
+        
+        ttk.Label(frame, text="Гонорар (+500, -10%):").pack(side='left', padx=5)
+        fee_entry = ttk.Entry(frame, width=8)
+        fee_entry.pack(side='left', padx=5)
+        ttk.Button(frame, text="Изменить гонорар",
+                   command=lambda: self.adjust_shooting_fees(selected_ids(), fee_entry.get())).pack(side='left', padx=5)
+        
+        ttk.Button(frame, text="Удалить выделенные",
+                   command=lambda: self.delete_shootings(selected_ids())).pack(side='left', padx=5)
+
+    def reschedule_shootings(self, shooting_ids, days_text):
+        if not shooting_ids:
+            messagebox.showerror("Ошибка", "Выделите съёмки для переноса.")
+            return
+        try:
+            days = int(days_text)
+        except ValueError:
+            messagebox.showerror("Ошибка", "Введите сдвиг в днях целым числом.")
             return
         
-        shooting_id = self.shootings_tree.item(selected[0])['values'][0]
+        try:
+            old_rows, new_rows = self.shooting_repo.reschedule_rows(shooting_ids, days)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", f"Съёмки не перенесены: {e}")
+            return
+        if not self.confirm_bulk_conflicts(old_rows, new_rows):
+            return
+        self.shooting_repo.update_many(old_rows, new_rows, ["date"])
+        self.publish_many("shootings", "update", old_rows, new_rows)
+
+    def adjust_shooting_fees(self, shooting_ids, change_text):
+        if not shooting_ids:
+            messagebox.showerror("Ошибка", "Выделите съёмки для изменения гонорара.")
+            return
+        try:
+            percent, amount = parse_fee_change(change_text)
+        except ValueError:
+            messagebox.showerror("Ошибка", "Введите изменение гонорара: сумму (+500, -500) или процент (10%, -10%).")
+            return
         
-        if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить эту запись о съёмке?"):
-            c = self.conn.cursor()
-            c.execute("DELETE FROM shootings WHERE id=?", (shooting_id,))
-            self.conn.commit()
-            
-            self.load_shootings()
-            self.load_schedule_data()
-            self.load_expenses_tab_data()
-            self.load_budget_tab_data()
+        try:
+            old_rows, new_rows = self.shooting_repo.adjust_fee_rows(shooting_ids, percent, amount)
+        except ValueError as e:
+            messagebox.showerror("Ошибка", f"Гонорары не изменены: {e}")
+            return
+        if not self.confirm_bulk_conflicts(old_rows, new_rows):
+            return
+        try:
+            self.shooting_repo.update_many(old_rows, new_rows, ["fee"])
+        except BudgetExceeded as e:
+            details = "\n".join(e.errors[:10])
+            messagebox.showerror("Ошибка", f"Гонорары не изменены, бюджет превышен:\n{details}")
+            return
+        self.publish_many("shootings", "update", old_rows, new_rows)
+
+    def delete_shootings(self, shooting_ids):
+        if not shooting_ids:
+            messagebox.showerror("Ошибка", "Выберите съёмку для удаления.")
+            return
+        
+        if len(shooting_ids) == 1:
+            question = "Вы уверены, что хотите удалить эту запись о съёмке?"
+        else:
+            question = f"Удалить выбранные съёмки ({len(shooting_ids)})?"
+        if messagebox.askyesno("Подтверждение", question):
+            old_rows = self.shooting_repo.delete_many(shooting_ids)
+            self.publish_many("shootings", "delete", old_rows, [])
 
     def setup_schedule_tab(self):
         filter_frame = ttk.Frame(self.tabs["schedule"])
@@ -727,12 +1511,24 @@ class FilmStudioApp:
         ttk.Label(filter_frame, text="Период:").pack(side='left', padx=5)
         
         self.schedule_period = tk.StringVar()
-        period_options = ["Все записи", "Сегодня", "Эта неделя", "Этот месяц", "Будущие"]
         period_menu = ttk.Combobox(filter_frame, textvariable=self.schedule_period, 
-                                 values=period_options, state="readonly")
+                                 values=repositories.SCHEDULE_PERIODS + [repositories.CUSTOM_PERIOD],
+                                 state="readonly")
         period_menu.pack(side='left', padx=5)
         period_menu.current(0)
-        period_menu.bind("<<ComboboxSelected>>", lambda e: self.load_schedule_data())
+        period_menu.bind("<<ComboboxSelected>>", lambda e: self.on_schedule_period())
+        
+        # Произвольный период: пустое поле - без границы с этой стороны.
+        self.schedule_range = (None, None)
+        ttk.Label(filter_frame, text="с").pack(side='left', padx=5)
+        self.schedule_start_entry = ttk.Entry(filter_frame, width=12)
+        self.schedule_start_entry.pack(side='left', padx=5)
+        ttk.Label(filter_frame, text="по").pack(side='left', padx=5)
+        self.schedule_end_entry = ttk.Entry(filter_frame, width=12)
+        self.schedule_end_entry.pack(side='left', padx=5)
+        ttk.Button(filter_frame, text="Применить", command=self.apply_schedule_range).pack(side='left', padx=5)
+        self.schedule_start_entry.bind("<Return>", lambda e: self.apply_schedule_range())
+        self.schedule_end_entry.bind("<Return>", lambda e: self.apply_schedule_range())
         
         tree_frame = ttk.Frame(self.tabs["schedule"])
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -741,10 +1537,10 @@ class FilmStudioApp:
                                         columns=("actor", "movie", "date", "scene"), 
                                         show="headings")
         
-        self.schedule_tree.heading("actor", text="Актёр", command=lambda: self.treeview_sort_column(self.schedule_tree, "actor", False))
-        self.schedule_tree.heading("movie", text="Фильм", command=lambda: self.treeview_sort_column(self.schedule_tree, "movie", False))
-        self.schedule_tree.heading("date", text="Дата", command=lambda: self.treeview_sort_column(self.schedule_tree, "date", False))
-        self.schedule_tree.heading("scene", text="Сцена", command=lambda: self.treeview_sort_column(self.schedule_tree, "scene", False))
+        self.schedule_tree.heading("actor", text="Актёр", command=lambda: self.treeview_sort_column(self.schedule_items, "actor"))
+        self.schedule_tree.heading("movie", text="Фильм", command=lambda: self.treeview_sort_column(self.schedule_items, "movie"))
+        self.schedule_tree.heading("date", text="Дата", command=lambda: self.treeview_sort_column(self.schedule_items, "date"))
+        self.schedule_tree.heading("scene", text="Сцена", command=lambda: self.treeview_sort_column(self.schedule_items, "scene"))
         
         self.schedule_tree.column("actor", width=150)
         self.schedule_tree.column("movie", width=150)
@@ -756,43 +1552,214 @@ class FilmStudioApp:
         self.schedule_tree.configure(yscrollcommand=scrollbar.set)
         
         self.schedule_tree.pack(fill="both", expand=True)
+        self.schedule_tree.bind("<Control-a>", lambda e: self.schedule_tree.selection_set(*self.schedule_tree.get_children()))
+        self.schedule_items = IncrementalTree(self.schedule_tree, ["actor", "movie", "date", "scene"])
+        self.setup_bulk_frame(self.tabs["schedule"], lambda: self.schedule_items.keys(self.schedule_tree.selection()))
+        
+        self.subscribe("shootings", self.apply_schedule_change)
+        self.subscribe("actors", self.apply_schedule_change)
+        self.subscribe("movies", self.apply_schedule_change)
+        self.load_schedule_data()
+
+    def schedule_period_range(self):
+        period = self.schedule_period.get()
+        if period == repositories.CUSTOM_PERIOD:
+            return self.schedule_range
+        return repositories.period_range(period)
+
+    def on_schedule_period(self):
+        if self.schedule_period.get() == repositories.CUSTOM_PERIOD:
+            self.apply_schedule_range()
+        else:
+            self.load_schedule_data()
+
+    def apply_schedule_range(self):
+        bounds = []
+        for entry in (self.schedule_start_entry, self.schedule_end_entry):
+            text = entry.get().strip()
+            if not text:
+                bounds.append(None)
+                continue
+            try:
+                bounds.append(date.fromisoformat(database.normalize_date(text)))
+            except ValueError:
+                messagebox.showerror("Ошибка", "Введите дату в формате ГГГГ-ММ-ДД.")
+                return
+        
+        start, end = bounds
+        if start is not None and end is not None and start > end:
+            messagebox.showerror("Ошибка", "Начало периода позже его конца.")
+            return
         
+        self.schedule_range = (start, end)
+        self.schedule_period.set(repositories.CUSTOM_PERIOD)
         self.load_schedule_data()
 
     def load_schedule_data(self):
-        for row in self.schedule_tree.get_children():
-            self.schedule_tree.delete(row)
+        start, end = self.schedule_period_range()
+        self.load_report("schedule", repositories.load_schedule, start, end, on_done=self.show_schedule_data)
+
+    def show_schedule_data(self, rows):
+        self.schedule_items.reset((row.id, row.date, row[1:], ()) for row in rows)
+
+    def apply_schedule_change(self, change):
+        if change.op == "reload":
+            return
+        if "schedule" in self.pending:
+            self.load_schedule_data()
+            return
         
-        period = self.schedule_period.get()
-        today = datetime.now().date()
-        
-        query = """
-            SELECT a.fio, m.название, s.дата, s.сцена
-            FROM shootings s
-            JOIN actors a ON s.actor_id = a.id
-            JOIN movies m ON s.movie_id = m.id
-        """
-        
-        if period == "Сегодня":
-            query += f" WHERE s.дата = '{today}'"
-        elif period == "Эта неделя":
-            start_week = today - timedelta(days=today.weekday())
-            end_week = start_week + timedelta(days=6)
-            query += f" WHERE s.дата BETWEEN '{start_week}' AND '{end_week}'"
-        elif period == "Этот месяц":
-            first_day = today.replace(day=1)
-            last_day = (today.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
-            query += f" WHERE s.дата BETWEEN '{first_day}' AND '{last_day}'"
-        elif period == "Будущие":
-            query += f" WHERE s.дата >= '{today}'"
-        
-        query += " ORDER BY s.дата"
-        
-        c = self.conn.cursor()
-        c.execute(query)
-        
-        for row in c.fetchall():
-            self.schedule_tree.insert("", "end", values=row)
+        if change.table != "shootings":
+            if change.op == "update":
+                start, end = self.schedule_period_range()
+                owner = {"actor_id" if change.table == "actors" else "movie_id": change.key}
+                for row in self.reports.schedule_for(start, end, **owner):
+                    if row.id in self.schedule_items.items:
+                        self.schedule_items.upsert(row.id, row.date, row[1:])
+            return
+        
+        if change.op == "delete":
+            self.schedule_items.remove(change.key)
+        else:
+            self.refresh_schedule_row(change.key)
+
+    def refresh_schedule_row(self, shooting_id):
+        start, end = self.schedule_period_range()
+        row = self.reports.schedule_row(shooting_id, start, end)
+        
+        if row is None:
+            self.schedule_items.remove(shooting_id)
+        else:
+            self.schedule_items.upsert(shooting_id, row.date, row[1:])
+
+    def setup_calendar_tab(self):
+        nav_frame = ttk.Frame(self.tabs["calendar"])
+        nav_frame.pack(padx=10, pady=10, fill='x')
+        
+        ttk.Label(nav_frame, text="Окно:").pack(side='left', padx=5)
+        self.calendar_view = tk.StringVar()
+        view_menu = ttk.Combobox(nav_frame, textvariable=self.calendar_view,
+                                 values=repositories.CALENDAR_VIEWS, state="readonly", width=10)
+        view_menu.pack(side='left', padx=5)
+        view_menu.current(0)
+        view_menu.bind("<<ComboboxSelected>>", lambda e: self.load_calendar_data())
+        
+        ttk.Label(nav_frame, text="Вид:").pack(side='left', padx=5)
+        self.calendar_layout = tk.StringVar()
+        layout_menu = ttk.Combobox(nav_frame, textvariable=self.calendar_layout,
+                                   values=["Календарь"] + list(repositories.TIMELINE_GROUPS),
+                                   state="readonly", width=12)
+        layout_menu.pack(side='left', padx=5)
+        layout_menu.current(0)
+        layout_menu.bind("<<ComboboxSelected>>", lambda e: self.load_calendar_data())
+        
+        ttk.Button(nav_frame, text="◀", width=3, command=lambda: self.move_calendar(-1)).pack(side='left', padx=5)
+        ttk.Button(nav_frame, text="Сегодня", command=lambda: self.move_calendar(0)).pack(side='left', padx=5)
+        ttk.Button(nav_frame, text="▶", width=3, command=lambda: self.move_calendar(1)).pack(side='left', padx=5)
+        self.calendar_title = ttk.Label(nav_frame, text="")
+        self.calendar_title.pack(side='left', padx=10)
+        
+        tree_frame = ttk.Frame(self.tabs["calendar"])
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # Столбцы меняются вместе с видом: дни недели или дни окна.
+        self.calendar_tree = ttk.Treeview(tree_frame, show="headings")
+        
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.calendar_tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        xscrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.calendar_tree.xview)
+        xscrollbar.pack(side="bottom", fill="x")
+        self.calendar_tree.configure(yscrollcommand=scrollbar.set, xscrollcommand=xscrollbar.set)
+        
+        self.calendar_tree.pack(fill="both", expand=True)
+        self.calendar_anchor = date.today()
+        
+        self.subscribe("shootings", self.apply_calendar_change)
+        self.subscribe("actors", self.apply_calendar_change)
+        self.subscribe("movies", self.apply_calendar_change)
+        self.load_calendar_data()
+
+    def calendar_window(self):
+        return repositories.calendar_window(self.calendar_view.get(), self.calendar_anchor)
+
+    def move_calendar(self, step):
+        # step 0 - вернуться к сегодняшнему дню.
+        if step:
+            self.calendar_anchor = repositories.shift_window(self.calendar_view.get(), self.calendar_anchor, step)
+        else:
+            self.calendar_anchor = date.today()
+        self.load_calendar_data()
+
+    def load_calendar_data(self):
+        # Загружается только окно на экране; соседние окна, которые уже
+        # открывались, берутся из кэша отчётов.
+        start, end = self.calendar_window()
+        self.calendar_title.config(text=f"{start:%d.%m.%Y} - {end:%d.%m.%Y}")
+        group = repositories.TIMELINE_GROUPS.get(self.calendar_layout.get())
+        if group is None:
+            self.load_report("calendar", repositories.load_calendar, start, end, self.query_cache,
+                             on_done=lambda rows: self.show_calendar(start, end, rows))
+        else:
+            self.load_report("calendar", repositories.load_timeline, group, start, end, self.query_cache,
+                             on_done=lambda rows: self.show_timeline(group, start, end, rows))
+
+    def show_calendar(self, start, end, rows):
+        # Строка - неделя с понедельника; в ячейке число месяца, съёмки и гонорары за день.
+        totals = {row.day: row for row in rows}
+        weekdays = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+        set_columns(self.calendar_tree, [(f"d{i}", name, 130) for i, name in enumerate(weekdays)])
+        
+        first = start.toordinal() - start.weekday()
+        for week in range(first, end.toordinal() + 1, 7):
+            values = []
+            for ordinal in range(week, week + 7):
+                day = date.fromordinal(ordinal)
+                if not start <= day <= end:
+                    values.append("")
+                elif ordinal in totals:
+                    values.append(f"{day.day}: {totals[ordinal].count} / {totals[ordinal].fees:.0f}")
+                else:
+                    values.append(str(day.day))
+            self.calendar_tree.insert("", "end", iid=week, values=values)
+
+    def show_timeline(self, group, start, end, rows):
+        # Диаграмма: строка - актёр или фильм, столбец - день окна, в ячейке
+        # число съёмок за день; последний столбец - всего за окно.
+        days = range(start.toordinal(), end.toordinal() + 1)
+        name_title = "Актёр" if group == "actors" else "Фильм"
+        columns = [("name", name_title, 180)]
+        columns += [(f"d{ordinal}", date.fromordinal(ordinal).strftime("%d.%m"), 45) for ordinal in days]
+        columns.append(("total", "Всего", 60))
+        set_columns(self.calendar_tree, columns)
+        self.calendar_tree.column("name", anchor="w")
+        
+        names = {}
+        counts = {}
+        for row in rows:
+            names[row.key] = row.name
+            counts.setdefault(row.key, {})[row.day] = row.count
+        for key in sorted(names, key=lambda key: database.ru_key(names[key])):
+            by_day = counts[key]
+            cells = [f"■ {by_day[ordinal]}" if ordinal in by_day else "" for ordinal in days]
+            self.calendar_tree.insert("", "end", iid=key, values=[names[key]] + cells + [sum(by_day.values())])
+
+    def apply_calendar_change(self, change):
+        # Окно перечитывается, если изменение его касается: съёмка в днях
+        # окна или, на диаграмме, имя актёра или фильма.
+        if change.op == "reload":
+            return
+        if "calendar" in self.pending:
+            self.load_calendar_data()
+            return
+        
+        start, end = self.calendar_window()
+        if change.table == "shootings":
+            affected = any(start.isoformat() <= row.date <= end.isoformat()
+                           for row in (change.old, change.new) if row)
+        else:
+            affected = repositories.TIMELINE_GROUPS.get(self.calendar_layout.get()) == change.table
+        if affected:
+            self.load_calendar_data()
 
     def setup_expenses_tab(self):
         main_frame = ttk.Frame(self.tabs["expenses"])
@@ -817,8 +1784,8 @@ class FilmStudioApp:
                                         columns=("actor", "total_fee"), 
                                         show="headings")
         
-        self.expenses_tree.heading("actor", text="Актёр", command=lambda: self.treeview_sort_column(self.expenses_tree, "actor", False))
-        self.expenses_tree.heading("total_fee", text="Общие затраты", command=lambda: self.treeview_sort_column(self.expenses_tree, "total_fee", False))
+        self.expenses_tree.heading("actor", text="Актёр", command=lambda: self.treeview_sort_column(self.expenses_items, "actor"))
+        self.expenses_tree.heading("total_fee", text="Общие затраты", command=lambda: self.treeview_sort_column(self.expenses_items, "total_fee"))
         
         self.expenses_tree.column("actor", width=200)
         self.expenses_tree.column("total_fee", width=150, anchor="e")
@@ -828,31 +1795,51 @@ class FilmStudioApp:
         self.expenses_tree.configure(yscrollcommand=scrollbar.set)
         
         self.expenses_tree.pack(fill="both", expand=True)
+        self.expenses_items = IncrementalTree(self.expenses_tree, ["actor", "total_fee"],
+                                              lambda values: (values[0], f"{values[1]:.2f}"))
+        self.expense_fees = {}
         
+        self.subscribe("shootings", self.apply_expenses_change)
+        self.subscribe("actors", self.apply_expenses_change)
         self.load_expenses_tab_data()
 
     def load_expenses_tab_data(self):
-        for row in self.expenses_tree.get_children():
-            self.expenses_tree.delete(row)
-        
-        c = self.conn.cursor()
-        
-        c.execute("""
-            SELECT a.fio, IFNULL(SUM(s.гонорар), 0) as total_fee
-            FROM actors a
-            LEFT JOIN shootings s ON a.id = s.actor_id
-            GROUP BY a.id
-            ORDER BY a.fio
-        """)
+        self.load_report("expenses", repositories.load_actor_expenses, self.query_cache,
+                         on_done=self.show_expenses_data)
+
+    def show_expenses_data(self, rows):
+        self.expense_fees = {actor_id: fee for actor_id, actor, fee in rows}
+        self.expenses_items.reset((actor_id, actor, (actor, fee), ()) for actor_id, actor, fee in rows)
+        self.update_expenses_stats()
+
+    def apply_expenses_change(self, change):
+        if change.op == "reload":
+            return
+        if "expenses" in self.pending:
+            self.load_expenses_tab_data()
+            return
         
-        total_expenses = 0
-        actor_count = 0
+        if change.table == "actors":
+            actor_ids = {change.key}
+        else:
+            actor_ids = {row.actor_id for row in (change.old, change.new) if row}
         
-        for row in c.fetchall():
-            actor, fee = row
-            self.expenses_tree.insert("", "end", values=(actor, f"{fee:.2f}"))
-            total_expenses += fee
-            actor_count += 1
+        for actor_id in actor_ids:
+            row = self.reports.actor_expense(actor_id)
+            
+            if row is None:
+                self.expense_fees.pop(actor_id, None)
+                self.expenses_items.remove(actor_id)
+            else:
+                _, actor, fee = row
+                self.expense_fees[actor_id] = fee
+                self.expenses_items.upsert(actor_id, actor, (actor, fee))
+        
+        self.update_expenses_stats()
+
+    def update_expenses_stats(self):
+        actor_count = len(self.expense_fees)
+        total_expenses = sum(self.expense_fees.values())
         
         self.total_actors_label.config(text=f"Всего актёров: {actor_count}")
         self.total_expenses_label.config(text=f"Общие затраты: {total_expenses:.2f}")
@@ -879,22 +1866,31 @@ class FilmStudioApp:
         self.remaining_label = ttk.Label(stats_frame, text="Общий остаток: 0.00")
         self.remaining_label.pack(side="left", padx=10)
         
+        self.overrun_label = ttk.Label(stats_frame, text="Прогноз перерасхода: 0")
+        self.overrun_label.pack(side="left", padx=10)
+        
         tree_frame = ttk.Frame(main_frame)
         tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
         self.budget_tree = ttk.Treeview(tree_frame, 
-                                      columns=("movie", "budget", "spent", "remaining"), 
+                                      columns=("movie", "budget", "spent", "remaining", "scheduled", "burn_rate", "projected"), 
                                       show="headings")
         
-        self.budget_tree.heading("movie", text="Фильм", command=lambda: self.treeview_sort_column(self.budget_tree, "movie", False))
-        self.budget_tree.heading("budget", text="Бюджет", command=lambda: self.treeview_sort_column(self.budget_tree, "budget", False))
-        self.budget_tree.heading("spent", text="Потрачено", command=lambda: self.treeview_sort_column(self.budget_tree, "spent", False))
-        self.budget_tree.heading("remaining", text="Остаток", command=lambda: self.treeview_sort_column(self.budget_tree, "remaining", False))
+        self.budget_tree.heading("movie", text="Фильм", command=lambda: self.treeview_sort_column(self.budget_items, "movie"))
+        self.budget_tree.heading("budget", text="Бюджет", command=lambda: self.treeview_sort_column(self.budget_items, "budget"))
+        self.budget_tree.heading("spent", text="Потрачено", command=lambda: self.treeview_sort_column(self.budget_items, "spent"))
+        self.budget_tree.heading("remaining", text="Остаток", command=lambda: self.treeview_sort_column(self.budget_items, "remaining"))
+        self.budget_tree.heading("scheduled", text="Запланировано", command=lambda: self.treeview_sort_column(self.budget_items, "scheduled"))
+        self.budget_tree.heading("burn_rate", text="Расход в день", command=lambda: self.treeview_sort_column(self.budget_items, "burn_rate"))
+        self.budget_tree.heading("projected", text="Прогноз", command=lambda: self.treeview_sort_column(self.budget_items, "projected"))
         
         self.budget_tree.column("movie", width=200)
         self.budget_tree.column("budget", width=120, anchor="e")
         self.budget_tree.column("spent", width=120, anchor="e")
         self.budget_tree.column("remaining", width=120, anchor="e")
+        self.budget_tree.column("scheduled", width=120, anchor="e")
+        self.budget_tree.column("burn_rate", width=110, anchor="e")
+        self.budget_tree.column("projected", width=120, anchor="e")
         
         self.budget_tree.tag_configure('positive', foreground='green')
         self.budget_tree.tag_configure('negative', foreground='red')
@@ -904,48 +1900,249 @@ class FilmStudioApp:
         self.budget_tree.configure(yscrollcommand=scrollbar.set)
         
         self.budget_tree.pack(fill="both", expand=True)
+        self.budget_items = IncrementalTree(self.budget_tree, ["movie", "budget", "spent", "remaining", "scheduled",
+                                                              "burn_rate", "projected"],
+                                            lambda values: (values[0], *(f"{value:.2f}" for value in values[1:])))
+        self.budget_totals = {}
         
+        self.subscribe("shootings", self.apply_budget_change)
+        self.subscribe("movies", self.apply_budget_change)
         self.load_budget_tab_data()
 
+    def budget_row(self, row):
+        # Фильм помечается, если затраты уже или по прогнозу превышают бюджет.
+        remaining = row.budget - row.spent
+        overrun = remaining < 0 or round(row.projected, 2) > row.budget
+        tag = 'negative' if overrun else 'positive'
+        return (row.movie_id, row.movie,
+                (row.movie, row.budget, row.spent, remaining, row.scheduled, row.burn_rate, row.projected), (tag,))
+
     def load_budget_tab_data(self):
-        for row in self.budget_tree.get_children():
-            self.budget_tree.delete(row)
-        
-        c = self.conn.cursor()
-        
-        c.execute("""
-            SELECT 
-                m.название, 
-                m.бюджет, 
-                IFNULL(SUM(s.гонорар), 0) as spent,
-                m.бюджет - IFNULL(SUM(s.гонорар), 0) as remaining
-            FROM movies m
-            LEFT JOIN shootings s ON m.id = s.movie_id
-            GROUP BY m.id
-            ORDER BY m.название
-        """)
-        
-        total_movies = 0
-        total_budget = 0
-        total_spent = 0
-        total_remaining = 0
-        
-        for row in c.fetchall():
-            movie, budget, spent, remaining = row
-            tag = 'positive' if remaining >= 0 else 'negative'
-            self.budget_tree.insert("", "end", 
-                                   values=(movie, f"{budget:.2f}", f"{spent:.2f}", f"{remaining:.2f}"), 
-                                   tags=(tag,))
+        self.load_report("budget", repositories.load_movie_budgets, self.query_cache, date.today(),
+                         on_done=self.show_budget_data)
+
+    def show_budget_data(self, rows):
+        self.budget_totals = {row.movie_id: row for row in rows}
+        self.budget_items.reset(self.budget_row(row) for row in rows)
+        self.update_budget_stats()
+
+    def apply_budget_change(self, change):
+        if change.op == "reload":
+            return
+        if "budget" in self.pending:
+            self.load_budget_tab_data()
+            return
+        
+        if change.table == "movies":
+            movie_ids = {change.key}
+        else:
+            movie_ids = {row.movie_id for row in (change.old, change.new) if row}
+        
+        # Прогноз пересчитывается только для затронутых фильмов.
+        for movie_id in movie_ids:
+            row = self.reports.movie_budget(movie_id)
             
-            total_movies += 1
-            total_budget += budget
-            total_spent += spent
-            total_remaining += remaining
+            if row is None:
+                self.budget_totals.pop(movie_id, None)
+                self.budget_items.remove(movie_id)
+            else:
+                self.budget_totals[movie_id] = row
+                key, sort_key, values, tags = self.budget_row(row)
+                self.budget_items.upsert(key, sort_key, values, tags)
+        
+        self.update_budget_stats()
+
+    def update_budget_stats(self):
+        total_movies = len(self.budget_totals)
+        total_budget = sum(row.budget for row in self.budget_totals.values())
+        total_remaining = sum(row.budget - row.spent for row in self.budget_totals.values())
+        overruns = sum(1 for row in self.budget_totals.values() if round(row.projected, 2) > row.budget)
         
         self.total_movies_label.config(text=f"Всего фильмов: {total_movies}")
         self.total_budget_label.config(text=f"Общий бюджет: {total_budget:.2f}")
         self.avg_budget_label.config(text=f"Средний бюджет: {total_budget/total_movies:.2f}" if total_movies > 0 else "Средний бюджет: 0.00")
         self.remaining_label.config(text=f"Общий остаток: {total_remaining:.2f}")
+        self.overrun_label.config(text=f"Прогноз перерасхода: {overruns}")
+
+    def setup_analytics_tab(self):
+        control_frame = ttk.Frame(self.tabs["analytics"])
+        control_frame.pack(padx=10, pady=10, fill='x')
+        
+        ttk.Label(control_frame, text="Отчёт:").pack(side='left', padx=5)
+        self.analytics_view = tk.StringVar()
+        view_menu = ttk.Combobox(control_frame, textvariable=self.analytics_view, values=ANALYTICS_VIEWS,
+                                 state="readonly", width=24)
+        view_menu.pack(side='left', padx=5)
+        view_menu.current(0)
+        view_menu.bind("<<ComboboxSelected>>", lambda e: self.show_analytics_view())
+        
+        ttk.Label(control_frame, text="Топ:").pack(side='left', padx=5)
+        self.analytics_top = tk.StringVar(value="10")
+        ttk.Spinbox(control_frame, from_=1, to=1000, width=5, textvariable=self.analytics_top,
+                    command=self.show_analytics_view).pack(side='left', padx=5)
+        
+        ttk.Label(control_frame, text="Фильм:").pack(side='left', padx=5)
+        self.analytics_movie_cb = ttk.Combobox(control_frame, state="readonly", width=25)
+        self.analytics_movie_cb.pack(side='left', padx=5)
+        self.analytics_movie_cb.bind("<<ComboboxSelected>>", lambda e: self.show_analytics_view())
+        
+        ttk.Button(control_frame, text="Обновить", command=self.load_analytics_data).pack(side='left', padx=5)
+        
+        self.analytics_status = ttk.Label(self.tabs["analytics"], text="")
+        self.analytics_status.pack(side="bottom", fill="x", padx=10, pady=5)
+        
+        tree_frame = ttk.Frame(self.tabs["analytics"])
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        self.analytics_tree = ttk.Treeview(tree_frame, show="headings")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.analytics_tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        xscrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.analytics_tree.xview)
+        xscrollbar.pack(side="bottom", fill="x")
+        self.analytics_tree.configure(yscrollcommand=scrollbar.set, xscrollcommand=xscrollbar.set)
+        self.analytics_tree.pack(fill="both", expand=True)
+        
+        # Столбцы последней загрузки: смена отчёта или топа считается по ним
+        # без обращения к базе.
+        self.analytics_report = None
+        self.load_analytics_data()
+
+    def load_analytics_data(self):
+        self.load_report("analytics", analytics.load_report, on_done=self.show_analytics)
+
+    def show_analytics(self, report):
+        self.analytics_report = report
+        columns = report.columns
+        self.analytics_movie_cb['values'] = [f"{movie_id} - {title}"
+                                             for movie_id, title in columns.movie_names.items()]
+        self.analytics_status.config(text=f"Строк в памяти: {len(columns)}, загрузка {report.load_ms:.0f} мс, "
+                                          f"расчёт {report.compute_ms:.0f} мс")
+        self.show_analytics_view()
+
+    def show_analytics_view(self):
+        report = self.analytics_report
+        if report is None:
+            return
+        
+        view = self.analytics_view.get()
+        if view == "Актёры по месяцам":
+            self.show_pivot("Актёр", report.actor_months, str)
+        elif view == "Фильмы по неделям":
+            self.show_pivot("Фильм", report.movie_weeks, lambda week: f"{week:%d.%m.%y}")
+        elif view == "Топ актёров":
+            self.show_ranking("Актёр", report.top_actors)
+        elif view == "Топ фильмов":
+            self.show_ranking("Фильм", report.top_movies)
+        else:
+            self.load_burn_down()
+
+    def show_pivot(self, title, table, label):
+        columns = [("name", title, 180)]
+        columns += [(f"b{index}", label(bucket), 80) for index, bucket in enumerate(table.buckets)]
+        columns.append(("total", "Всего", 100))
+        set_columns(self.analytics_tree, columns)
+        self.analytics_tree.column("name", anchor="w")
+        
+        for row in table.rows:
+            cells = [f"{fee:.0f}" if fee else "" for fee in row.fees]
+            self.analytics_tree.insert("", "end", values=[row.name] + cells + [f"{row.total:.2f}"])
+
+    def show_ranking(self, title, rows):
+        try:
+            top = max(1, int(self.analytics_top.get()))
+        except ValueError:
+            top = 10
+        set_columns(self.analytics_tree, [("place", "Место", 60), ("name", title, 200),
+                                          ("count", "Съёмок", 80), ("fees", "Гонорары", 120)])
+        self.analytics_tree.column("name", anchor="w")
+        for place, row in enumerate(rows[:top], start=1):
+            self.analytics_tree.insert("", "end", values=(place, row.name, row.count, f"{row.fees:.2f}"))
+
+    def load_burn_down(self):
+        set_columns(self.analytics_tree, [("day", "День", 100), ("spent", "Затрачено", 120),
+                                          ("remaining", "Остаток бюджета", 140)])
+        movie_text = self.analytics_movie_cb.get()
+        if not movie_text:
+            return
+        movie_id = int(movie_text.split(" - ")[0])
+        self.run_in_background("analytics:burn", analytics.load_burn_down, self.analytics_report.columns, movie_id,
+                               on_done=self.show_burn_down)
+
+    def show_burn_down(self, rows):
+        if self.analytics_view.get() != "Расход бюджета фильма":
+            return
+        for row in rows:
+            self.analytics_tree.insert("", "end", values=(f"{row.day:%d.%m.%Y}", f"{row.spent:.2f}",
+                                                          f"{row.remaining:.2f}"))
+
+    def setup_search_tab(self):
+        search_frame = ttk.Frame(self.tabs["search"])
+        search_frame.pack(padx=10, pady=10, fill="x")
+        
+        ttk.Label(search_frame, text="Актёры, фильмы и сцены:").pack(side="left", padx=5)
+        self.search_entry = ttk.Entry(search_frame, width=40)
+        self.search_entry.pack(side="left", padx=5, fill="x", expand=True)
+        self.search_entry.bind("<Return>", lambda e: self.search_all())
+        ttk.Button(search_frame, text="Найти", command=self.search_all).pack(side="left", padx=5)
+        
+        tree_frame = ttk.Frame(self.tabs["search"])
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        self.search_tree = ttk.Treeview(tree_frame, columns=("kind", "title", "detail"), show="headings")
+        self.search_tree.heading("kind", text="Тип")
+        self.search_tree.heading("title", text="Найдено")
+        self.search_tree.heading("detail", text="Подробности")
+        
+        self.search_tree.column("kind", width=80)
+        self.search_tree.column("title", width=250)
+        self.search_tree.column("detail", width=400)
+        
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.search_tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.search_tree.configure(yscrollcommand=scrollbar.set)
+        
+        self.search_tree.pack(fill="both", expand=True)
+        self.search_tree.bind("<Double-1>", self.open_search_hit)
+        self.search_tree.bind("<Return>", self.open_search_hit)
+        
+        self.search_status = ttk.Label(self.tabs["search"], text="Двойной щелчок открывает запись на её вкладке.")
+        self.search_status.pack(pady=5)
+
+    def search_all(self):
+        search_text = self.search_entry.get().strip()
+        if not search.words(search_text):
+            self.show_search_results([])
+            return
+        
+        self.run_in_background("search", search.search_all, search_text, on_done=self.show_search_results,
+                               error_text="Не удалось выполнить поиск")
+
+    def show_search_results(self, hits):
+        self.search_tree.delete(*self.search_tree.get_children())
+        for hit in hits:
+            self.search_tree.insert("", "end", iid=f"{hit.kind}:{hit.id}",
+                                    values=(search.KINDS[hit.kind], hit.title or "", hit.detail))
+        self.search_status.config(text=f"Найдено: {len(hits)}. Двойной щелчок открывает запись на её вкладке.")
+
+    def open_search_hit(self, event):
+        selected = self.search_tree.selection()
+        if not selected:
+            return
+        
+        kind, row_id = selected[0].split(":")
+        self.ensure_tab(kind)
+        if kind == "actors":
+            self.load_actors()
+            view = self.actors_view
+        elif kind == "movies":
+            self.load_movies()
+            view = self.movies_view
+        else:
+            view = self.shootings_view
+        
+        self.notebook.select(self.tabs[kind])
+        if not view.locate(int(row_id)):
+            messagebox.showerror("Ошибка", "Запись не найдена: возможно, она уже удалена.")
 
     def setup_export_tab(self):
         frame = ttk.Frame(self.tabs["export"])
@@ -962,69 +2159,344 @@ class FilmStudioApp:
         
         ttk.Button(btn_frame, text="Экспорт всех данных", command=self.export_all_data).grid(row=1, column=0, columnspan=3, pady=10)
         
+        options_frame = ttk.Frame(frame)
+        options_frame.pack()
+        
+        ttk.Label(options_frame, text="Строк за один запрос:").pack(side="left", padx=5)
+        self.export_batch_size = tk.IntVar(value=exporter.DEFAULT_BATCH_SIZE)
+        ttk.Spinbox(options_frame, from_=100, to=100000, increment=1000, width=10,
+                    textvariable=self.export_batch_size).pack(side="left", padx=5)
+        self.export_archive = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Упаковать в zip-архив",
+                        variable=self.export_archive).pack(side="left", padx=5)
+        ttk.Button(options_frame, text="Отмена", command=self.cancel_export).pack(side="left", padx=5)
+        
+        self.export_progress = ttk.Progressbar(frame, length=400, maximum=100)
+        self.export_progress.pack(pady=10)
+        self.export_cancelled = threading.Event()
+        
         self.export_status = ttk.Label(frame, text="")
         self.export_status.pack(pady=10)
+        
+        ttk.Label(frame, text="Импорт данных", font=('Arial', 12, 'bold')).pack(pady=10)
+        
+        import_frame = ttk.Frame(frame)
+        import_frame.pack(pady=10)
+        
+        ttk.Button(import_frame, text="Импорт актёров", command=lambda: self.import_data("actors")).grid(row=0, column=0, padx=10, pady=5)
+        ttk.Button(import_frame, text="Импорт фильмов", command=lambda: self.import_data("movies")).grid(row=0, column=1, padx=10, pady=5)
+        ttk.Button(import_frame, text="Импорт съёмок", command=lambda: self.import_data("shootings")).grid(row=0, column=2, padx=10, pady=5)
+        
+        self.import_status = ttk.Label(frame, text="")
+        self.import_status.pack(pady=10)
+        
+        ttk.Label(frame, text="Планирование съёмок", font=('Arial', 12, 'bold')).pack(pady=10)
+        
+        # Сцены без даты читаются из CSV (scheduler.SCENE_COLUMNS) и
+        # расставляются по дням периода; пустые поля - завтра и
+        # scheduler.DEFAULT_HORIZON_DAYS дней от начала.
+        period_frame = ttk.Frame(frame)
+        period_frame.pack(pady=5)
+        
+        ttk.Label(period_frame, text="Период с").pack(side="left", padx=5)
+        self.plan_start_entry = ttk.Entry(period_frame, width=12)
+        self.plan_start_entry.pack(side="left", padx=5)
+        ttk.Label(period_frame, text="по").pack(side="left", padx=5)
+        self.plan_end_entry = ttk.Entry(period_frame, width=12)
+        self.plan_end_entry.pack(side="left", padx=5)
+        self.plan_weekends = tk.BooleanVar(value=True)
+        ttk.Checkbutton(period_frame, text="Снимать в выходные", variable=self.plan_weekends).pack(side="left", padx=5)
+        
+        plan_frame = ttk.Frame(frame)
+        plan_frame.pack(pady=5)
+        
+        ttk.Label(plan_frame, text="Цель:").pack(side="left", padx=5)
+        self.plan_objective = tk.StringVar(value=next(iter(scheduler.OBJECTIVES)))
+        ttk.Combobox(plan_frame, textvariable=self.plan_objective, values=list(scheduler.OBJECTIVES),
+                     state="readonly", width=22).pack(side="left", padx=5)
+        ttk.Label(plan_frame, text="Время поиска, с:").pack(side="left", padx=5)
+        self.plan_time_budget = tk.DoubleVar(value=scheduler.DEFAULT_TIME_BUDGET)
+        ttk.Spinbox(plan_frame, from_=0.5, to=60, increment=0.5, width=6,
+                    textvariable=self.plan_time_budget).pack(side="left", padx=5)
+        ttk.Button(plan_frame, text="Спланировать из CSV", command=self.plan_shootings).pack(side="left", padx=5)
+        
+        self.plan_status = ttk.Label(frame, text="")
+        self.plan_status.pack(pady=10)
+
+    def plan_window(self):
+        bounds = []
+        for entry in (self.plan_start_entry, self.plan_end_entry):
+            text = entry.get().strip()
+            bounds.append(date.fromisoformat(database.normalize_date(text)) if text else None)
+        start, end = bounds
+        start = start or date.today() + timedelta(days=1)
+        end = end or start + timedelta(days=scheduler.DEFAULT_HORIZON_DAYS - 1)
+        return start, end
+
+    def plan_shootings(self):
+        try:
+            start, end = self.plan_window()
+        except ValueError:
+            messagebox.showerror("Ошибка", "Введите даты в формате ГГГГ-ММ-ДД.")
+            return
+        if end < start:
+            messagebox.showerror("Ошибка", "Конец периода раньше начала.")
+            return
+        try:
+            time_budget = self.plan_time_budget.get()
+            if time_budget <= 0:
+                raise ValueError("Время поиска должно быть положительным")
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Ошибка", "Введите время поиска в секундах (положительное число).")
+            return
+        
+        filename = filedialog.askopenfilename(
+            title="Выберите CSV-файл со сценами",
+            filetypes=[("CSV файлы", "*.csv"), ("Все файлы", "*.*")]
+        )
+        if not filename:
+            return
+        
+        self.plan_status.config(text="Планирование...")
+        self.run_in_background("plan", scheduler.load_plan, filename, scheduler.OBJECTIVES[self.plan_objective.get()],
+                               start, end, self.plan_weekends.get(), time_budget,
+                               on_done=self.show_plan, on_error=self.show_plan_error)
+
+    def show_plan_error(self, error):
+        self.plan_status.config(text="План не составлен")
+        if isinstance(error, importer.ImportFailed):
+            messagebox.showerror("Ошибка", "Файл содержит ошибки:\n" + "\n".join(error.errors))
+        else:
+            messagebox.showerror("Ошибка", f"Не удалось составить план: {error}")
+
+    def show_plan(self, plan):
+        summary = (f"Расставлено сцен: {len(plan.placements)}, не расставлено: {len(plan.unplaced)}, "
+                   f"новых смен актёров: {plan.actor_days} ({plan.day_cost:.2f}), дней съёмок: {plan.span}. "
+                   f"Проходов поиска: {plan.attempts}, {plan.elapsed_ms:.0f} мс")
+        self.plan_status.config(text=summary)
+        
+        # Предпросмотр: в базу план записывается только по кнопке.
+        window = tk.Toplevel(self.master)
+        window.title("План съёмок")
+        window.geometry("900x500")
+        ttk.Label(window, text=summary, wraplength=860).pack(padx=10, pady=10, anchor="w")
+        
+        tree_frame = ttk.Frame(window)
+        tree_frame.pack(fill="both", expand=True, padx=10)
+        tree = ttk.Treeview(tree_frame, show="headings")
+        set_columns(tree, [("date", "Дата", 100), ("actor", "Актёр", 160), ("movie", "Фильм", 160),
+                           ("scene", "Сцена", 200), ("fee", "Гонорар", 100), ("note", "Примечание", 200)])
+        for column in ("actor", "movie", "scene", "note"):
+            tree.column(column, anchor="w")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(fill="both", expand=True)
+        
+        for scene, day in plan.placements:
+            tree.insert("", "end", values=(f"{date.fromordinal(day):%d.%m.%Y}", scene.actor, scene.movie, scene.scene,
+                                           f"{scene.fee:.2f}", ""))
+        for scene, reason in plan.unplaced:
+            tree.insert("", "end", values=("", scene.actor, scene.movie, scene.scene, f"{scene.fee:.2f}", reason))
+        
+        button_frame = ttk.Frame(window)
+        button_frame.pack(pady=10)
+        commit_button = ttk.Button(button_frame, text="Записать в базу", command=lambda: self.commit_plan(plan, window))
+        commit_button.pack(side="left", padx=5)
+        if not plan.placements:
+            commit_button.config(state="disabled")
+        ttk.Button(button_frame, text="Отмена", command=window.destroy).pack(side="left", padx=5)
+
+    def commit_plan(self, plan, window):
+        try:
+            scheduler.commit_plan(self.conn, plan)
+        except BudgetExceeded as e:
+            details = "\n".join(e.errors[:10])
+            messagebox.showerror("Ошибка", f"План не записан, бюджет превышен:\n{details}")
+            return
+        except scheduler.PlanConflicts as e:
+            details = "\n".join(conflicts.describe(conflict) for conflict in e.conflicts[:10])
+            messagebox.showerror("Ошибка", f"План не записан: расписание изменилось после расчёта.\n{details}")
+            return
+        except sqlite3.Error as e:
+            messagebox.showerror("Ошибка", f"План не записан: {e}")
+            return
+        
+        window.destroy()
+        self.plan_status.config(text=f"Записано съёмок: {len(plan.placements)}")
+        self.publish(RowChange("shootings", "reload", None, None, None))
 
     def export_data(self, data_type):
         directory = filedialog.askdirectory(title="Выберите папку для сохранения")
         if not directory:
             return
         
+        batch_size = self.get_export_batch_size()
+        if batch_size is None:
+            return
+        
+        self.start_export()
+        self.run_in_background(f"export:{data_type}", exporter.export_table, data_type, directory, batch_size,
+                               self.post_export_progress, self.export_cancelled.is_set,
+                               on_done=self.show_export_done,
+                               error_text="Не удалось экспортировать данные")
+
+    def get_export_batch_size(self):
         try:
-            c = self.conn.cursor()
-            
-            if data_type == "actors":
-                filename = f"{directory}/actors.csv"
-                c.execute("SELECT * FROM actors")
-                data = c.fetchall()
-                headers = ["ID", "ФИО", "Ставка за день"]
-            elif data_type == "movies":
-                filename = f"{directory}/movies.csv"
-                c.execute("SELECT * FROM movies")
-                data = c.fetchall()
-                headers = ["ID", "Название", "Режиссёр", "Бюджет"]
-            elif data_type == "shootings":
-                filename = f"{directory}/shootings.csv"
-                c.execute("""
-                    SELECT s.id, a.fio, m.название, s.дата, s.сцена, s.гонорар
-                    FROM shootings s
-                    JOIN actors a ON s.actor_id = a.id
-                    JOIN movies m ON s.movie_id = m.id
-                """)
-                data = c.fetchall()
-                headers = ["ID", "Актёр", "Фильм", "Дата", "Сцена", "Гонорар"]
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
-                writer.writerows(data)
-            
-            self.export_status.config(text=f"Данные успешно экспортированы в {filename}")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось экспортировать данные: {str(e)}")
+            return max(1, self.export_batch_size.get())
+        except tk.TclError:
+            messagebox.showerror("Ошибка", "Введите корректный размер пакета (целое число).")
+            return None
+
+    def start_export(self):
+        self.export_cancelled.clear()
+        self.export_progress.config(value=0)
+        self.export_status.config(text="Экспорт...")
+
+    def post_export_progress(self, written, total, elapsed):
+        self.executor.post(self.show_export_progress, written, total, elapsed)
+
+    def show_export_progress(self, written, total, elapsed):
+        if self.export_cancelled.is_set():
+            return
+        if total:
+            self.export_progress.config(value=min(100, written * 100 / total))
+        rate = written / elapsed if elapsed > 0 else 0
+        self.export_status.config(text=f"Экспортировано {written} из {total} строк ({rate:.0f} строк/с)")
+
+    def show_export_done(self, result):
+        filename, written, elapsed = result
+        rate = written / elapsed if elapsed > 0 else 0
+        self.export_progress.config(value=100)
+        self.export_status.config(text=f"Данные успешно экспортированы в {filename} "
+                                       f"({written} строк за {elapsed:.2f} с, {rate:.0f} строк/с)")
+
+    def cancel_export(self):
+        self.export_cancelled.set()
+        slots = [slot for slot in self.pending if slot.startswith("export:")]
+        for slot in slots:
+            self.cancel_background(slot)
+        if slots:
+            self.export_progress.config(value=0)
+            self.export_status.config(text="Экспорт отменён")
+        
+        slots = [slot for slot in self.pending if slot.startswith("import:")]
+        for slot in slots:
+            self.cancel_background(slot)
+        if slots:
+            self.stop_import_progress()
+            self.import_status.config(text="Импорт отменён, изменения не сохранены")
 
     def export_all_data(self):
         directory = filedialog.askdirectory(title="Выберите папку для сохранения")
         if not directory:
             return
         
-        try:
-            self.export_data("actors")
-            self.export_data("movies")
-            self.export_data("shootings")
-            self.export_status.config(text=f"Все данные экспортированы в {directory}")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось экспортировать данные: {str(e)}")
+        batch_size = self.get_export_batch_size()
+        if batch_size is None:
+            return
+        
+        self.start_export()
+        self.run_in_background("export:all", exporter.export_snapshot, directory, tuple(exporter.EXPORTS),
+                               batch_size, self.export_archive.get(),
+                               self.post_export_progress, self.export_cancelled.is_set,
+                               on_done=self.show_export_done,
+                               error_text="Не удалось экспортировать данные")
 
-    def on_tab_changed(self, event):
-        tab_name = self.notebook.tab(self.notebook.select(), "text")
+    def import_data(self, data_type):
+        filename = filedialog.askopenfilename(
+            title="Выберите CSV-файл",
+            filetypes=[("CSV файлы", "*.csv"), ("Все файлы", "*.*")]
+        )
+        if not filename:
+            return
+        
+        batch_size = self.get_export_batch_size()
+        if batch_size is None:
+            return
+        
+        self.export_cancelled.clear()
+        self.export_progress.config(mode="indeterminate", value=0)
+        self.export_progress.start(20)
+        self.import_status.config(text="Импорт...")
         
-        if tab_name == "Расписание":
+        self.run_in_background(f"import:{data_type}", importer.import_csv, data_type, filename, batch_size,
+                               self.post_import_progress, self.export_cancelled.is_set,
+                               on_done=self.show_import_done, on_error=self.show_import_error)
+
+    def post_import_progress(self, imported, elapsed):
+        self.executor.post(self.show_import_progress, imported, elapsed)
+
+    def show_import_progress(self, imported, elapsed):
+        if self.export_cancelled.is_set():
+            return
+        rate = imported / elapsed if elapsed > 0 else 0
+        self.import_status.config(text=f"Импортировано {imported} строк ({rate:.0f} строк/с)")
+
+    def stop_import_progress(self):
+        self.export_progress.stop()
+        self.export_progress.config(mode="determinate", value=0)
+
+    def show_import_done(self, result):
+        filename, imported, elapsed = result
+        rate = imported / elapsed if elapsed > 0 else 0
+        self.stop_import_progress()
+        self.export_progress.config(value=100)
+        self.import_status.config(text=f"Из {filename} импортировано {imported} строк "
+                                       f"за {elapsed:.2f} с ({rate:.0f} строк/с)")
+        self.reload_all_tabs()
+
+    def show_import_error(self, error):
+        self.stop_import_progress()
+        self.import_status.config(text="Импорт не выполнен, изменения не сохранены")
+        if isinstance(error, importer.ImportFailed):
+            messagebox.showerror("Ошибка", "Файл содержит ошибки:\n" + "\n".join(error.errors))
+        else:
+            messagebox.showerror("Ошибка", f"Не удалось импортировать данные: {error}")
+
+    def reload_all_tabs(self):
+        # Ещё не построенные вкладки загрузят свежие данные при открытии,
+        # скрытые вкладки отчётов - при переключении на них (см. Generations).
+        if "actors" in self.built_tabs:
+            self.load_actors()
+        if "movies" in self.built_tabs:
+            self.load_movies()
+        if "shootings" in self.built_tabs:
+            self.load_shootings()
+            self.refresh_shootings_comboboxes()
+        self.refresh_report(self.current_tab())
+
+    def refresh_report(self, tab):
+        # Перезагружает вкладку отчёта, только если с последней отрисовки
+        # изменились её таблицы или загрузка была прервана.
+        if tab not in REPORT_TABLES or tab not in self.built_tabs:
+            return
+        self.check_external_changes()
+        if self.report_is_current(tab):
+            return
+        
+        if tab == "schedule":
             self.load_schedule_data()
-        elif tab_name == "Затраты на актёров":
+        elif tab == "calendar":
+            self.load_calendar_data()
+        elif tab == "expenses":
             self.load_expenses_tab_data()
-        elif tab_name == "Бюджеты фильмов":
+        elif tab == "budget":
             self.load_budget_tab_data()
+        elif tab == "analytics":
+            self.load_analytics_data()
+
+    def on_tab_changed(self, event):
+        tab = self.tab_keys.get(str(self.notebook.select()))
+        
+        for slot in REPORT_TABLES:
+            if slot in self.pending and slot != tab:
+                self.cancel_background(slot)
+        
+        if tab is None or self.ensure_tab(tab):
+            return
+        
+        self.refresh_report(tab)
 
 if __name__ == "__main__":
     root = tk.Tk()
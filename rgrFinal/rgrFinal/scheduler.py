@@ -0,0 +1,289 @@
+﻿import csv
+import random
+import sys
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from datetime import date, timedelta
+
+import conflicts
+import database
+import importer
+from repositories import ShootingRepository, id_list
+
+# Планирование дат съёмок без Tk. Сцены без даты (CSV со столбцами
+# SCENE_COLUMNS) расставляются по дням окна так, чтобы не появилось
+# конфликтов (см. conflicts): актёр в день снимается в одном фильме, не
+# больше MAX_SHOOTINGS_PER_DAY раз и на гонорары не больше ставки; затраты
+# фильма не превышают бюджет. Занятость актёров - их съёмки из day_totals.
+#
+# Поиск жадный: сцены по очереди ставятся в первый подходящий день, при
+# цели "cost" - сначала в дни, когда актёр уже снимается в этом фильме
+# (новая смена актёра стоит его ставку). Первый проход - от крупных
+# гонораров к мелким, затем, пока не истечёт время, - проходы со
+# случайным порядком; остаётся лучший план. Дни, в которые актёр уже не
+# может сниматься в фильме, пропускаются указателем, поэтому проход по
+# тысячам сцен занимает доли секунды.
+
+SCENE_COLUMNS = ["Актёр", "Фильм", "Сцена", "Гонорар"]
+# Цель планирования: меньше новых смен актёров или раньше закончить.
+OBJECTIVES = {"Меньше смен актёров": "cost", "Кратчайший срок": "span"}
+DEFAULT_TIME_BUDGET = 2.0
+DEFAULT_HORIZON_DAYS = 90
+MAX_ATTEMPTS = 200
+
+Scene = namedtuple("Scene", ["actor_id", "actor", "movie_id", "movie", "scene", "fee"])
+# placements - пары (Scene, номер дня), unplaced - пары (Scene, причина);
+# actor_days и day_cost - новые смены актёров и их стоимость по ставкам,
+# span - дней от первой до последней съёмки плана.
+Plan = namedtuple("Plan", ["objective", "placements", "unplaced", "actor_days", "day_cost", "span",
+                           "attempts", "elapsed_ms"])
+
+class PlanConflicts(Exception):
+    # План устарел: после расчёта в базу записаны пересекающиеся съёмки.
+    def __init__(self, found):
+        super().__init__("\n".join(conflicts.describe(conflict) for conflict in found))
+        self.conflicts = found
+
+def read_scenes(conn, filename):
+    c = conn.cursor()
+    actors = importer.name_index(c, "SELECT id, fio FROM actors")
+    movies = importer.name_index(c, "SELECT id, название FROM movies")
+    scenes = []
+    errors = []
+    with open(filename, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        missing = [name for name in SCENE_COLUMNS if name not in header]
+        if missing:
+            raise importer.ImportFailed([f"В файле нет столбцов: {', '.join(missing)}"])
+        positions = [header.index(name) for name in SCENE_COLUMNS]
+        for line, record in enumerate(reader, start=2):
+            if not record:
+                continue
+            actor, movie, scene, fee = [record[i].strip() if i < len(record) else "" for i in positions]
+            try:
+                scenes.append(Scene(importer.resolve(actors, actor, "Актёр"), actor,
+                                    importer.resolve(movies, movie, "Фильм"), movie, scene,
+                                    importer.parse_amount(fee, "Гонорар", required=False)))
+            except ValueError as e:
+                errors.append(f"Строка {line}: {e}")
+                if len(errors) >= importer.MAX_REPORTED_ERRORS:
+                    break
+    if errors:
+        raise importer.ImportFailed(errors)
+    if not scenes:
+        raise importer.ImportFailed(["В файле нет сцен"])
+    return scenes
+
+def plan_days(start, end, weekends=True):
+    days = range(start.toordinal(), end.toordinal() + 1)
+    return [day for day in days if weekends or date.fromordinal(day).weekday() < 5]
+
+def fits(entry, movie_id, fee, rate):
+    # entry - [фильмы, число съёмок, гонорары] актёра за день или None.
+    if entry is None:
+        return True
+    movies, count, fees = entry
+    return (len(movies) == 1 and movie_id in movies and count < conflicts.MAX_SHOOTINGS_PER_DAY
+            and round(fees + fee, 2) <= rate)
+
+def closed(entry, movie_id):
+    # В такой день актёр не может сниматься в фильме при любом гонораре.
+    return entry is not None and (entry[0] != {movie_id} or entry[1] >= conflicts.MAX_SHOOTINGS_PER_DAY)
+
+class Planner:
+    def __init__(self, scenes, days, rates, remaining, bookings):
+        self.scenes = scenes
+        self.days = days
+        self.rates = rates
+        self.remaining = remaining
+        self.bookings = bookings
+        self.allowed = set(days)
+
+    @classmethod
+    def load(cls, conn, scenes, start, end, weekends=True):
+        actor_ids = {scene.actor_id for scene in scenes}
+        movie_ids = {scene.movie_id for scene in scenes}
+        conn.execute("BEGIN")
+        try:
+            rates = dict(conn.execute("""
+                SELECT id, ставка_за_день FROM actors WHERE id IN (SELECT value FROM json_each(?))
+            """, (id_list(actor_ids),)))
+            remaining = dict(conn.execute("""
+                SELECT m.id, m.бюджет - IFNULL(ms.spent, 0)
+                FROM movies m
+                LEFT JOIN movie_spend ms ON ms.movie_id = m.id
+                WHERE m.id IN (SELECT value FROM json_each(?))
+            """, (id_list(movie_ids),)))
+            rows = conn.execute("""
+                SELECT день, actor_id, movie_id, shootings_count, fees FROM day_totals
+                WHERE день >= ? AND день <= ?
+            """, (start.toordinal(), end.toordinal())).fetchall()
+        finally:
+            conn.rollback()
+
+        bookings = defaultdict(dict)
+        for day, actor_id, movie_id, count, fees in rows:
+            if actor_id not in actor_ids:
+                continue
+            entry = bookings[actor_id].get(day)
+            if entry is None:
+                bookings[actor_id][day] = [{movie_id}, count, fees]
+            else:
+                entry[0].add(movie_id)
+                entry[1] += count
+                entry[2] += fees
+        return cls(scenes, plan_days(start, end, weekends), rates, remaining, bookings)
+
+    def run(self, order, objective, deadline=None):
+        # Один жадный проход; None - время вышло до конца прохода.
+        bookings = {actor_id: {day: [set(entry[0]), entry[1], entry[2]] for day, entry in days.items()}
+                    for actor_id, days in self.bookings.items()}
+        remaining = dict(self.remaining)
+        # (актёр, фильм) -> номер в self.days, до которого дни закрыты,
+        # и дни окна, в которые актёр уже снимается в фильме.
+        first_open = defaultdict(int)
+        working = defaultdict(list)
+        for actor_id, days in bookings.items():
+            for day, entry in sorted(days.items()):
+                if len(entry[0]) == 1 and entry[1] < conflicts.MAX_SHOOTINGS_PER_DAY and day in self.allowed:
+                    working[actor_id, next(iter(entry[0]))].append(day)
+
+        placements = []
+        unplaced = []
+        actor_days = 0
+        day_cost = 0.0
+        for scene in order:
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            rate = self.rates[scene.actor_id]
+            if round(scene.fee, 2) > rate:
+                unplaced.append((scene, "гонорар больше ставки актёра"))
+                continue
+            if round(scene.fee, 2) > round(remaining[scene.movie_id], 2):
+                unplaced.append((scene, "не хватает бюджета фильма"))
+                continue
+
+            days = bookings.setdefault(scene.actor_id, {})
+            key = (scene.actor_id, scene.movie_id)
+            day = None
+            if objective == "cost":
+                day = next((day for day in working[key] if fits(days[day], scene.movie_id, scene.fee, rate)), None)
+            if day is None:
+                index = first_open[key]
+                while index < len(self.days) and closed(days.get(self.days[index]), scene.movie_id):
+                    index += 1
+                first_open[key] = index
+                while index < len(self.days) and not fits(days.get(self.days[index]), scene.movie_id, scene.fee, rate):
+                    index += 1
+                if index < len(self.days):
+                    day = self.days[index]
+            if day is None:
+                unplaced.append((scene, "нет свободного дня в окне"))
+                continue
+
+            entry = days.get(day)
+            if entry is None:
+                entry = days[day] = [{scene.movie_id}, 0, 0.0]
+                insort(working[key], day)
+                actor_days += 1
+                day_cost += rate
+            entry[1] += 1
+            entry[2] += scene.fee
+            if entry[1] >= conflicts.MAX_SHOOTINGS_PER_DAY:
+                del working[key][bisect_left(working[key], day)]
+            remaining[scene.movie_id] -= scene.fee
+            placements.append((scene, day))
+
+        placed_days = [day for _, day in placements]
+        span = max(placed_days) - min(placed_days) + 1 if placed_days else 0
+        placements.sort(key=lambda placement: (placement[1], placement[0].actor_id))
+        return Plan(objective, placements, unplaced, actor_days, day_cost, span, 1, 0.0)
+
+def score(plan):
+    # Меньше - лучше: сначала число нерасставленных сцен, затем цель.
+    if plan.objective == "cost":
+        return len(plan.unplaced), plan.day_cost, plan.span
+    return len(plan.unplaced), plan.span, plan.day_cost
+
+def search(planner, objective, time_budget=DEFAULT_TIME_BUDGET, seed=0):
+    started = time.perf_counter()
+    deadline = started + time_budget
+    order = sorted(planner.scenes, key=lambda scene: -scene.fee)
+    best = planner.run(order, objective)
+    attempts = 1
+    generator = random.Random(seed)
+    while attempts < MAX_ATTEMPTS and time.perf_counter() < deadline:
+        # Крупные гонорары по-прежнему в начале, но порядок случайный.
+        order = sorted(planner.scenes, key=lambda scene: -scene.fee * generator.uniform(0.5, 1.5))
+        plan = planner.run(order, objective, deadline)
+        if plan is None:
+            break
+        attempts += 1
+        if score(plan) < score(best):
+            best = plan
+    return best._replace(attempts=attempts, elapsed_ms=(time.perf_counter() - started) * 1000)
+
+def check_plan(conn, plan):
+    # Конфликты дней плана вместе с уже записанными съёмками актёров.
+    days = defaultdict(lambda: [set(), 0, 0.0])
+    for scene, day in plan.placements:
+        entry = days[day, scene.actor_id]
+        entry[0].add(scene.movie_id)
+        entry[1] += 1
+        entry[2] += scene.fee
+    pairs = [[day, actor_id] for day, actor_id in days]
+    rows = conn.execute("""
+        SELECT d.день, d.actor_id, d.movie_id, d.shootings_count, d.fees
+        FROM json_each(?) j
+        JOIN day_totals d ON d.день = json_extract(j.value, '$[0]') AND d.actor_id = json_extract(j.value, '$[1]')
+    """, (id_list(pairs),))
+    for day, actor_id, movie_id, count, fees in rows:
+        entry = days[day, actor_id]
+        entry[0].add(movie_id)
+        entry[1] += count
+        entry[2] += fees
+    actors = {scene.actor_id: scene.actor for scene, _ in plan.placements}
+    rates = dict(conn.execute("SELECT id, ставка_за_день FROM actors WHERE id IN (SELECT value FROM json_each(?))",
+                              (id_list(actors),)))
+    found = []
+    for (day, actor_id), (movies, count, fees) in sorted(days.items()):
+        found += conflicts.day_conflicts(day, actor_id, actors[actor_id], rates.get(actor_id, 0), sorted(movies),
+                                         count, fees)
+    return found
+
+def commit_plan(conn, plan):
+    # Все съёмки плана - одна транзакция; другие соединения не пишут
+    # между проверкой и записью (BEGIN IMMEDIATE).
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        found = check_plan(conn, plan)
+        if found:
+            raise PlanConflicts(found)
+    except BaseException:
+        conn.rollback()
+        raise
+    ShootingRepository(conn).add_many([(scene.actor_id, scene.movie_id, date.fromordinal(day).isoformat(),
+                                        scene.scene, scene.fee) for scene, day in plan.placements])
+
+# Точка входа для DatabaseExecutor.submit.
+def load_plan(conn, filename, objective, start, end, weekends=True, time_budget=DEFAULT_TIME_BUDGET):
+    scenes = read_scenes(conn, filename)
+    return search(Planner.load(conn, scenes, start, end, weekends), objective, time_budget)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Использование: scheduler.py сцены.csv [база]")
+        sys.exit(1)
+    path = sys.argv[2] if len(sys.argv) > 2 else "filmstudio.db"
+    conn = database.connect(path)
+    database.migrate(conn)
+    start = date.today() + timedelta(days=1)
+    end = start + timedelta(days=DEFAULT_HORIZON_DAYS - 1)
+    for title, objective in OBJECTIVES.items():
+        plan = load_plan(conn, sys.argv[1], objective, start, end)
+        print(f"{title}: расставлено {len(plan.placements)}, не расставлено {len(plan.unplaced)}, "
+              f"новых смен {plan.actor_days} ({plan.day_cost:.2f}), дней {plan.span}, "
+              f"проходов {plan.attempts}, {plan.elapsed_ms:.0f} мс")
+    conn.close()
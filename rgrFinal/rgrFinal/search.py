@@ -0,0 +1,175 @@
+﻿import json
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import namedtuple
+from contextlib import contextmanager
+
+import database
+
+# Полнотекстовый поиск по индексам FTS5 (см. database.migration_search_index).
+# Каждое слово запроса ищется как начало слова: «иван пет» находит
+# «Петров Иван». Из индекса берутся CANDIDATES лучших по bm25 совпадений
+# (ORDER BY rank по всем совпадениям), они упорядочиваются по relevance.
+# Ранжирование общего слова вроде «сцена», совпадающего с миллионом
+# съёмок, ограничено по времени (time_limit в search_all).
+
+SearchHit = namedtuple("SearchHit", ["kind", "id", "title", "detail", "rank"])
+# Найденные строки одной таблицы для поиска при наборе: words - слова
+# запроса, rows - пары (id, слова текста), complete - найдено всё.
+Matches = namedtuple("Matches", ["words", "rows", "complete"])
+
+KINDS = {
+    "actors": "Актёр",
+    "movies": "Фильм",
+    "shootings": "Сцена",
+}
+
+CANDIDATES = 1000
+DEFAULT_LIMIT = 50
+# Больше строк поиск при наборе в памяти не держит: фильтр списка
+# остаётся запросом к индексу.
+MAX_MATCHES = 20000
+# Запрос дольше SEARCH_TIMEOUT секунд прерывается обработчиком прогресса,
+# который вызывается каждые PROGRESS_STEPS инструкций SQLite.
+SEARCH_TIMEOUT = 0.5
+PROGRESS_STEPS = 10000
+
+class SearchTooBroad(Exception):
+    pass
+
+@contextmanager
+def time_limit(conn, seconds):
+    deadline = time.perf_counter() + seconds
+    expired = []
+
+    def check():
+        if time.perf_counter() > deadline:
+            expired.append(True)
+            return 1
+        return 0
+
+    conn.set_progress_handler(check, PROGRESS_STEPS)
+    try:
+        yield
+    except sqlite3.OperationalError:
+        # Прерывание по conn.interrupt() (отмена DbFuture) пробрасывается как есть.
+        if expired:
+            raise SearchTooBroad("Запрос слишком общий, уточните его") from None
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+def words(text):
+    # Слова так, как их видит токенизатор unicode61: подчёркивание -
+    # разделитель, регистр и диакритика латиницы (но не й) не различаются.
+    text = database.fold(text).lower()
+    if not text.isascii():
+        letters = []
+        for char in unicodedata.normalize("NFD", text):
+            if unicodedata.combining(char) and letters and letters[-1] < "\u0250":
+                continue
+            letters.append(char)
+        text = unicodedata.normalize("NFC", "".join(letters))
+    return re.findall(r"[^\W_]+", text)
+
+def match_query(query_words):
+    return " ".join(f'"{word}"*' for word in query_words)
+
+def refines(old_words, new_words):
+    # Новый запрос не шире прежнего: каждое прежнее слово - начало слова
+    # на том же месте (набор продолжается), новые слова только сужают.
+    return (len(new_words) >= len(old_words)
+            and all(new.startswith(old) for old, new in zip(old_words, new_words)))
+
+def find_matches(conn, table, text, limit=MAX_MATCHES, timeout=SEARCH_TIMEOUT):
+    query_words = tuple(words(text))
+    columns = " || ' ' || ".join(f"IFNULL(t.{column}, '')" for column in database.SEARCH_TABLES[table])
+    sql = f"""
+        SELECT t.id, {columns}
+        FROM {table}_fts f
+        JOIN {table} t ON t.id = f.rowid
+        WHERE {table}_fts MATCH ?
+        LIMIT ?
+    """
+    with time_limit(conn, timeout):
+        rows = conn.execute(sql, (match_query(query_words), limit + 1)).fetchall()
+    return Matches(query_words, [(row_id, tuple(words(indexed))) for row_id, indexed in rows[:limit]],
+                   len(rows) <= limit)
+
+def narrow(matches, query_words):
+    # Отбор в памяти среди прежних полных результатов, если запрос их уточняет.
+    query_words = tuple(query_words)
+    if not matches.complete or not refines(matches.words, query_words):
+        return None
+    rows = [(row_id, text_words) for row_id, text_words in matches.rows
+            if all(any(word.startswith(query) for word in text_words) for query in query_words)]
+    return Matches(query_words, rows, True)
+
+def matches_filter(table, matches):
+    # Условие для VirtualTreeview.set_filter: найденные id одним параметром
+    # (json_each), а если найдено больше MAX_MATCHES - подзапрос к индексу.
+    if matches.complete:
+        return "id IN (SELECT value FROM json_each(?))", (json.dumps([row_id for row_id, _ in matches.rows]),)
+    return f"id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)", (match_query(matches.words),)
+
+def relevance(query_words, text, rank):
+    # bm25 (rank) не отличает слово, найденное целиком, от найденного по
+    # началу: сначала идут совпадения с большим числом целых слов, среди
+    # них - по bm25. Меньше - лучше.
+    text_words = words(text)
+    exact = sum(1 for word in query_words if word in text_words)
+    return -exact, rank
+
+class SearchService:
+    # Столбцы: вид, id, название, пояснение, проиндексированный текст, bm25.
+    ACTORS_SQL = """
+        SELECT 'actors', a.id, a.fio, 'ставка ' || a.ставка_за_день, a.fio, hits.rank
+        FROM (SELECT rowid, rank FROM actors_fts WHERE actors_fts MATCH ? ORDER BY rank LIMIT ?) hits
+        JOIN actors a ON a.id = hits.rowid
+    """
+    MOVIES_SQL = """
+        SELECT 'movies', m.id, m.название, IFNULL(m.режиссёр, ''), m.название || ' ' || IFNULL(m.режиссёр, ''),
+               hits.rank
+        FROM (SELECT rowid, rank FROM movies_fts WHERE movies_fts MATCH ? ORDER BY rank LIMIT ?) hits
+        JOIN movies m ON m.id = hits.rowid
+    """
+    SCENES_SQL = """
+        SELECT 'shootings', s.id, s.сцена, a.fio || ', ' || m.название || ', ' || s.дата, s.сцена, hits.rank
+        FROM (SELECT rowid, rank FROM shootings_fts WHERE shootings_fts MATCH ? ORDER BY rank LIMIT ?) hits
+        JOIN shootings s ON s.id = hits.rowid
+        JOIN actors a ON s.actor_id = a.id
+        JOIN movies m ON s.movie_id = m.id
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _search(self, sql, text, limit):
+        query_words = words(text)
+        if not query_words:
+            return []
+        rows = self.conn.execute(sql, (match_query(query_words), CANDIDATES))
+        hits = [SearchHit(kind, row_id, title, detail, relevance(query_words, indexed, rank))
+                for kind, row_id, title, detail, indexed, rank in rows]
+        hits = sorted(hits, key=lambda hit: (hit.rank, -hit.id))
+        return hits[:limit]
+
+    def actors(self, text, limit=DEFAULT_LIMIT):
+        return self._search(self.ACTORS_SQL, text, limit)
+
+    def movies(self, text, limit=DEFAULT_LIMIT):
+        return self._search(self.MOVIES_SQL, text, limit)
+
+    def scenes(self, text, limit=DEFAULT_LIMIT):
+        return self._search(self.SCENES_SQL, text, limit)
+
+    def search_all(self, text, limit=DEFAULT_LIMIT):
+        # Результаты сгруппированы: актёры, фильмы, сцены.
+        return self.actors(text, limit) + self.movies(text, limit) + self.scenes(text, limit)
+
+# Точка входа для DatabaseExecutor.submit.
+def search_all(conn, text, limit=DEFAULT_LIMIT, timeout=SEARCH_TIMEOUT):
+    with time_limit(conn, timeout):
+        return SearchService(conn).search_all(text, limit)
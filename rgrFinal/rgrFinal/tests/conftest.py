@@ -0,0 +1,97 @@
+﻿import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import database
+import rgrFinal
+
+# Проверки слоя данных без Tk на временной базе последней версии схемы.
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = database.connect(str(tmp_path / "filmstudio.db"))
+    database.migrate(conn)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def totals_consistent():
+    # Сводные таблицы movie_spend и day_totals совпадают с пересчётом по
+    # самим съёмкам.
+    def check(conn):
+        assert database.check_movie_spend(conn) == []
+        stored = conn.execute("""
+            SELECT день, actor_id, movie_id, shootings_count, ROUND(fees, 2) FROM day_totals
+            ORDER BY день, actor_id, movie_id
+        """).fetchall()
+        actual = conn.execute("""
+            SELECT день, actor_id, movie_id, COUNT(*), ROUND(SUM(IFNULL(гонорар, 0)), 2) FROM shootings
+            WHERE день IS NOT NULL
+            GROUP BY день, actor_id, movie_id
+            ORDER BY день, actor_id, movie_id
+        """).fetchall()
+        assert stored == actual
+    return check
+
+class FakeTree:
+    # Treeview без окна: хранит только порядок элементов и выделение.
+    def __init__(self):
+        self.order = []
+        self.selected = ()
+        self.focused = ""
+
+    def bind(self, *args):
+        pass
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def delete(self, *iids):
+        self.order = [iid for iid in self.order if iid not in iids]
+
+    def exists(self, iid):
+        return iid in self.order
+
+    def item(self, iid, **options):
+        pass
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def insert(self, parent, index, iid, values):
+        self.order.insert(index, iid)
+
+    def selection_set(self, *iids):
+        self.selected = iids
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self.focused
+        self.focused = iid
+
+class FakeScrollbar:
+    def configure(self, **options):
+        pass
+
+    def set(self, first, last):
+        pass
+
+class FakeStyle:
+    def lookup(self, *args):
+        return 20
+
+@pytest.fixture
+def make_view(monkeypatch):
+    # VirtualTreeview списка repository с окном из visible строк.
+    monkeypatch.setattr(rgrFinal.ttk, "Style", FakeStyle)
+    def make(conn, repository, visible, overscan):
+        view = rgrFinal.VirtualTreeview(FakeTree(), FakeScrollbar(), conn, repository.LIST_SQL,
+                                        repository.LIST_KEYS, overscan=overscan, columns=repository.LIST_COLUMNS)
+        view.visible = visible
+        view.refresh()
+        return view
+    return make
@@ -0,0 +1,72 @@
+﻿from datetime import date
+
+import analytics
+from repositories import ShootingRepository
+
+# Сводные таблицы, рейтинги и расход бюджета из столбцов в памяти
+# совпадают с теми же суммами, посчитанными GROUP BY по съёмкам.
+
+def add_data(conn):
+    for number in range(6):
+        conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES (?, 100000)", (f"Актёр {number}",))
+    for number in range(4):
+        conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, NULL, 1000000)",
+                     (f"Фильм {number}",))
+    # Актёр 6 без съёмок в сводную таблицу не попадает.
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Без съёмок', 100)")
+    conn.commit()
+    repository = ShootingRepository(conn)
+    repository.add_many([(number % 6 + 1, number % 4 + 1, date.fromordinal(739000 + number * 7 % 90).isoformat(),
+                          "Сцена", None if number % 9 == 0 else number * 10) for number in range(300)])
+    repository.add(1, 1, "в январе", "Без даты", 500)
+    return repository
+
+def expected_pivot(conn, key, bucket_of):
+    sums = {}
+    counts = {}
+    for row_key, day, fee in conn.execute(f"SELECT {key}, день, IFNULL(гонорар, 0) FROM shootings "
+                                          "WHERE день IS NOT NULL"):
+        cell = (row_key, bucket_of(day))
+        sums[cell] = sums.get(cell, 0) + fee
+        counts[row_key] = counts.get(row_key, 0) + 1
+    return sums, counts
+
+def check_pivot(table, sums, counts):
+    assert {row.key for row in table.rows} == set(counts)
+    assert table.buckets == sorted({bucket for _, bucket in sums})
+    for row in table.rows:
+        assert row.count == counts[row.key]
+        assert row.fees == [sums.get((row.key, bucket), 0) for bucket in table.buckets]
+        assert row.total == sum(row.fees)
+
+def test_pivots_match_group_by(conn):
+    add_data(conn)
+    report = analytics.load_report(conn)
+    assert len(report.columns) == conn.execute("SELECT COUNT(*) FROM day_totals").fetchone()[0]
+    check_pivot(report.actor_months, *expected_pivot(conn, "actor_id", analytics.month_of))
+    check_pivot(report.movie_weeks, *expected_pivot(conn, "movie_id", analytics.week_of))
+    assert [row.name for row in report.actor_months.rows] == [f"Актёр {number}" for number in range(6)]
+    assert [row.fees for row in report.top_movies] == sorted((row.total for row in report.movie_weeks.rows),
+                                                             reverse=True)
+
+def test_burn_down_matches_shootings(conn):
+    add_data(conn)
+    columns = analytics.ShootingColumns.load(conn)
+    rows = analytics.burn_down(columns, 2)
+    days = conn.execute("""
+        SELECT день, SUM(IFNULL(гонорар, 0)) FROM shootings
+        WHERE movie_id = 2 AND день IS NOT NULL GROUP BY день ORDER BY день
+    """).fetchall()
+    assert [row.day for row in rows] == [date.fromordinal(day) for day, _ in days]
+    spent = 0
+    for row, (_, fees) in zip(rows, days):
+        spent += fees
+        assert (row.spent, row.remaining) == (spent, 1000000 - spent)
+
+def test_movie_without_shootings(conn):
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Фильм', NULL, 1000)")
+    conn.commit()
+    report = analytics.load_report(conn)
+    assert len(report.columns) == 0
+    assert report.actor_months.rows == report.movie_weeks.rows == []
+    assert analytics.burn_down(report.columns, 1) == []
@@ -0,0 +1,103 @@
+﻿import csv
+import sqlite3
+
+import pytest
+
+import importer
+import scheduler
+from repositories import BudgetExceeded, MovieRepository, ShootingRepository
+
+# Превышение бюджета фильма или ошибка на одной из строк пакета: запись
+# откатывается целиком, в базе и сводных таблицах ничего не меняется.
+
+def add_data(conn):
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Актёр', 1000)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Фильм', NULL, 1000)")
+    conn.commit()
+    repository = ShootingRepository(conn)
+    for day in range(1, 4):
+        repository.add(1, 1, f"2025-01-0{day}", "Сцена", 200)
+    return repository
+
+def state(conn):
+    return [conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+            for table in ("shootings", "movie_spend", "day_totals")]
+
+def test_import_rolls_back(conn, tmp_path, totals_consistent):
+    add_data(conn)
+    before = state(conn)
+    path = tmp_path / "shootings.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(importer.ShootingRows.columns)
+        writer.writerows([("Актёр", "Фильм", "2025-02-01", "Сцена", 300)] * 2)
+    with pytest.raises(importer.ImportFailed) as failed:
+        importer.import_csv(conn, "shootings", str(path))
+    assert "превышает бюджет" in failed.value.errors[0]
+    assert not conn.in_transaction
+    assert state(conn) == before
+    totals_consistent(conn)
+
+def test_update_many_rolls_back(conn, totals_consistent):
+    repository = add_data(conn)
+    before = state(conn)
+    with pytest.raises(BudgetExceeded):
+        repository.adjust_fees([1, 2], 0, 300)
+    assert not conn.in_transaction
+    assert state(conn) == before
+    totals_consistent(conn)
+
+def test_delete_many_rolls_back(conn, totals_consistent):
+    repository = add_data(conn)
+    before = state(conn)
+    # Ошибка на последней строке пакета: первые две уже удалены в транзакции.
+    conn.execute("""
+        CREATE TEMP TRIGGER keep_shooting BEFORE DELETE ON shootings WHEN OLD.id = 3
+        BEGIN SELECT RAISE(ABORT, 'съёмку нельзя удалить'); END
+    """)
+    with pytest.raises(sqlite3.IntegrityError):
+        repository.delete_many([1, 2, 3])
+    assert not conn.in_transaction
+    assert state(conn) == before
+    totals_consistent(conn)
+
+def test_movie_delete_many_rolls_back(conn):
+    add_data(conn)
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Без съёмок', NULL, 1000)")
+    conn.commit()
+    # У второго фильма есть съёмки: внешний ключ не даёт его удалить.
+    with pytest.raises(sqlite3.IntegrityError):
+        MovieRepository(conn).delete_many([2, 1])
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM movies").fetchone() == (2,)
+
+def test_add_many_rolls_back(conn, totals_consistent):
+    repository = add_data(conn)
+    before = state(conn)
+    with pytest.raises(BudgetExceeded):
+        repository.add_many([(1, 1, "2025-02-01", "Сцена", 300), (1, 1, "2025-02-02", "Сцена", 300)])
+    assert not conn.in_transaction
+    assert state(conn) == before
+    totals_consistent(conn)
+
+def plan(placements):
+    scenes = [(scheduler.Scene(1, "Актёр", 1, "Фильм", "Сцена", fee), day) for fee, day in placements]
+    return scheduler.Plan("cost", scenes, [], len(scenes), 0, 0, 0, 0)
+
+def test_commit_plan_rolls_back(conn, totals_consistent):
+    add_data(conn)
+    before = state(conn)
+    day = conn.execute("SELECT MAX(день) FROM shootings").fetchone()[0]
+    with pytest.raises(BudgetExceeded):
+        scheduler.commit_plan(conn, plan([(300, day + 1), (300, day + 2)]))
+    assert not conn.in_transaction
+    assert state(conn) == before
+    # Конфликт с уже записанной съёмкой: ставка актёра за день превышена.
+    with pytest.raises(scheduler.PlanConflicts):
+        scheduler.commit_plan(conn, plan([(900, day)]))
+    assert not conn.in_transaction
+    assert state(conn) == before
+
+    scheduler.commit_plan(conn, plan([(100, day + 1), (100, day + 2)]))
+    assert conn.execute("SELECT COUNT(*) FROM shootings").fetchone() == (5,)
+    totals_consistent(conn)
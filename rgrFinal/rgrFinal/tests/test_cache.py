@@ -0,0 +1,47 @@
+﻿from cache import QueryCache
+from repositories import ActorExpense, ReportService, ShootingRepository
+
+# QueryCache: запись в таблицу сбрасывает результаты, построенные по ней, и
+# только их; результат, посчитанный во время записи, не сохраняется.
+
+def add_data(conn):
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Актёр', 100)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Фильм', NULL, 1000000)")
+    conn.commit()
+    repository = ShootingRepository(conn)
+    repository.add(1, 1, "2025-01-01", "Сцена", 10)
+    return repository
+
+def test_write_invalidates_dependent_results(conn):
+    repository = add_data(conn)
+    cache = QueryCache()
+    reports = ReportService(conn, cache)
+    assert reports.actor_expenses() == [ActorExpense(1, "Актёр", 10)]
+    budgets = reports.movie_budgets()
+
+    repository.add(1, 1, "2025-01-02", "Сцена", 15)
+    # Без invalidate кэш отдаёт прежний результат.
+    assert reports.actor_expenses() == [ActorExpense(1, "Актёр", 10)]
+    cache.invalidate("actors")
+    assert reports.actor_expenses() == [ActorExpense(1, "Актёр", 25)]
+    # Бюджеты от actors не зависят и остаются в кэше.
+    assert reports.movie_budgets() == budgets
+    assert cache.stats().invalidations == 1
+
+    # От shootings зависят оба результата.
+    cache.invalidate("shootings")
+    assert cache.stats().entries == 0
+    assert reports.movie_budgets()[0].spent == 25
+
+def test_result_loaded_during_write_is_not_kept(conn):
+    cache = QueryCache()
+    key = ("SELECT", ())
+
+    def load():
+        cache.invalidate("shootings")
+        return [(1,)]
+
+    assert cache.fetch(key, ("shootings",), load) == [(1,)]
+    assert cache.fetch(key, ("shootings",), lambda: [(2,)]) == [(2,)]
+    assert cache.fetch(key, ("shootings",), lambda: [(3,)]) == [(2,)]
+    assert cache.stats().hits == 1
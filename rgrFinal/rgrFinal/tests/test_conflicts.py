@@ -0,0 +1,54 @@
+﻿import conflicts
+from repositories import Shooting, ShootingRepository
+from rgrFinal import RowChange
+
+# Индекс расписания ScheduleIndex: после изменений он совпадает с индексом,
+# загруженным из базы заново.
+
+def add_schedule(conn):
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Актёр', 100)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Фильм 1', NULL, 1000000)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Фильм 2', NULL, 1000000)")
+    for number in range(6):
+        conn.execute("INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар) VALUES (1, ?, ?, 'Сцена', 30)",
+                     (number % 2 + 1, f"2025-01-{number % 3 + 1:02d}"))
+    conn.commit()
+
+def state(actor):
+    return actor.days, actor.day_of
+
+def test_legacy_date_is_skipped(conn):
+    add_schedule(conn)
+    conn.execute("UPDATE shootings SET дата = 'в январе' WHERE id = 1")
+    conn.commit()
+    index = conflicts.ScheduleIndex(conn)
+    index.actor(1)
+    legacy = Shooting(1, 1, 1, "в январе", "Сцена", 30)
+    index.apply(RowChange("shootings", "update", 1, legacy, legacy._replace(fee=40)))
+    index.apply(RowChange("shootings", "insert", 7, None, Shooting(7, 1, 1, "01.02.2025", "Сцена", 30)))
+    assert index.check(1, 1, "в январе", 30) == []
+    assert state(index.actor(1)) == state(conflicts.ScheduleIndex(conn).actor(1))
+
+def test_bulk_changes_update_actor_days(conn):
+    add_schedule(conn)
+    repository = ShootingRepository(conn)
+    index = conflicts.ScheduleIndex(conn)
+    index.actor(1)
+    for change in (lambda: repository.reschedule([1, 2, 5], 1),
+                   lambda: repository.adjust_fees([2, 3], 10, 0),
+                   lambda: (repository.delete_many([4, 6]), [])):
+        old_rows, new_rows = change()
+        index.apply(RowChange("shootings", "reload", None, old_rows, new_rows))
+        assert state(index.actor(1)) == state(conflicts.ScheduleIndex(conn).actor(1))
+
+def test_bulk_check_matches_schedule_after_write(conn):
+    # Перенос двух съёмок на один день: конфликты пакета видны до записи.
+    add_schedule(conn)
+    repository = ShootingRepository(conn)
+    index = conflicts.ScheduleIndex(conn)
+    old_rows, new_rows = repository.reschedule_rows([1, 4], 3)
+    found = index.check_rows(old_rows, new_rows)
+    repository.update_many(old_rows, new_rows, ["date"])
+    days = {(conflicts.day_number(row.date), row.actor_id) for row in new_rows}
+    assert found
+    assert found == [conflict for conflict in conflicts.scan_schedule(conn) if (conflict.day, conflict.actor_id) in days]
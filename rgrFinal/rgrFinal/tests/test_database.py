@@ -0,0 +1,36 @@
+﻿import pytest
+
+import database
+
+# Соединение с базой: профили PRAGMA и их восстановление. Даты съёмок
+# приводятся к ГГГГ-ММ-ДД.
+
+@pytest.mark.parametrize("profile", sorted(database.PROFILES))
+def test_connect_to_memory_database(profile):
+    conn = database.connect(":memory:", profile)
+    database.migrate(conn)
+    assert database.schema_version(conn) == database.LATEST_VERSION
+    previous = database.apply_profile(conn, "bulk", database.SESSION_PRAGMAS)
+    database.set_pragmas(conn, previous)
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == previous["synchronous"]
+    conn.close()
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025-02-01", "2025-02-01"),
+    (" 2025-02-01 ", "2025-02-01"),
+    ("2025-2-1", "2025-02-01"),
+    # Точки - всегда ДД.ММ.ГГГГ: 01.02 - первое февраля, а не второе января.
+    ("01.02.2025", "2025-02-01"),
+    ("1.2.2025", "2025-02-01"),
+    ("12.01.2025", "2025-01-12"),
+])
+def test_normalize_date(text, expected):
+    assert database.normalize_date(text) == expected
+
+# Месяц на месте дня и другие формы ISO не переставляются молча, а
+# отклоняются.
+@pytest.mark.parametrize("text", ["05.13.2025", "2025-13-01", "2025-02-30", "30.02.2025", "20250201",
+                                  "2025-W05-6", "02/01/2025", ""])
+def test_normalize_date_rejects(text):
+    with pytest.raises(ValueError):
+        database.normalize_date(text)
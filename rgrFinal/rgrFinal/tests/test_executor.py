@@ -0,0 +1,56 @@
+﻿import sqlite3
+import threading
+
+import pytest
+
+import database
+from executor import DatabaseExecutor
+
+# DatabaseExecutor: отмена прерывает уже выполняющийся запрос через
+# interrupt(), а отменённая задача из очереди не выполняется. Колбэки
+# отменённых задач в поток Tk не попадают.
+
+ENDLESS_SQL = "WITH RECURSIVE r(n) AS (SELECT started() UNION ALL SELECT n + 1 FROM r) SELECT COUNT(*) FROM r"
+
+@pytest.fixture
+def executor(conn, tmp_path):
+    executor = DatabaseExecutor(str(tmp_path / "filmstudio.db"), connect=database.connect)
+    yield executor
+    executor.shutdown()
+
+def endless(started):
+    # started() вызывается уже внутри запроса: interrupt() после него
+    # попадает в выполняющийся запрос, а не пропадает до его начала.
+    def run(conn):
+        conn.create_function("started", 0, lambda: started.set() or 1)
+        return conn.execute(ENDLESS_SQL).fetchone()
+    return run
+
+def test_cancel_interrupts_running_query(executor):
+    started = threading.Event()
+    delivered = []
+    future = executor.submit(endless(started), on_done=delivered.append, on_error=delivered.append)
+    assert started.wait(5)
+    assert future.cancel()
+    with pytest.raises(sqlite3.OperationalError, match="interrupted"):
+        future.result(timeout=5)
+    assert future.cancelled() and future.done()
+    assert not future.cancel()
+
+    # Рабочий поток продолжает выполнять следующие задачи.
+    after = executor.fetchall("SELECT COUNT(*) FROM actors", on_done=delivered.append)
+    assert after.result(timeout=5) == [(0,)]
+    executor.poll()
+    assert delivered == [[(0,)]]
+
+def test_cancelled_task_does_not_run(executor):
+    release = threading.Event()
+    calls = []
+    executor.submit(lambda conn: release.wait(5))
+    future = executor.submit(lambda conn: calls.append(conn), on_done=calls.append)
+    assert future.cancel()
+    release.set()
+    assert future.result(timeout=5) is None
+    executor.fetchall("SELECT 1").result(timeout=5)
+    executor.poll()
+    assert calls == []
@@ -0,0 +1,68 @@
+﻿import csv
+import os
+
+import pytest
+
+import database
+import exporter
+
+# Экспорт всех таблиц: файлы - один снимок базы, даже если в неё пишут во
+# время экспорта. Отменённый экспорт не оставляет недописанных файлов.
+
+def add_data(conn):
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Актёр', 100)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Фильм', NULL, 1000000)")
+    conn.executemany("INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар) VALUES (1, 1, ?, 'Сцена', 10)",
+                     ((f"2025-01-{day:02d}",) for day in range(1, 29)))
+    conn.commit()
+
+def test_cancelled_stream_leaves_no_file(conn, tmp_path):
+    add_data(conn)
+    filename = str(tmp_path / "shootings.csv")
+    batches = []
+
+    def progress(done, total, elapsed):
+        batches.append(done)
+        assert os.path.exists(filename)
+
+    # Отмена после второй пачки: часть строк уже записана в файл.
+    with pytest.raises(exporter.ExportCancelled):
+        exporter.stream_csv(conn, "SELECT * FROM shootings", filename, ["id"], batch_size=5,
+                            progress=progress, cancelled=lambda: len(batches) == 2)
+    assert batches == [5, 10]
+    assert not os.path.exists(filename)
+
+    written, _ = exporter.stream_csv(conn, "SELECT * FROM shootings", filename, ["id"], batch_size=5)
+    assert written == 28
+    assert os.path.exists(filename)
+
+def test_cancelled_snapshot_leaves_no_files(conn, tmp_path):
+    add_data(conn)
+    directory = str(tmp_path / "export")
+    os.mkdir(directory)
+    with pytest.raises(exporter.ExportCancelled):
+        exporter.export_snapshot(conn, directory, batch_size=5, cancelled=lambda: True)
+    assert os.listdir(directory) == []
+
+def test_snapshot_ignores_concurrent_writes(conn, tmp_path):
+    add_data(conn)
+
+    # progress вызывается из потоков экспорта.
+    writer = database.connect(str(tmp_path / "filmstudio.db"), check_same_thread=False)
+
+    def write_during_export(done, total, elapsed):
+        writer.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Новый актёр', 100)")
+        writer.execute("INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар) "
+                       "VALUES (1, 1, '2025-02-01', 'Сцена', 10)")
+        writer.commit()
+
+    directory = str(tmp_path / "export")
+    os.mkdir(directory)
+    exporter.export_snapshot(conn, directory, batch_size=5, progress=write_during_export)
+    writer.close()
+    counts = {}
+    for name in ("actors.csv", "movies.csv", "shootings.csv"):
+        with open(os.path.join(directory, name), newline="", encoding="utf-8") as f:
+            counts[name] = len(list(csv.reader(f))) - 1
+    assert counts == {"actors.csv": 1, "movies.csv": 1, "shootings.csv": 28}
+    assert conn.execute("SELECT COUNT(*) FROM shootings").fetchone()[0] > 28
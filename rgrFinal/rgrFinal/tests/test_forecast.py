@@ -0,0 +1,35 @@
+﻿from datetime import date
+
+from repositories import MovieBudget, ReportService, ShootingRepository
+
+# Прогноз затрат фильма, у которого ещё не прошло ни одного дня съёмок или
+# прошёл только сегодняшний: расход в день без деления на ноль, прогноз не
+# меньше запланированного.
+
+TODAY = date(2025, 1, 1)
+
+def add_data(conn):
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Актёр', 1000)")
+    for title in ("Сегодня", "Только будущие", "Без съёмок"):
+        conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, NULL, 10000)", (title,))
+    conn.commit()
+    ShootingRepository(conn).add_many([
+        (1, 1, "2025-01-01", "Сцена", 100),
+        (1, 1, "2025-01-10", "Сцена", 200),
+        (1, 2, "2025-01-05", "Сцена", 300),
+    ])
+
+def test_forecast_without_elapsed_days(conn):
+    add_data(conn)
+    reports = ReportService(conn)
+    budgets = {row.movie_id: row for row in reports.movie_budgets(TODAY)}
+    # Первый день съёмок - сегодня: он считается прошедшим.
+    assert budgets[1] == MovieBudget(1, "Сегодня", 10000, 300, 200, 100.0, 100 + 100.0 * 9)
+    assert budgets[2] == MovieBudget(2, "Только будущие", 10000, 300, 300, 0.0, 300)
+    assert budgets[3] == MovieBudget(3, "Без съёмок", 10000, 0, 0, 0.0, 0)
+    for movie_id, row in budgets.items():
+        assert reports.movie_budget(movie_id, TODAY) == row
+
+    # Накануне первой съёмки у фильма 1 тоже ничего не оплачено.
+    row = reports.movie_budget(1, date(2024, 12, 31))
+    assert (row.burn_rate, row.projected) == (0.0, 300)
@@ -0,0 +1,30 @@
+﻿import database
+from rgrFinal import REPORT_TABLES, Generations
+
+# Generations: запись из программы устаревает только вкладки, построенные по
+# изменённой таблице; коммит другого соединения устаревает все вкладки, а
+# свой коммит и чтение - ни одной.
+
+def test_bump_changes_only_dependent_tabs(conn):
+    generations = Generations(conn, ("actors", "movies", "shootings"))
+    built = {tab: generations.snapshot(tables) for tab, tables in REPORT_TABLES.items()}
+    generations.bump("actors")
+    stale = {tab for tab, tables in REPORT_TABLES.items() if generations.snapshot(tables) != built[tab]}
+    assert stale == {"schedule", "calendar", "expenses", "analytics"}
+    assert generations.snapshot(REPORT_TABLES["budget"]) == built["budget"]
+
+def test_external_commit_changes_all_tabs(conn, tmp_path):
+    generations = Generations(conn, ("actors", "movies", "shootings"))
+    built = generations.snapshot(("actors", "movies", "shootings"))
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Свой', 100)")
+    conn.commit()
+    assert not generations.check_external()
+
+    other = database.connect(str(tmp_path / "filmstudio.db"))
+    other.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Чужой', NULL, 1000)")
+    other.commit()
+    other.close()
+    assert generations.check_external()
+    assert generations.snapshot(("actors", "movies", "shootings")) == tuple(number + 1 for number in built)
+    # Тот же коммит второй раз не засчитывается.
+    assert not generations.check_external()
@@ -0,0 +1,36 @@
+﻿import database
+
+# Миграции: пустая база и база первой версии с данными приводятся к
+# последней версии схемы, данные и сводные таблицы сохраняются.
+
+def test_migrate_empty_database(tmp_path):
+    conn = database.connect(str(tmp_path / "filmstudio.db"))
+    assert database.schema_version(conn) == 0
+    assert database.migrate(conn) == database.LATEST_VERSION
+    assert database.schema_version(conn) == database.LATEST_VERSION
+    assert database.migrate(conn) == database.LATEST_VERSION
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    conn.close()
+
+def test_migrate_data_from_first_version(tmp_path, totals_consistent):
+    conn = database.connect(str(tmp_path / "filmstudio.db"))
+    database.migrate(conn, 1)
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Ёлкин Иван', 500)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Первый фильм', NULL, 100000)")
+    conn.executemany("INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар) VALUES (1, 1, ?, ?, ?)", [
+        ("2025-01-05", "Погоня", 100),
+        ("05.01.2025", "Погоня", 200),
+        ("2025-1-6", None, None),
+        ("в январе", "Финал", 50),
+    ])
+    conn.commit()
+
+    database.migrate(conn)
+    assert database.schema_version(conn) == database.LATEST_VERSION
+    dates = [row[0] for row in conn.execute("SELECT дата FROM shootings ORDER BY id")]
+    assert dates == ["2025-01-05", "2025-01-05", "2025-01-06", "в январе"]
+    assert conn.execute("SELECT COUNT(*) FROM day_totals").fetchone() == (2,)
+    assert conn.execute("SELECT spent, shootings_count FROM movie_spend").fetchone() == (350, 4)
+    assert conn.execute("SELECT fio_key FROM actors").fetchone()[0].startswith("елкин иван\x01")
+    totals_consistent(conn)
+    conn.close()
@@ -0,0 +1,57 @@
+﻿import pytest
+
+from repositories import MovieRepository, ShootingRepository
+
+# Постраничный вывод VirtualTreeview по ключу: при любой сортировке
+# прокрутка вперёд и назад показывает каждую строку ровно один раз, в том
+# числе когда граница страницы приходится на строку с NULL.
+
+def add_rows(conn):
+    # 30 фильмов и съёмок, у каждой третьей нет режиссёра, сцены или гонорара.
+    for number in range(30):
+        director = None if number % 3 == 0 else f"Режиссёр {number % 7}"
+        conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, ?, ?)",
+                     (f"Фильм {number % 11}", director, 1000000))
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Актёр', 100)")
+    for number in range(30):
+        scene = None if number % 3 == 1 else f"Сцена {number % 5}"
+        fee = None if number % 3 == 2 else number % 4 * 10
+        conn.execute("INSERT INTO shootings (actor_id, movie_id, дата, сцена, гонорар) VALUES (1, ?, ?, ?, ?)",
+                     (number % 5 + 1, f"2025-01-{number % 9 + 1:02d}", scene, fee))
+    conn.commit()
+
+def walk(view, step):
+    # Ключи строк в порядке показа при прокрутке по step строк.
+    seen = []
+    first = 0
+    while True:
+        view.scroll_to(first)
+        seen.extend(view.tree.get_children()[len(seen) - view.first:])
+        if view.first + view.visible >= view.total:
+            return seen
+        first += step
+
+@pytest.mark.parametrize("repository, column", [
+    (MovieRepository, "title"),
+    (MovieRepository, "director"),
+    (ShootingRepository, "scene"),
+    (ShootingRepository, "fee"),
+    (ShootingRepository, "date"),
+])
+@pytest.mark.parametrize("descending", [False, True])
+def test_paging_with_nulls_shows_every_row(conn, make_view, repository, column, descending):
+    add_rows(conn)
+    view = make_view(conn, repository, 3, 2)
+    view.sort_by(column)
+    if descending:
+        view.sort_by(column)
+
+    forward = walk(view, 2)
+    assert len(forward) == view.total == 30
+    assert len(set(forward)) == 30
+
+    backward = []
+    for first in list(range(view.total - view.visible, 0, -2)) + [0]:
+        view.scroll_to(first)
+        backward[:0] = [iid for iid in view.tree.get_children() if iid not in backward]
+    assert backward == forward
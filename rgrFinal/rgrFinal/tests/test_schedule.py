@@ -0,0 +1,29 @@
+﻿from datetime import date
+
+from repositories import ReportService, ShootingRepository
+
+# Строки расписания одного актёра или фильма за период выбираются одним
+# запросом и совпадают со строками всего расписания за тот же период.
+
+def add_data(conn):
+    for number in range(3):
+        conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES (?, 100000)", (f"Актёр {number}",))
+        conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, NULL, 1000000)",
+                     (f"Фильм {number}",))
+    conn.commit()
+    ShootingRepository(conn).add_many([(number % 3 + 1, number % 2 + 1, f"2025-01-{number % 28 + 1:02d}", "Сцена", 10)
+                                       for number in range(60)])
+
+def test_schedule_for_actor_and_movie(conn):
+    add_data(conn)
+    reports = ReportService(conn)
+    for start, end in ((None, None), (date(2025, 1, 5), date(2025, 1, 20)), (date(2025, 1, 25), None)):
+        rows = reports.schedule(start, end)
+        for actor_id in (1, 2, 3):
+            actor = f"Актёр {actor_id - 1}"
+            assert (sorted(reports.schedule_for(start, end, actor_id=actor_id))
+                    == sorted(row for row in rows if row.actor == actor))
+        for movie_id in (1, 2, 3):
+            movie = f"Фильм {movie_id - 1}"
+            assert (sorted(reports.schedule_for(start, end, movie_id=movie_id))
+                    == sorted(row for row in rows if row.movie == movie))
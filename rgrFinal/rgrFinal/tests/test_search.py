@@ -0,0 +1,54 @@
+﻿import pytest
+
+import search
+from repositories import ShootingRepository
+from search import SearchService
+
+# Поиск по индексам FTS5: слова запроса ищутся как начала слов в любом
+# порядке, лучшие совпадения по bm25 выбираются среди всех найденных, а не
+# среди самых новых.
+
+def add_data(conn):
+    for fio in ("Петров Иван", "Иванов Пётр", "Ёлкина Анна", "Сидоров Иннокентий"):
+        conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES (?, 1000)", (fio,))
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Погоня', 'Иван Петров', 1000000)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Котлета', NULL, 1000000)")
+    conn.commit()
+    return ShootingRepository(conn)
+
+def test_words_in_any_order_and_prefixes(conn):
+    add_data(conn)
+    finder = SearchService(conn)
+    # «Пётр» находится по «пет»: ё и е не различаются.
+    assert [hit.title for hit in finder.actors("иван пет")] == ["Петров Иван", "Иванов Пётр"]
+    assert [hit.title for hit in finder.actors("петров ив")] == ["Петров Иван"]
+    assert {hit.title for hit in finder.actors("ИВАН")} == {"Петров Иван", "Иванов Пётр"}
+    assert [hit.title for hit in finder.actors("елкина")] == ["Ёлкина Анна"]
+    assert [hit.title for hit in finder.movies("петров")] == ["Погоня"]
+    assert finder.actors("  ,. ") == []
+    hits = finder.search_all("иван")
+    assert [hit.kind for hit in hits] == ["actors", "actors", "movies"]
+
+def test_whole_word_ranks_above_prefix(conn):
+    add_data(conn)
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Кот', NULL, 1000000)")
+    conn.commit()
+    assert [hit.title for hit in SearchService(conn).movies("кот")] == ["Кот", "Котлета"]
+
+def test_best_match_is_not_cut_by_recency(conn):
+    repository = add_data(conn)
+    scene_id = repository.add(1, 1, "2025-01-01", "Погоня", 0)
+    # Более новых и более длинных совпадений больше, чем CANDIDATES.
+    repository.add_many([(2, 1, "2025-01-02", f"Погоня по крышам, дубль {number}", 0)
+                         for number in range(search.CANDIDATES + 200)])
+    hits = SearchService(conn).scenes("погоня", limit=5)
+    assert len(hits) == 5
+    assert hits[0].id == scene_id
+    assert hits[0].detail == "Петров Иван, Погоня, 2025-01-01"
+
+def test_broad_search_is_limited_in_time(conn):
+    repository = add_data(conn)
+    repository.add_many([(1, 1, "2025-01-02", f"Сцена {number}", 0) for number in range(2000)])
+    with pytest.raises(search.SearchTooBroad):
+        search.search_all(conn, "сцена", timeout=0)
+    assert len(search.search_all(conn, "сцена", limit=10)) == 10
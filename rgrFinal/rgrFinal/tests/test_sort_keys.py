@@ -0,0 +1,56 @@
+﻿import sqlite3
+from datetime import date
+
+import database
+from repositories import ReportService, ShootingRepository
+
+# Ключи сортировки *_key: тот же порядок, что ru_key, и в схеме нет
+# сравнений, которые надо регистрировать в соединении.
+
+NAMES = ["Ёлкин", "елкин", "ЕЛКИН", "Ежов", "ёж", "Ель", "Жуков", "ершов", "Абв", "абв",
+         "Яковлев", "Alpha", "alpha", "Zeta", "Élan", "1Кот"]
+
+def test_key_order_matches_ru_key(conn):
+    for name in NAMES:
+        conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES (?, 100)", (name,))
+        conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, ?, 1000)", (name, name))
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Без режиссёра', NULL, 1000)")
+    conn.commit()
+    expected = sorted(NAMES, key=database.ru_key)
+    assert [row[0] for row in conn.execute("SELECT fio FROM actors ORDER BY fio_key")] == expected
+    assert [row[0] for row in conn.execute("SELECT название FROM movies WHERE режиссёр IS NOT NULL "
+                                           "ORDER BY название_key")] == expected
+    assert conn.execute("SELECT режиссёр FROM movies ORDER BY режиссёр_key LIMIT 1").fetchone()[0] is None
+
+def test_plain_connection_can_write_and_reindex(tmp_path):
+    path = str(tmp_path / "filmstudio.db")
+    conn = database.connect(path)
+    database.migrate(conn)
+    conn.close()
+
+    plain = sqlite3.connect(path)
+    plain.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Новиков', 100)")
+    plain.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Новый фильм', NULL, 1000)")
+    plain.commit()
+    plain.execute("REINDEX")
+    assert plain.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert plain.execute("SELECT COUNT(*) FROM sqlite_master WHERE sql LIKE '%COLLATE RU%'").fetchone()[0] == 0
+    plain.close()
+
+def test_reports_sort_grouped_rows_by_key(conn):
+    for name in NAMES:
+        conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES (?, 1000)", (name,))
+        conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, NULL, 100000)", (name,))
+    conn.commit()
+    shootings = ShootingRepository(conn)
+    for number in range(40):
+        shootings.add(number % 7 + 1, number % 5 + 1, f"2025-01-{number % 20 + 1:02d}", "Сцена", number * 10)
+    reports = ReportService(conn)
+    expenses = reports.actor_expenses()
+    assert [row.actor for row in expenses] == sorted(NAMES, key=database.ru_key)
+    assert expenses == [reports.actor_expense(row.actor_id) for row in expenses]
+    assert sum(row.total_fee for row in expenses) == sum(number * 10 for number in range(40))
+    today = date(2025, 1, 10)
+    budgets = reports.movie_budgets(today)
+    assert [row.movie for row in budgets] == sorted(NAMES, key=database.ru_key)
+    assert budgets == [reports.movie_budget(row.movie_id, today) for row in budgets]
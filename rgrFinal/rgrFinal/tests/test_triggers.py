@@ -0,0 +1,56 @@
+﻿import csv
+
+import importer
+from repositories import ShootingRepository
+
+# Триггеры movie_spend и day_totals: после любых изменений съёмок сводные
+# таблицы совпадают с пересчётом по самим съёмкам.
+
+def add_data(conn):
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Актёр 1', 1000)")
+    conn.execute("INSERT INTO actors (fio, ставка_за_день) VALUES ('Актёр 2', 1000)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Фильм 1', NULL, 1000000)")
+    conn.execute("INSERT INTO movies (название, режиссёр, бюджет) VALUES ('Фильм 2', NULL, 1000000)")
+    conn.commit()
+    repository = ShootingRepository(conn)
+    for number in range(12):
+        repository.add(number % 2 + 1, number % 2 + 1, f"2025-01-{number % 4 + 1:02d}", f"Сцена {number}",
+                       None if number % 5 == 0 else 100 + number)
+    return repository
+
+def test_single_changes(conn, totals_consistent):
+    repository = add_data(conn)
+    totals_consistent(conn)
+    repository.update(1, 2, 1, "2025-01-03", "Сцена", 250)
+    totals_consistent(conn)
+    repository.update(2, 2, 2, "2025-02-01", "Сцена", None)
+    totals_consistent(conn)
+    repository.delete(3)
+    totals_consistent(conn)
+
+def test_bulk_changes(conn, totals_consistent):
+    repository = add_data(conn)
+    repository.reschedule([1, 2, 3, 4], 2)
+    totals_consistent(conn)
+    repository.adjust_fees([1, 5, 6], 10, 5)
+    totals_consistent(conn)
+    repository.delete_many([2, 6, 7])
+    totals_consistent(conn)
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(importer.ShootingRows.columns)
+        writer.writerows(rows)
+
+def test_import(conn, tmp_path, totals_consistent):
+    add_data(conn)
+    path = tmp_path / "shootings.csv"
+    # Файл больше оценки по числу съёмок: индексы строятся заново.
+    write_csv(path, [("Актёр 1", "Фильм 2", f"{day % 28 + 1:02d}.03.2025", "Импорт", day) for day in range(200)]
+              + [("Актёр 2", "Фильм 1", "2025-01-01", "", "")])
+    indexes = conn.execute("SELECT name, sql FROM sqlite_master ORDER BY name").fetchall()
+    importer.import_csv(conn, "shootings", str(path), batch_size=50)
+    assert conn.execute("SELECT COUNT(*) FROM shootings").fetchone() == (213,)
+    assert conn.execute("SELECT name, sql FROM sqlite_master ORDER BY name").fetchall() == indexes
+    totals_consistent(conn)
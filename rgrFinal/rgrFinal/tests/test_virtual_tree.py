@@ -0,0 +1,123 @@
+﻿import pytest
+
+from rgrFinal import RowChange
+from repositories import MovieRepository
+
+# VirtualTreeview: в Treeview только видимое окно строк, соседние страницы
+# подгружаются по ключу, и порядок строк совпадает с полной сортировкой в SQL.
+
+def add_movies(conn, count):
+    # Названий 17, режиссёров 3, бюджетов 5: у равных значений много строк.
+    conn.executemany("INSERT INTO movies (название, режиссёр, бюджет) VALUES (?, ?, ?)",
+                     [(f"Фильм {number % 17}", f"Режиссёр {number % 3}", number % 5 * 1000)
+                      for number in range(count)])
+    conn.commit()
+
+def ordered_ids(conn, order, where=""):
+    return [str(row[0]) for row in conn.execute(f"SELECT id FROM movies {where} ORDER BY {order}")]
+
+def shown(view):
+    return list(view.tree.get_children())
+
+def test_window_holds_only_visible_rows(conn, make_view):
+    add_movies(conn, 500)
+    view = make_view(conn, MovieRepository, 10, 5)
+    expected = ordered_ids(conn, "id")
+    assert view.total == 500
+    for first in (0, 7, 250, 251, 243, 480, 1000, 3):
+        view.scroll_to(first)
+        first = min(first, 490)
+        assert view.first == first
+        assert shown(view) == expected[first:first + 10]
+        assert len(view.buffer) <= 10 + 2 * 5
+        assert view.row(expected[first])[0] == int(expected[first])
+
+def test_filter_pages_only_matching_rows(conn, make_view):
+    add_movies(conn, 120)
+    view = make_view(conn, MovieRepository, 6, 2)
+    view.scroll_to(50)
+    view.set_filter("режиссёр = ?", ("Режиссёр 1",))
+    expected = ordered_ids(conn, "id", "WHERE режиссёр = 'Режиссёр 1'")
+    assert view.total == len(expected) == 40
+    assert view.first == 0
+    for first in range(0, 40, 4):
+        view.scroll_to(first)
+        first = min(first, 34)
+        assert shown(view) == expected[first:first + 6]
+
+@pytest.mark.parametrize("column, order", [
+    ("title", "название_key, id"),
+    ("director", "режиссёр_key, id"),
+    ("budget", "бюджет, id"),
+])
+def test_sort_pages_match_full_order(conn, make_view, column, order):
+    add_movies(conn, 200)
+    view = make_view(conn, MovieRepository, 7, 3)
+    ascending = ordered_ids(conn, order)
+    descending = ordered_ids(conn, order.replace(", id", " DESC, id DESC"))
+    for reverse, expected in ((False, ascending), (True, descending)):
+        assert view.sort_by(column) == reverse
+        assert view.first == 0
+        # Шаг меньше окна, поэтому границы страниц приходятся и на середину
+        # групп с равными значениями, и на переходы между группами.
+        for first in list(range(0, 200, 5)) + list(range(199, -1, -3)):
+            view.scroll_to(first)
+            first = min(first, 193)
+            assert shown(view) == expected[first:first + 7]
+
+def test_changes_keep_window_in_order(conn, make_view):
+    add_movies(conn, 60)
+    repository = MovieRepository(conn)
+    view = make_view(conn, MovieRepository, 10, 3)
+    view.sort_by("title")
+    view.scroll_to(20)
+
+    def check():
+        expected = ordered_ids(conn, "название_key, id")
+        assert view.total == len(expected)
+        assert shown(view) == expected[view.first:view.first + view.visible]
+
+    movie_id = repository.add(conn.execute("SELECT название FROM movies WHERE id = ?",
+                                           (int(shown(view)[5]),)).fetchone()[0], None, 0)
+    view.apply_change(RowChange("movies", "insert", movie_id, None, None))
+    check()
+    assert str(movie_id) in shown(view)
+
+    deleted = shown(view)[3]
+    repository.delete(int(deleted))
+    view.apply_change(RowChange("movies", "delete", int(deleted), None, None))
+    check()
+    assert deleted not in shown(view)
+
+    # Первая показанная строка уходит в конец списка после переименования.
+    moved = shown(view)[0]
+    repository.update(int(moved), "Яблоко", None, 0)
+    view.apply_change(RowChange("movies", "update", int(moved), None, None))
+    check()
+    assert moved not in shown(view)
+
+def test_locate_scrolls_to_row_and_selects_it(conn, make_view):
+    add_movies(conn, 300)
+    view = make_view(conn, MovieRepository, 10, 4)
+    view.sort_by("title")
+    expected = ordered_ids(conn, "название_key, id")
+    assert view.locate(int(expected[150]))
+    assert view.first == 145
+    assert shown(view) == expected[145:155]
+    assert view.tree.selected == (expected[150],)
+    assert view.tree.focus() == expected[150]
+    assert not view.locate(1000)
+
+def test_keyboard_focus_scrolls_window(conn, make_view):
+    add_movies(conn, 100)
+    view = make_view(conn, MovieRepository, 10, 4)
+    expected = ordered_ids(conn, "id")
+    view.move_focus(view.total)
+    assert (view.first, view.tree.focus()) == (90, expected[99])
+    view.move_focus(-1)
+    assert (view.first, view.tree.focus()) == (90, expected[98])
+    view.move_focus(-view.visible)
+    assert (view.first, view.tree.focus()) == (88, expected[88])
+    view.move_focus(-view.total)
+    assert (view.first, view.tree.focus()) == (0, expected[0])
+    assert shown(view) == expected[:10]